@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Поток уведомлений /api/notifications/stream/ (server-sent events) требует
+запуска под ASGI-сервером, например:
+    uvicorn artstudio_project.asgi:application --workers 2
+Под WSGI (gunicorn) поток заняет рабочий процесс на все время соединения.
 """
 
 import os
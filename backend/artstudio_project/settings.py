@@ -17,6 +17,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party
     'rest_framework',
@@ -32,6 +33,7 @@ INSTALLED_APPS = [
     'reports',
     'notifications',
     'comments',
+    'search',
 ]
 
 # Указываем кастомную модель пользователя
@@ -124,4 +126,128 @@ SIMPLE_JWT = {
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
-]
\ No newline at end of file
+]
+
+# Очередь фоновой генерации отчетов (reports/queue.py)
+REPORT_QUEUE = {
+    'WORKERS': int(os.environ.get('REPORT_QUEUE_WORKERS', 2)),
+    'MAX_QUEUED_PER_USER': 5,
+    'MAX_RUNNING_PER_USER': 1,
+    'POLL_INTERVAL': 2,
+    'STALE_AFTER': 600,
+    'EAGER': False,
+}
+
+# Кэш сформированных отчетов (reports/cache.py)
+REPORT_CACHE = {
+    'ENABLED': True,
+    'MAX_AGE_DAYS': 30,
+    'MAX_SIZE_MB': 1024,
+}
+
+# Планировщик отчетов по расписанию шаблонов (reports/scheduler.py)
+REPORT_SCHEDULER = {
+    'BATCH_SIZE': 50,
+    'TICK_INTERVAL': 60,
+}
+
+# Кэш, общий для всех процессов (веб-воркеры, management-команды): версии
+# кэшей дашборда, прав и подсказок сбрасываются сразу во всех процессах.
+# Хранится в PostgreSQL, таблица создается миграцией core.0004_cache_table
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
+
+# Время жизни кэша статистики дашборда, сек (projects/cache.py)
+DASHBOARD_STATS_CACHE_TTL = 60
+
+# Кэш проверок прав на объекты (projects/permission_cache.py)
+PERMISSION_CACHE = {
+    'ENABLED': True,
+    'TTL': 30,
+    'MAX_ENTRIES': 10000,
+    'VERSION_REFRESH': 5,
+}
+
+# Поток уведомлений по SSE через PostgreSQL LISTEN/NOTIFY (notifications/stream.py)
+NOTIFICATION_STREAM = {
+    'CHANNEL': 'notifications',
+    'HEARTBEAT': 15,
+    'QUEUE_SIZE': 100,
+    'RETRY_MS': 5000,
+}
+
+# Хранение уведомлений: архив и партиции по месяцам (notifications/retention.py)
+NOTIFICATION_RETENTION = {
+    'ARCHIVE_AFTER_DAYS': 90,
+    'KEEP_MONTHS': 6,
+    'PREMAKE_MONTHS': 3,
+}
+
+# Дайджесты частых уведомлений (notifications/dispatch.py)
+NOTIFICATION_DIGEST = {
+    'TYPES': ('comment_added', 'file_uploaded'),
+    'MAX_LINES': 10,
+}
+
+# Уведомления о сроках задач (notifications/deadlines.py)
+NOTIFICATION_DEADLINES = {
+    'REMIND_DAYS': 1,
+    'LOOKBACK_DAYS': 7,
+    'CHANNELS': ('system', 'email'),
+    'BATCH_SIZE': 5000,
+}
+
+# Почта для уведомлений
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@artstudio.local')
+
+# Доставка уведомлений по email и Telegram (notifications/delivery.py)
+NOTIFICATION_DELIVERY = {
+    'CHANNELS': ('email', 'telegram'),
+    'WORKERS': int(os.environ.get('NOTIFICATION_DELIVERY_WORKERS', 2)),
+    'BATCH_SIZE': 100,
+    'POLL_INTERVAL': 5,
+    'LOCK_TIMEOUT': 300,
+    'RETRY_DELAY': 300,
+    'MAX_ATTEMPTS': 5,
+    'IDLE_TIMEOUT': 60,
+    'TELEGRAM_TOKEN': os.environ.get('TELEGRAM_BOT_TOKEN', ''),
+    'TELEGRAM_HOST': 'api.telegram.org',
+}
+
+# Полнотекстовый поиск /api/search/ (search/fulltext.py)
+SEARCH = {
+    'LIMIT': 20,
+    'MAX_LIMIT': 50,
+    'MIN_QUERY_LENGTH': 2,
+    'CANDIDATES': 1000,
+    'EXCERPT_LENGTH': 200,
+}
+
+# Загрузка больших файлов по частям /api/files/uploads/ (files/uploads.py)
+FILE_UPLOAD_SESSIONS = {
+    'TEMP_DIR': os.path.join(BASE_DIR, 'upload_sessions'),
+    'CHUNK_SIZE': 5 * 1024 * 1024,
+    'MIN_CHUNK_SIZE': 256 * 1024,
+    'MAX_CHUNK_SIZE': 32 * 1024 * 1024,
+    'EXPIRE_HOURS': 24,
+}
+
+# Автодополнение в полях выбора /api/search/suggest/ (search/suggest.py)
+SEARCH_SUGGEST = {
+    'LIMIT': 10,
+    'MAX_LIMIT': 20,
+    'MIN_PREFIX_LENGTH': 2,
+    'MAX_PREFIX_LENGTH': 64,
+    'CACHE_TTL': 300,
+    'VERSION_TTL': 24 * 60 * 60,
+}
@@ -30,6 +30,8 @@ urlpatterns = [
     path('api/files/', include('files.api.urls')),
     path('api/reports/', include('reports.api.urls')),
     path('api/notifications/', include('notifications.api.urls')),
+    path('api/comments/', include('comments.api.urls')),
+    path('api/search/', include('search.api.urls')),
     
     # Добавляем маршрут для дашборда
     path('api/dashboard/', include('projects.api.urls')),  
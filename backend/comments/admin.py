@@ -4,11 +4,11 @@ from .models import Comment
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('author', 'content_type', 'object_id', 'text_preview', 'created_at', 'is_active')
+    list_display = ('author', 'content_type', 'object_id', 'text_preview', 'reply_count', 'created_at', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('text', 'author__username')
     readonly_fields = ('created_at', 'updated_at')
-    raw_id_fields = ('author',)
+    raw_id_fields = ('author', 'parent')
     
     def text_preview(self, obj):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
@@ -1,6 +1,7 @@
-from .comment import CommentSerializer, CommentCreateSerializer
+from .comment import CommentSerializer, CommentCreateSerializer, CommentReplySerializer
 
 __all__ = [
     'CommentSerializer',
-    'CommentCreateSerializer'
+    'CommentCreateSerializer',
+    'CommentReplySerializer'
 ]
\ No newline at end of file
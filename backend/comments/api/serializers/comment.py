@@ -1,7 +1,18 @@
 from rest_framework import serializers
 from ...models import Comment
+from ...content_objects import resolve_content_objects
 from core.api.serializers import UserSerializer
 
+
+class CommentListSerializer(serializers.ListSerializer):
+    """Список комментариев: объекты комментариев загружаются пачкой и передаются через контекст"""
+    
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        if 'content_objects' not in self.context:
+            self.context['content_objects'] = resolve_content_objects(comments)
+        return super().to_representation(comments)
+
 class CommentSerializer(serializers.ModelSerializer):
     author_details = UserSerializer(source='author', read_only=True)
     content_type_display = serializers.CharField(source='get_content_type_display', read_only=True)
@@ -16,12 +27,17 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'author', 'author_details', 'content_type', 'content_type_display',
             'object_id', 'content_object_info', 'text', 'created_at', 'updated_at',
-            'time_ago', 'replies', 'can_edit', 'can_delete', 'is_active'
+            'time_ago', 'parent', 'depth', 'reply_count', 'replies', 'can_edit', 'can_delete', 'is_active'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'parent', 'depth', 'reply_count']
+        list_serializer_class = CommentListSerializer
     
     def get_content_object_info(self, obj):
-        content_object = obj.content_object
+        content_objects = self.context.get('content_objects')
+        if content_objects is not None:
+            content_object = content_objects.get((obj.content_type, obj.object_id))
+        else:
+            content_object = obj.content_object
         if content_object:
             model_name = content_object.__class__.__name__.lower()
             
@@ -56,26 +72,41 @@ class CommentSerializer(serializers.ModelSerializer):
         return ''
     
     def get_replies(self, obj):
-        # Здесь можно добавить функционал ответов на комментарии
-        # Пока возвращаем пустой список
-        return []
+        # Ответы передаются через контекст (comments/threads.py); без него - только счетчик reply_count
+        replies = self.context.get('replies')
+        if not replies or obj.pk not in replies:
+            return []
+        return CommentSerializer(replies[obj.pk], many=True, context=self.context).data
     
     def get_can_edit(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            return request.user == obj.author or request.user.role in ['director', 'manager']
+            return request.user.pk == obj.author_id or request.user.role in ['director', 'manager']
         return False
     
     def get_can_delete(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            return request.user == obj.author or request.user.role in ['director', 'manager']
+            return request.user.pk == obj.author_id or request.user.role in ['director', 'manager']
         return False
     
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         return super().create(validated_data)
 
+class CommentReplySerializer(serializers.ModelSerializer):
+    """Ответ на комментарий: объект берется у родителя"""
+    
+    class Meta:
+        model = Comment
+        fields = ['text']
+    
+    def validate(self, data):
+        parent = self.context['parent']
+        if parent.depth >= Comment.MAX_DEPTH:
+            raise serializers.ValidationError('Превышена глубина ветки комментариев')
+        return data
+
 class CommentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
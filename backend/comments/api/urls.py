@@ -8,6 +8,7 @@ router.register(r'comments', CommentViewSet, basename='comment')
 comment_urls = [
     path('object/<str:content_type>/<int:object_id>/', ObjectCommentsView.as_view(), name='object-comments'),
     path('<int:pk>/reply/', CommentViewSet.as_view({'post': 'reply'}), name='comment-reply'),
+    path('<int:pk>/thread/', CommentViewSet.as_view({'get': 'thread'}), name='comment-thread'),
 ]
 
 urlpatterns = [
@@ -1,9 +1,10 @@
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
 from ...models import Comment
-from ..serializers import CommentSerializer, CommentCreateSerializer
+from projects.visibility import filter_visible_comments
+from ...threads import get_descendants, get_thread_context
+from ..serializers import CommentSerializer, CommentCreateSerializer, CommentReplySerializer
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
@@ -15,25 +16,9 @@ class CommentViewSet(viewsets.ModelViewSet):
         return CommentSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.role == 'director':
-            return Comment.objects.filter(is_active=True)
-        elif user.role == 'manager':
-            # Менеджер видит комментарии к своим проектам и задачам
-            from projects.models import Project, Task
-            manager_projects = Project.objects.filter(manager=user).values_list('id', flat=True)
-            project_tasks = Task.objects.filter(project__in=manager_projects).values_list('id', flat=True)
-            
-            return Comment.objects.filter(
-                Q(is_active=True) &
-                (Q(content_type='project', object_id__in=manager_projects) |
-                 Q(content_type='task', object_id__in=project_tasks) |
-                 Q(author=user))
-            )
-        else:
-            # Обычные пользователи видят только свои комментарии
-            return Comment.objects.filter(author=user, is_active=True)
+        # Менеджер видит комментарии к своим проектам и задачам, остальные - только свои
+        comments = Comment.objects.select_related('author').filter(is_active=True)
+        return filter_visible_comments(comments, self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -42,14 +27,13 @@ class CommentViewSet(viewsets.ModelViewSet):
     def reply(self, request, pk=None):
         """Ответ на комментарий"""
         parent_comment = self.get_object()
-        serializer = CommentCreateSerializer(data=request.data)
+        serializer = CommentReplySerializer(data=request.data, context={'parent': parent_comment})
         
         if serializer.is_valid():
-            # Создаем ответный комментарий
+            # Ответ наследует объект родителя, путь и счетчики ответов обновляет Comment.save()
             reply = Comment.objects.create(
                 author=request.user,
-                content_type=parent_comment.content_type,
-                object_id=parent_comment.object_id,
+                parent=parent_comment,
                 text=serializer.validated_data['text']
             )
             
@@ -60,13 +44,24 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """Комментарий со всеми ответами (дерево в поле replies) - один запрос на ветку"""
+        root = self.get_object()
+        descendants = get_descendants([root], self.get_queryset())
+        context = self.get_serializer_context()
+        context.update(get_thread_context([root], descendants))
+        return Response(CommentSerializer(root, context=context).data)
+    
     def perform_destroy(self, instance):
-        """Логическое удаление комментария"""
-        instance.is_active = False
-        instance.save()
+        """Логическое удаление комментария вместе с ответами"""
+        instance.deactivate()
 
 class ObjectCommentsView(generics.ListAPIView):
-    """Получение комментариев для конкретного объекта"""
+    """
+    Комментарии объекта: страница комментариев верхнего уровня,
+    у каждого - дерево ответов (все ответы страницы выбираются одним запросом)
+    """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -74,8 +69,22 @@ class ObjectCommentsView(generics.ListAPIView):
         content_type = self.kwargs.get('content_type')
         object_id = self.kwargs.get('object_id')
         
-        return Comment.objects.filter(
+        return Comment.objects.select_related('author').filter(
             content_type=content_type,
             object_id=object_id,
+            parent__isnull=True,
             is_active=True
-        ).order_by('-created_at')
\ No newline at end of file
+        ).order_by('-created_at')
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        roots = list(page if page is not None else queryset)
+        
+        context = self.get_serializer_context()
+        context.update(get_thread_context(roots, get_descendants(roots)))
+        data = CommentSerializer(roots, many=True, context=context).data
+        
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
\ No newline at end of file
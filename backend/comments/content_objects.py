@@ -0,0 +1,38 @@
+"""
+Объекты комментариев для списков.
+
+Comment.content_object загружает объект отдельным запросом, и в списке из
+N комментариев это N запросов. resolve_content_objects() группирует
+комментарии по content_type и загружает объекты каждого типа одним
+запросом in_bulk, выбирая только поля, нужные сериализатору.
+"""
+from collections import defaultdict
+
+from .models.comment import CONTENT_MODELS
+
+# Поля объектов, которые выводит CommentSerializer.get_content_object_info
+CONTENT_FIELDS = {
+    'project': ('id', 'title'),
+    'task': ('id', 'title'),
+    'file': ('id', 'name'),
+    'client': ('id', 'name'),
+}
+
+
+def resolve_content_objects(comments):
+    """Объекты комментариев: {(content_type, object_id): объект} - один запрос на тип"""
+    object_ids = defaultdict(set)
+    for comment in comments:
+        if comment.content_type in CONTENT_MODELS:
+            object_ids[comment.content_type].add(comment.object_id)
+
+    content_objects = {}
+    for content_type, ids in object_ids.items():
+        objects = (
+            CONTENT_MODELS[content_type].objects
+            .only(*CONTENT_FIELDS[content_type])
+            .in_bulk(ids)
+        )
+        for object_id, content_object in objects.items():
+            content_objects[(content_type, object_id)] = content_object
+    return content_objects
@@ -1,4 +1,8 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F
 from core.models import User, Client  
 from projects.models import Project, Task
 from files.models import ProjectFile
@@ -12,6 +16,10 @@ class Comment(models.Model):
         ('client', 'Клиент'),
     ]
     
+    # Длина сегмента пути (id с ведущими нулями) и предельная глубина ветки
+    PATH_SEGMENT_LENGTH = 10
+    MAX_DEPTH = 20
+    
     author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Автор")
     content_type = models.CharField(max_length=10, choices=CONTENT_TYPES, verbose_name="Тип объекта")
     object_id = models.PositiveIntegerField(verbose_name="ID объекта")
@@ -20,27 +28,88 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
     is_active = models.BooleanField(default=True)
     
+    # Ветки ответов: путь - id всех предков и самого комментария ("0000000012/0000000045/"),
+    # поэтому ветка целиком выбирается одним запросом по префиксу в порядке пути
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='children', verbose_name="Ответ на комментарий"
+    )
+    path = models.CharField(max_length=255, blank=True, editable=False, verbose_name="Путь в ветке")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Уровень вложенности")
+    reply_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Ответов в ветке")
+    # Полнотекстовый поиск (search/fulltext.py): на PostgreSQL заполняется триггером при записи
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['content_type', 'object_id']),
+            # Поиск ветки по префиксу пути (LIKE 'prefix%')
+            models.Index(fields=['path'], name='comment_path_idx', opclasses=['varchar_pattern_ops']),
+            # Страница комментариев верхнего уровня объекта
+            models.Index(
+                fields=['content_type', 'object_id', '-created_at'],
+                condition=models.Q(parent__isnull=True),
+                name='comment_top_level_idx'
+            ),
+            GinIndex(fields=['search_vector'], name='comment_search_idx'),
         ]
     
     def __str__(self):
         return f"Комментарий от {self.author} ({self.created_at})"
     
+    @classmethod
+    def path_segment(cls, pk):
+        return f'{pk:0{cls.PATH_SEGMENT_LENGTH}d}/'
+    
+    @property
+    def ancestor_ids(self):
+        """id предков комментария по пути (от корня)"""
+        return [int(segment) for segment in self.path.split('/')[:-2]]
+    
+    def save(self, *args, **kwargs):
+        """Новый ответ наследует объект родителя; путь и счетчики ответов предков - в той же транзакции"""
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+        
+        parent = self.parent
+        if parent is not None:
+            if parent.depth + 1 > self.MAX_DEPTH:
+                raise ValidationError("Превышена глубина ветки комментариев")
+            self.content_type = parent.content_type
+            self.object_id = parent.object_id
+            self.depth = parent.depth + 1
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = (parent.path if parent is not None else '') + self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if parent is not None:
+                Comment.objects.filter(pk__in=self.ancestor_ids).update(reply_count=F('reply_count') + 1)
+    
+    def deactivate(self):
+        """Логическое удаление комментария вместе с ответами на него"""
+        with transaction.atomic():
+            removed = Comment.objects.filter(path__startswith=self.path, is_active=True).update(is_active=False)
+            if removed and self.parent_id:
+                Comment.objects.filter(pk__in=self.ancestor_ids).update(reply_count=F('reply_count') - removed)
+        self.is_active = False
+    
     @property
     def content_object(self):
-        """Получение связанного объекта"""
-        model_map = {
-            'project': Project,
-            'task': Task,
-            'file': ProjectFile,
-            'client': Client,  
-        }
-        model = model_map.get(self.content_type)
+        """Получение связанного объекта (для списков - comments/content_objects.py)"""
+        model = CONTENT_MODELS.get(self.content_type)
         if model:
             return model.objects.filter(id=self.object_id).first()
-        return None
\ No newline at end of file
+        return None
+
+
+# Модели объектов комментариев по значению content_type
+CONTENT_MODELS = {
+    'project': Project,
+    'task': Task,
+    'file': ProjectFile,
+    'client': Client,
+}
\ No newline at end of file
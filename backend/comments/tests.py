@@ -1,3 +1,146 @@
+from datetime import date
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import User, Client
+from projects.models import Project, Task
+from .api.views import CommentViewSet, ObjectCommentsView
+from .models import Comment
+
+
+class HundredPerPage(PageNumberPagination):
+    page_size = 100
+
+
+class CommentListQueryCountTest(TestCase):
+    """Объекты комментариев списка загружаются одним запросом на тип"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create(username='director', role='director')
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        projects = [
+            Project.objects.create(
+                title=f'Проект {i}', client=client_obj, manager=cls.director,
+                start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+            )
+            for i in range(5)
+        ]
+        tasks = Task.objects.bulk_create([
+            Task(title=f'Задача {i}', description='', project=projects[i % 5], deadline=date(2026, 2, 1))
+            for i in range(10)
+        ])
+        targets = (
+            [('project', project.pk) for project in projects]
+            + [('task', task.pk) for task in tasks]
+            + [('client', client_obj.pk)]
+        )
+        Comment.objects.bulk_create([
+            Comment(
+                author=cls.director, content_type=targets[i % len(targets)][0],
+                object_id=targets[i % len(targets)][1], text=f'Комментарий {i}'
+            )
+            for i in range(100)
+        ])
+
+    def _list(self):
+        request = APIRequestFactory().get('/api/comments/comments/')
+        force_authenticate(request, user=self.director)
+        view = CommentViewSet.as_view({'get': 'list'}, pagination_class=HundredPerPage)
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data['results']
+
+    def test_content_objects_are_resolved_in_bulk(self):
+        queries, comments = self._list()
+
+        # count, страница с авторами, по запросу на проекты, задачи и клиентов
+        self.assertEqual(len(comments), 100)
+        self.assertEqual(queries, 5)
+
+        by_type = {comment['content_type']: comment['content_object_info'] for comment in comments}
+        self.assertEqual(by_type['project']['url'], f"/projects/{by_type['project']['id']}")
+        self.assertTrue(by_type['task']['title'].startswith('Задача'))
+        self.assertEqual(by_type['client']['title'], 'Клиент')
+        self.assertEqual(comments[0]['author_details']['username'], 'director')
+
+
+class CommentThreadTest(TestCase):
+    """Ветки комментариев: путь, счетчики ответов и выборка дерева одним запросом"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create(username='director', role='director')
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        cls.project = Project.objects.create(
+            title='Проект', client=client_obj, manager=cls.director,
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+
+    def _comment(self, text, parent=None):
+        if parent is not None:
+            return Comment.objects.create(author=self.director, parent=parent, text=text)
+        return Comment.objects.create(
+            author=self.director, content_type='project', object_id=self.project.pk, text=text
+        )
+
+    def _call(self, view, method, url, **kwargs):
+        request = getattr(APIRequestFactory(), method)(url)
+        force_authenticate(request, user=self.director)
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request, **kwargs)
+            response.render()
+        return len(ctx), response
+
+    def test_thread(self):
+        root = self._comment('Корень')
+        first = self._comment('Ответ 1', root)
+        nested = [self._comment(f'Ответ 1.{i}', first) for i in range(3)]
+        deepest = self._comment('Ответ 1.0.0', nested[0])
+        second = self._comment('Ответ 2', root)
+        other = self._comment('Другая ветка')
+
+        self.assertEqual(deepest.content_type, 'project')
+        self.assertEqual(deepest.depth, 3)
+        self.assertEqual(deepest.path, root.path + first.path[-11:] + nested[0].path[-11:] + deepest.path[-11:])
+        root.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual((root.reply_count, first.reply_count), (6, 4))
+
+        view = CommentViewSet.as_view({'get': 'thread'})
+        queries, response = self._call(view, 'get', f'/api/comments/comments/{root.pk}/thread/', pk=root.pk)
+        # комментарий, ответы ветки, объекты комментариев
+        self.assertEqual(queries, 3)
+        replies = response.data['replies']
+        self.assertEqual([reply['id'] for reply in replies], [first.pk, second.pk])
+        self.assertEqual([reply['id'] for reply in replies[0]['replies']], [c.pk for c in nested])
+        self.assertEqual(replies[0]['replies'][0]['replies'][0]['id'], deepest.pk)
+
+        view = ObjectCommentsView.as_view(pagination_class=HundredPerPage)
+        queries, response = self._call(
+            view, 'get', f'/api/comments/comments/object/project/{self.project.pk}/',
+            content_type='project', object_id=self.project.pk
+        )
+        # count, страница корней, ответы всех корней страницы, объекты комментариев
+        self.assertEqual(queries, 4)
+        results = response.data['results']
+        self.assertEqual([comment['id'] for comment in results], [other.pk, root.pk])
+        self.assertEqual(len(results[1]['replies'][0]['replies']), 3)
 
-# Create your tests here.
+        # Удаление ветки скрывает ответы и уменьшает счетчики предков
+        first.deactivate()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+        self.assertFalse(Comment.objects.filter(pk=deepest.pk, is_active=True).exists())
@@ -0,0 +1,49 @@
+"""
+Ветки комментариев.
+
+Путь комментария (Comment.path) - id всех предков и самого комментария,
+поэтому все ответы в ветке - строки с путем, начинающимся с пути корня.
+get_descendants() выбирает ответы для набора корней одним запросом по индексу
+comment_path_idx в порядке пути (сначала ответ, затем ответы на него);
+group_replies() раскладывает их по родителям для сериализатора.
+"""
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .content_objects import resolve_content_objects
+from .models import Comment
+
+
+def get_descendants(roots, queryset=None):
+    """Активные ответы на комментарии roots (на всю глубину) в порядке пути"""
+    conditions = Q()
+    for root in roots:
+        if root.path:
+            conditions |= Q(path__startswith=root.path, depth__gt=root.depth)
+    if not conditions:
+        return []
+
+    queryset = Comment.objects.all() if queryset is None else queryset
+    return list(
+        queryset
+        .filter(conditions, is_active=True)
+        .select_related('author')
+        .order_by('path')
+    )
+
+
+def group_replies(comments):
+    """Ответы по родителям: {parent_id: [ответы в порядке пути]}"""
+    replies = defaultdict(list)
+    for comment in comments:
+        replies[comment.parent_id].append(comment)
+    return replies
+
+
+def get_thread_context(roots, descendants):
+    """Контекст сериализатора для веток: объекты всех комментариев и ответы по родителям"""
+    return {
+        'content_objects': resolve_content_objects(list(roots) + list(descendants)),
+        'replies': group_replies(descendants),
+    }
@@ -0,0 +1,192 @@
+"""
+Пагинация списков API.
+
+По умолчанию работает как PageNumberPagination (?page=N, точный count).
+Представления с атрибутом cursor_ordering дополнительно поддерживают
+курсорный режим (?pagination=cursor): страница выбирается условием
+по значениям полей сортировки последней (или первой) строки предыдущей
+страницы, а не OFFSET, поэтому глубина страницы не влияет на время
+запроса. Вместо COUNT(*) в ответе возвращается оценка числа строк
+из статистики планировщика PostgreSQL (approximate_count).
+
+Если все поля cursor_ordering сортируются в одном направлении, условие
+строится сравнением строк (a, b, c) > (x, y, z): PostgreSQL использует его
+как начальную границу просмотра составного индекса и не перебирает строки
+предыдущих страниц. При разных направлениях сравнение строк неприменимо:
+условие - цепочка OR, дополненная границей по первому полю.
+
+cursor_ordering должен однозначно упорядочивать строки (последним
+полем обычно идет id) и иметь соответствующий составной индекс.
+Параметр ?ordering в курсорном режиме не учитывается.
+"""
+import base64
+import datetime
+import decimal
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+
+from django.db import connections
+from django.db.models import Field, Func, Q, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class RowValue(Func):
+    """Конструктор строки (a, b, c) для сравнения строк целиком"""
+    template = 'ROW(%(expressions)s)'
+    output_field = Field()
+
+
+def estimate_count(queryset):
+    """
+    Примерное число строк запроса по оценке планировщика (EXPLAIN).
+    На других СУБД (sqlite в разработке) выполняется точный подсчет.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(PageNumberPagination):
+    """Постраничная пагинация с курсорным режимом для представлений с cursor_ordering"""
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        self.keyset = bool(ordering) and (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        page_size = self.get_page_size(request)
+
+        values, reverse = self.decode_cursor(request, queryset.model)
+        self.approximate_count = estimate_count(queryset)
+
+        order_by = [
+            f'-{name}' if desc != reverse else name
+            for name, desc in self.fields
+        ]
+        page_queryset = queryset.order_by(*order_by)
+        if values is not None:
+            page_queryset = page_queryset.filter(self._get_keyset_filter(queryset.model, values, reverse))
+
+        rows = list(page_queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_values = self.previous_values = None
+        if rows:
+            if has_more or reverse:
+                self.next_values = self._get_row_values(rows[-1])
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_values = self._get_row_values(rows[0])
+
+        return rows
+
+    def _get_keyset_filter(self, model, values, reverse):
+        """Строки после курсора (x, y, z) в порядке сортировки страницы"""
+        directions = {desc != reverse for _, desc in self.fields}
+        if len(directions) == 1:
+            # (a, b, c) > (x, y, z) - граница просмотра индекса
+            comparison = LessThan if directions.pop() else GreaterThan
+            return comparison(
+                RowValue(*[name for name, _ in self.fields]),
+                RowValue(*[
+                    Value(value, output_field=model._meta.get_field(name))
+                    for (name, _), value in zip(self.fields, values)
+                ]),
+            )
+
+        # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z), не раньше a = x
+        conditions = []
+        equal = {}
+        for (name, desc), value in zip(self.fields, values):
+            lookup = 'lt' if desc != reverse else 'gt'
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        (first, desc), first_value = self.fields[0], values[0]
+        bound = Q(**{f'{first}__{"lte" if desc != reverse else "gte"}': first_value})
+        return bound & reduce(operator.or_, conditions)
+
+    def _get_row_values(self, row):
+        return [getattr(row, name) for name, _ in self.fields]
+
+    def encode_cursor(self, values, reverse):
+        def _serialize(value):
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                return value.isoformat()
+            if isinstance(value, decimal.Decimal):
+                return str(value)
+            return value
+
+        payload = json.dumps({'v': [_serialize(value) for value in values], 'r': reverse})
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        """Значения полей сортировки и направление из курсора (None, False - первая страница)"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.fields):
+                raise ValueError
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, raw_values)
+            ]
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_values is None:
+            return None
+        return self.encode_cursor(self.next_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_values is None:
+            return None
+        return self.encode_cursor(self.previous_values, reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('approximate_count', self.approximate_count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
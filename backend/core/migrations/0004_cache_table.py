@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:20
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Таблица общего кэша (settings.CACHES): создается вместе с остальной схемой,
+    # чтобы после migrate не требовался отдельный createcachetable
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.core.validators import RegexValidator, MinLengthValidator
 from django.core.exceptions import ValidationError
@@ -47,6 +48,7 @@ class Client(models.Model):
     address = models.TextField(blank=True, verbose_name="Адрес")
     notes = models.TextField(blank=True, verbose_name="Заметки")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата добавления")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
     is_active = models.BooleanField(default=True, verbose_name="Активен")
     is_archived = models.BooleanField(default=False, verbose_name="В архиве")
     
@@ -54,6 +56,10 @@ class Client(models.Model):
         verbose_name = "Клиент"
         verbose_name_plural = "Клиенты"
         ordering = ['name']
+        indexes = [
+            # Автодополнение по названию (search/suggest.py)
+            GinIndex(fields=['name'], name='client_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
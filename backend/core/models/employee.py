@@ -17,6 +17,7 @@ class Employee(models.Model):
     salary_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Ставка оплаты")
     notes = models.TextField(blank=True, verbose_name="Заметки")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     
     class Meta:
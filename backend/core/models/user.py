@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
@@ -34,11 +35,17 @@ class User(AbstractUser):
     theme = models.CharField(max_length=20, default='light', verbose_name="Тема интерфейса")
     two_factor_enabled = models.BooleanField(default=False, verbose_name="Двухфакторная аутентификация")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата регистрации")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
     
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Автодополнение по фамилии и имени (search/suggest.py)
+            GinIndex(fields=['last_name'], name='user_last_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['first_name'], name='user_first_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return f"{self.last_name} {self.first_name} {self.middle_name or ''}".strip()
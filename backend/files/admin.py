@@ -1,6 +1,6 @@
 # files/admin.py
 from django.contrib import admin
-from .models import FileCategory, ProjectFile, FileVersionHistory
+from .models import FileCategory, ProjectFile, FileVersionHistory, UploadSession
 
 @admin.register(FileCategory)
 class FileCategoryAdmin(admin.ModelAdmin):
@@ -37,4 +37,12 @@ class FileVersionHistoryAdmin(admin.ModelAdmin):
     list_display = ('project_file', 'version', 'uploaded_by', 'uploaded_at', 'file_size')
     list_filter = ('uploaded_at',)
     readonly_fields = ('uploaded_at', 'file_size')
-    raw_id_fields = ('project_file', 'uploaded_by')
\ No newline at end of file
+    raw_id_fields = ('project_file', 'uploaded_by')
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('original_filename', 'uploaded_by', 'size', 'chunk_size', 'status', 'created_at', 'expires_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('original_filename', 'name')
+    readonly_fields = ('created_at',)
+    raw_id_fields = ('uploaded_by', 'project', 'task', 'category', 'project_file')
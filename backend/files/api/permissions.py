@@ -1,48 +1,62 @@
 from rest_framework import permissions
+from projects.permission_cache import cached_object_permission
+from projects.visibility import is_project_visible
+
+
+def _is_task_assignee(obj, user):
+    return obj.task_id is not None and obj.task.assigned_to_id == user.id
+
+
+def _is_project_manager(obj, user):
+    return obj.project_id is not None and obj.project.manager_id == user.id
+
 
 class CanViewFile(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return (obj.uploaded_by == user or 
-                   obj.project.manager == user or
-                   obj.project.members.filter(employee__user=user).exists())
+            return (obj.uploaded_by_id == user.id or 
+                   _is_project_manager(obj, user) or
+                   is_project_visible(user, obj.project_id))
         else:
-            return (obj.uploaded_by == user or
-                   obj.task.assigned_to == user or
-                   obj.project.members.filter(employee__user=user).exists())
+            return (obj.uploaded_by_id == user.id or
+                   _is_task_assignee(obj, user) or
+                   is_project_visible(user, obj.project_id))
 
 class CanUploadFile(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return (obj.uploaded_by == user or 
-                   obj.project.manager == user)
+            return (obj.uploaded_by_id == user.id or 
+                   _is_project_manager(obj, user))
         else:
-            return (obj.uploaded_by == user or
-                   obj.task.assigned_to == user)
+            return (obj.uploaded_by_id == user.id or
+                   _is_task_assignee(obj, user))
 
 class CanDeleteFile(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.role in ['director', 'manager']
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return obj.project.manager == user
+            return _is_project_manager(obj, user)
         return False
\ No newline at end of file
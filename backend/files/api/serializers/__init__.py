@@ -1,9 +1,11 @@
 from .file import (
     FileCategorySerializer, ProjectFileSerializer,
-    FileUploadSerializer, FileVersionHistorySerializer
+    FileUploadSerializer, FileVersionHistorySerializer,
+    UploadSessionSerializer
 )
 
 __all__ = [
     'FileCategorySerializer', 'ProjectFileSerializer',
-    'FileUploadSerializer', 'FileVersionHistorySerializer'
+    'FileUploadSerializer', 'FileVersionHistorySerializer',
+    'UploadSessionSerializer'
 ]
\ No newline at end of file
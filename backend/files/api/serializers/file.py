@@ -1,7 +1,17 @@
 from rest_framework import serializers
 import os
 from django.core.validators import FileExtensionValidator
-from ...models import ProjectFile, FileCategory, FileVersionHistory
+from ...models import ProjectFile, FileCategory, FileVersionHistory, UploadSession
+from ...models.utils import get_file_type
+from ...uploads import choose_chunk_size, get_received_chunks, start_session
+
+# Допустимые расширения и наибольший размер загружаемого файла
+ALLOWED_EXTENSIONS = [
+    'jpg', 'jpeg', 'png', 'gif', 'pdf', 'doc', 'docx',
+    'xls', 'xlsx', 'ppt', 'pptx', 'psd', 'ai', 'indd',
+    'mp4', 'mov', 'avi', 'zip', 'rar'
+]
+MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 
 class FileCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -50,11 +60,7 @@ class ProjectFileSerializer(serializers.ModelSerializer):
 class FileUploadSerializer(serializers.ModelSerializer):
     file = serializers.FileField(
         validators=[
-            FileExtensionValidator(allowed_extensions=[
-                'jpg', 'jpeg', 'png', 'gif', 'pdf', 'doc', 'docx',
-                'xls', 'xlsx', 'ppt', 'pptx', 'psd', 'ai', 'indd',
-                'mp4', 'mov', 'avi', 'zip', 'rar'
-            ])
+            FileExtensionValidator(allowed_extensions=ALLOWED_EXTENSIONS)
         ]
     )
     
@@ -64,10 +70,9 @@ class FileUploadSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         # Проверка размера файла (макс 100MB)
-        max_size = 100 * 1024 * 1024  # 100MB
-        if data['file'].size > max_size:
+        if data['file'].size > MAX_FILE_SIZE:
             raise serializers.ValidationError({
-                'file': f'Размер файла превышает {max_size // (1024*1024)}MB'
+                'file': f'Размер файла превышает {MAX_FILE_SIZE // (1024*1024)}MB'
             })
         
         # Проверка, что указан либо проект, либо задача
@@ -90,17 +95,7 @@ class FileUploadSerializer(serializers.ModelSerializer):
         ext = os.path.splitext(file.name)[1].lower()
         
         # Определяем тип файла
-        file_type = 'other'
-        if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg']:
-            file_type = 'image'
-        elif ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']:
-            file_type = 'document'
-        elif ext in ['.zip', '.rar', '.7z']:
-            file_type = 'archive'
-        elif ext in ['.mp4', '.mov', '.avi', '.mkv']:
-            file_type = 'video'
-        elif ext in ['.mp3', '.wav', '.ogg']:
-            file_type = 'audio'
+        file_type = get_file_type(ext)
         
         # Создаем запись файла
         project_file = ProjectFile.objects.create(
@@ -119,6 +114,69 @@ class FileUploadSerializer(serializers.ModelSerializer):
         
         return project_file
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Начало загрузки по частям: те же проверки расширения и размера, что у FileUploadSerializer"""
+    filename = serializers.CharField(max_length=255, write_only=True)
+    requested_chunk_size = serializers.IntegerField(min_value=1, required=False, write_only=True)
+    chunk_count = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'name', 'original_filename', 'extension', 'size',
+            'project', 'task', 'category', 'description', 'checksum', 'requested_chunk_size',
+            'chunk_size', 'chunk_count', 'received_chunks', 'status', 'project_file',
+            'created_at', 'expires_at'
+        ]
+        read_only_fields = [
+            'id', 'original_filename', 'extension', 'chunk_size', 'status',
+            'project_file', 'created_at', 'expires_at'
+        ]
+        extra_kwargs = {'name': {'required': False}}
+    
+    def get_received_chunks(self, obj):
+        return get_received_chunks(obj)
+    
+    def validate_checksum(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or value.strip('0123456789abcdef')):
+            raise serializers.ValidationError('Ожидается SHA-256 в шестнадцатеричном виде')
+        return value
+    
+    def validate(self, data):
+        filename = os.path.basename(data['filename'])
+        ext = os.path.splitext(filename)[1].lower()
+        if ext.lstrip('.') not in ALLOWED_EXTENSIONS or ext not in dict(ProjectFile.EXTENSION_CHOICES):
+            raise serializers.ValidationError({'filename': f'Тип файла {ext} не поддерживается'})
+        
+        if data['size'] < 1:
+            raise serializers.ValidationError({'size': 'Файл пуст'})
+        if data['size'] > MAX_FILE_SIZE:
+            raise serializers.ValidationError({
+                'size': f'Размер файла превышает {MAX_FILE_SIZE // (1024*1024)}MB'
+            })
+        
+        if not data.get('project') and not data.get('task'):
+            raise serializers.ValidationError({
+                'project': 'Необходимо указать проект или задачу'
+            })
+        
+        data['original_filename'] = filename
+        data['extension'] = ext
+        if not data.get('name'):
+            data['name'] = os.path.splitext(filename)[0]
+        return data
+    
+    def create(self, validated_data):
+        validated_data.pop('filename')
+        chunk_size = choose_chunk_size(validated_data.pop('requested_chunk_size', None))
+        return start_session(
+            uploaded_by=self.context['request'].user,
+            chunk_size=chunk_size,
+            **validated_data
+        )
+
 class FileVersionHistorySerializer(serializers.ModelSerializer):
     uploaded_by_name = serializers.CharField(source='uploaded_by.get_full_name', read_only=True)
     file_url = serializers.SerializerMethodField()
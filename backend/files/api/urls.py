@@ -4,12 +4,16 @@ from reports.api.views import GeneratedReportViewSet, ReportTemplateViewSet, Rep
 from .views import (
     ProjectFileViewSet,
     FileCategoryViewSet,
-    FileVersionHistoryViewSet
+    FileVersionHistoryViewSet,
+    UploadSessionViewSet
 )
 
 router = DefaultRouter()
 router.register(r'reports', GeneratedReportViewSet, basename='report')
 router.register(r'report-templates', ReportTemplateViewSet, basename='report-template')
+router.register(r'uploads', UploadSessionViewSet, basename='upload-session')
+# Файлы проектов - последними: пустой префикс не должен перекрывать маршруты выше
+router.register(r'', ProjectFileViewSet, basename='file')
 
 # Дополнительные URL для отчетов
 report_urls = [
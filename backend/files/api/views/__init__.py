@@ -1,9 +1,11 @@
 from .file import ProjectFileViewSet
 from .category import FileCategoryViewSet
 from .version_history import FileVersionHistoryViewSet
+from .upload_session import UploadSessionViewSet
 
 __all__ = [
     'ProjectFileViewSet',
     'FileCategoryViewSet',
     'FileVersionHistoryViewSet',
-]
\ No newline at end of file
+    'UploadSessionViewSet',
+]
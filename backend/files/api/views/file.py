@@ -3,7 +3,6 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
 from django.http import FileResponse
 import os
 from ...models import ProjectFile, FileCategory, FileVersionHistory
@@ -12,6 +11,8 @@ from ..serializers import (
     FileVersionHistorySerializer, FileCategorySerializer
 )
 from ..permissions import CanUploadFile, CanViewFile, CanDeleteFile
+from projects.visibility import filter_visible_files
+from core.api.pagination import KeysetPagination
 
 class ProjectFileViewSet(viewsets.ModelViewSet):
     queryset = ProjectFile.objects.filter(is_active=True)
@@ -20,6 +21,8 @@ class ProjectFileViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, CanViewFile]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['project', 'task', 'file_type', 'category', 'is_current']
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-uploaded_at', '-id')
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -35,22 +38,8 @@ class ProjectFileViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Фильтрация по правам доступа"""
-        user = self.request.user
-        
-        if user.role == 'director':
-            return super().get_queryset()
-        elif user.role == 'manager':
-            return super().get_queryset().filter(
-                Q(project__manager=user) |
-                Q(uploaded_by=user) |
-                Q(project__members__employee__user=user)
-            ).distinct()
-        else:
-            return super().get_queryset().filter(
-                Q(uploaded_by=user) |
-                Q(task__assigned_to=user) |
-                Q(project__members__employee__user=user)
-            ).distinct()
+        # Файлы проектов, где пользователь менеджер или участник (ProjectVisibility), и свои
+        return filter_visible_files(super().get_queryset(), self.request.user)
     
     def create(self, request, *args, **kwargs):
         """Загрузка файла с валидацией"""
@@ -0,0 +1,61 @@
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from ...models import UploadSession
+from ...uploads import UploadError, cancel_session, complete_session, write_chunk
+from ..serializers import ProjectFileSerializer, UploadSessionSerializer
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Докачиваемая загрузка файла по частям (files/uploads.py):
+    POST uploads/ - начало, PUT uploads/<id>/chunks/<offset>/ - часть,
+    GET uploads/<id>/ - принятые части, POST uploads/<id>/complete/ - завершение,
+    DELETE uploads/<id>/ - отмена
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        # Сеансом пользуется только тот, кто начал загрузку
+        return UploadSession.objects.filter(uploaded_by=self.request.user)
+    
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<offset>\d+)')
+    def chunk(self, request, pk=None, offset=None):
+        """Часть файла: тело запроса - байты части, X-Chunk-SHA256 - контрольная сумма"""
+        session = self.get_object()
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        
+        try:
+            chunk = write_chunk(
+                session, int(offset), request.stream, length,
+                request.headers.get('X-Chunk-SHA256', '')
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        
+        return Response({'index': chunk.index, 'size': chunk.size, 'checksum': chunk.checksum})
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Сборка файла из принятых частей"""
+        session = self.get_object()
+        try:
+            project_file = complete_session(session)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        
+        return Response(
+            ProjectFileSerializer(project_file).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    def perform_destroy(self, instance):
+        """Отмена загрузки"""
+        cancel_session(instance)
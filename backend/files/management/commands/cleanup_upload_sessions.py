@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from files.uploads import cleanup_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Удаление незавершенных загрузок по частям с истекшим сроком и их временных файлов'
+    
+    def handle(self, *args, **options):
+        removed = cleanup_expired_sessions()
+        
+        self.stdout.write(self.style.SUCCESS(f'Удалено незавершенных загрузок: {removed}'))
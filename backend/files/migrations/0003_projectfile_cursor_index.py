@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0002_filecategory_is_active_fileversionhistory_file_hash_and_more'),
+        ('projects', '0006_task_cursor_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='projectfile',
+            name='files_proje_uploade_18a772_idx',
+        ),
+        migrations.AddIndex(
+            model_name='projectfile',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='files_proje_uploade_6951e1_idx'),
+        ),
+    ]
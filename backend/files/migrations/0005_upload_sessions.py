@@ -0,0 +1,66 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0004_search_vector'),
+        ('projects', '0008_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='Название файла')),
+                ('original_filename', models.CharField(max_length=255, verbose_name='Оригинальное имя файла')),
+                ('extension', models.CharField(choices=[('.jpg', 'JPG'), ('.jpeg', 'JPEG'), ('.png', 'PNG'), ('.gif', 'GIF'), ('.pdf', 'PDF'), ('.doc', 'DOC'), ('.docx', 'DOCX'), ('.xls', 'XLS'), ('.xlsx', 'XLSX'), ('.ppt', 'PPT'), ('.pptx', 'PPTX'), ('.psd', 'PSD'), ('.ai', 'AI'), ('.indd', 'INDD'), ('.mp4', 'MP4'), ('.mov', 'MOV'), ('.avi', 'AVI'), ('.zip', 'ZIP'), ('.rar', 'RAR')], max_length=10, verbose_name='Расширение')),
+                ('size', models.BigIntegerField(verbose_name='Размер файла (байт)')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Размер части (байт)')),
+                ('description', models.TextField(blank=True, verbose_name='Описание')),
+                ('status', models.CharField(choices=[('active', 'Загружается'), ('completed', 'Завершена'), ('cancelled', 'Отменена')], default='active', max_length=20, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Начало загрузки')),
+                ('expires_at', models.DateTimeField(verbose_name='Действует до')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='files.filecategory', verbose_name='Категория')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='projects.project', verbose_name='Проект')),
+                ('project_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='files.projectfile', verbose_name='Загруженный файл')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='projects.task', verbose_name='Задача')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Загружает')),
+            ],
+            options={
+                'verbose_name': 'Сеанс загрузки файла',
+                'verbose_name_plural': 'Сеансы загрузки файлов',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='Номер части')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер (байт)')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('received_at', models.DateTimeField(auto_now=True, verbose_name='Принята')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='files.uploadsession')),
+            ],
+            options={
+                'verbose_name': 'Часть загружаемого файла',
+                'verbose_name_plural': 'Части загружаемых файлов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['status', 'expires_at'], name='files_uploa_status_6774cb_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='uploadchunk',
+            unique_together={('session', 'index')},
+        ),
+    ]
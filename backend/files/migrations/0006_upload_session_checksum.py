@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0005_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, verbose_name='SHA-256 файла'),
+        ),
+    ]
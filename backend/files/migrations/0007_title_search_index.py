@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0006_upload_session_checksum'),
+        ('projects', '0008_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectfile',
+            index=django.contrib.postgres.indexes.GinIndex(models.Func('search_vector', models.Value('{a}'), function='ts_filter', output_field=django.contrib.postgres.search.SearchVectorField()), name='projectfile_title_search_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from .file_category import FileCategory
 from .project_file import ProjectFile
 from .file_version_history import FileVersionHistory
+from .upload_session import UploadSession
+from .upload_chunk import UploadChunk
 
-__all__ = ['FileCategory', 'ProjectFile', 'FileVersionHistory']
\ No newline at end of file
+__all__ = ['FileCategory', 'ProjectFile', 'FileVersionHistory', 'UploadSession', 'UploadChunk']
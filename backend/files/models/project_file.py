@@ -1,4 +1,6 @@
 import os
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import RegexValidator
 from core.models import User
@@ -49,6 +51,8 @@ class ProjectFile(models.Model):
     is_current = models.BooleanField(default=True, verbose_name="Текущая версия")
     description = models.TextField(blank=True, verbose_name="Описание")
     is_active = models.BooleanField(default=True)
+    # Полнотекстовый поиск (search/fulltext.py): на PostgreSQL заполняется триггером при записи
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = "Файл проекта"
@@ -57,7 +61,14 @@ class ProjectFile(models.Model):
         indexes = [
             models.Index(fields=['project', 'task']),
             models.Index(fields=['file_type']),
-            models.Index(fields=['uploaded_at']),
+            # Сортировка списка и курсорная пагинация (core/api/pagination.py)
+            models.Index(fields=['-uploaded_at', '-id']),
+            GinIndex(fields=['search_vector'], name='projectfile_search_idx'),
+            # Совпадения в заголовке (вес A) - первые кандидаты ранжирования (search/fulltext.py)
+            GinIndex(
+                models.Func('search_vector', models.Value('{a}'), function='ts_filter', output_field=SearchVectorField()),
+                name='projectfile_title_search_idx',
+            ),
         ]
     
     def __str__(self):
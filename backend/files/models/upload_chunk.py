@@ -0,0 +1,18 @@
+from django.db import models
+from .upload_session import UploadSession
+
+class UploadChunk(models.Model):
+    """Принятая часть файла в сеансе загрузки"""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField(verbose_name="Номер части")
+    size = models.PositiveIntegerField(verbose_name="Размер (байт)")
+    checksum = models.CharField(max_length=64, verbose_name="SHA-256")
+    received_at = models.DateTimeField(auto_now=True, verbose_name="Принята")
+    
+    class Meta:
+        verbose_name = "Часть загружаемого файла"
+        verbose_name_plural = "Части загружаемых файлов"
+        unique_together = ['session', 'index']
+    
+    def __str__(self):
+        return f"{self.session_id} #{self.index}"
@@ -0,0 +1,55 @@
+import math
+import uuid
+from django.db import models
+from core.models import User
+from projects.models import Project, Task
+from .file_category import FileCategory
+from .project_file import ProjectFile
+
+class UploadSession(models.Model):
+    """Сеанс докачиваемой загрузки файла по частям (files/uploads.py)"""
+    STATUS_CHOICES = [
+        ('active', 'Загружается'),
+        ('completed', 'Завершена'),
+        ('cancelled', 'Отменена'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name="Загружает")
+    name = models.CharField(max_length=255, verbose_name="Название файла")
+    original_filename = models.CharField(max_length=255, verbose_name="Оригинальное имя файла")
+    extension = models.CharField(max_length=10, choices=ProjectFile.EXTENSION_CHOICES, verbose_name="Расширение")
+    size = models.BigIntegerField(verbose_name="Размер файла (байт)")
+    chunk_size = models.PositiveIntegerField(verbose_name="Размер части (байт)")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Проект")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Задача")
+    category = models.ForeignKey(FileCategory, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Категория")
+    description = models.TextField(blank=True, verbose_name="Описание")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256 файла")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name="Статус")
+    project_file = models.ForeignKey(
+        ProjectFile, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name="Загруженный файл"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Начало загрузки")
+    expires_at = models.DateTimeField(verbose_name="Действует до")
+    
+    class Meta:
+        verbose_name = "Сеанс загрузки файла"
+        verbose_name_plural = "Сеансы загрузки файлов"
+        ordering = ['-created_at']
+        indexes = [
+            # Очистка просроченных сеансов (cleanup_upload_sessions)
+            models.Index(fields=['status', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.original_filename} ({self.get_status_display()})"
+    
+    @property
+    def chunk_count(self):
+        return math.ceil(self.size / self.chunk_size)
+    
+    def get_chunk_length(self, index):
+        """Размер части с номером index (последняя может быть короче)"""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
@@ -11,4 +11,19 @@ def file_upload_path(instance, filename):
     elif instance.task:
         return f'tasks/task_{instance.task.id}/{filename}'
     else:
-        return f'general/{filename}'
\ No newline at end of file
+        return f'general/{filename}'
+
+def get_file_type(extension):
+    """Тип файла (ProjectFile.FILE_TYPES) по расширению"""
+    extension = extension.lower()
+    if extension in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg']:
+        return 'image'
+    elif extension in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']:
+        return 'document'
+    elif extension in ['.zip', '.rar', '.7z']:
+        return 'archive'
+    elif extension in ['.mp4', '.mov', '.avi', '.mkv']:
+        return 'video'
+    elif extension in ['.mp3', '.wav', '.ogg']:
+        return 'audio'
+    return 'other'
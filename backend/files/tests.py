@@ -1,3 +1,158 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import User, Client
+from projects.models import Project
+from .api.views import UploadSessionViewSet
+from .models import ProjectFile, UploadSession
+from .uploads import get_session_path
+
+
+class UploadSessionTest(TestCase):
+    """Загрузка файла по частям: проверки при начале, части в любом порядке, сборка"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='designer', role='designer')
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        cls.project = Project.objects.create(
+            title='Фирменный стиль', client=client_obj, manager=cls.user,
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        upload_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            FILE_UPLOAD_SESSIONS={
+                'TEMP_DIR': os.path.join(self.media_root, 'sessions'),
+                'MIN_CHUNK_SIZE': 4,
+            },
+        )
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+
+    def _post(self, action, url, data, **kwargs):
+        request = APIRequestFactory().post(url, data, format='json')
+        force_authenticate(request, user=self.user)
+        return UploadSessionViewSet.as_view({'post': action})(request, **kwargs)
+
+    def _start(self, filename='layout.psd', size=10, chunk_size=4):
+        return self._post('create', '/api/files/uploads/', {
+            'filename': filename, 'size': size, 'project': self.project.pk,
+            'requested_chunk_size': chunk_size,
+        })
+
+    def _put_chunk(self, session_id, offset, data, checksum=None):
+        request = APIRequestFactory().put(
+            f'/api/files/uploads/{session_id}/chunks/{offset}/', data=data,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(data).hexdigest(),
+        )
+        force_authenticate(request, user=self.user)
+        return UploadSessionViewSet.as_view({'put': 'chunk'})(request, pk=session_id, offset=str(offset))
+
+    def _complete(self, session_id):
+        return self._post('complete', f'/api/files/uploads/{session_id}/complete/', {}, pk=session_id)
+
+    def test_start_validates_extension_and_size(self):
+        response = self._start(filename='script.exe')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('filename', response.data)
+
+        response = self._start(size=100 * 1024 * 1024 + 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('size', response.data)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_chunks_out_of_order_are_assembled(self):
+        content = b'0123456789'
+        response = self._start()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['chunk_size'], response.data['chunk_count']), (4, 3))
+        session_id = response.data['id']
+
+        self.assertEqual(self._put_chunk(session_id, 8, content[8:]).status_code, 200)
+        # Часть с неверной суммой не засчитывается
+        response = self._put_chunk(session_id, 0, content[:4], checksum='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._put_chunk(session_id, 4, content[4:8]).status_code, 200)
+
+        response = self._complete(session_id)
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self._put_chunk(session_id, 0, content[:4]).status_code, 200)
+        response = self._complete(session_id)
+        self.assertEqual(response.status_code, 201)
+
+        project_file = ProjectFile.objects.get(pk=response.data['id'])
+        self.assertEqual((project_file.name, project_file.size, project_file.extension), ('layout', 10, '.psd'))
+        with project_file.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        session = UploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.status, 'completed')
+        self.assertFalse(os.path.exists(get_session_path(session)))
+        self.assertFalse(session.chunks.exists())
+
+    def test_failed_resend_is_not_received(self):
+        content = b'0123456789'
+        session_id = self._start().data['id']
+        for offset in (0, 4, 8):
+            self.assertEqual(self._put_chunk(session_id, offset, content[offset:offset + 4]).status_code, 200)
+
+        # Повтор принятой части с другими байтами и неверной суммой снимает отметку о ее приеме
+        response = self._put_chunk(session_id, 4, b'XXXX', checksum=hashlib.sha256(b'4567').hexdigest())
+        self.assertEqual(response.status_code, 400)
+        session = UploadSession.objects.get(pk=session_id)
+        self.assertEqual(list(session.chunks.order_by('index').values_list('index', flat=True)), [0, 2])
+        self.assertEqual(self._complete(session_id).status_code, 400)
+
+        self.assertEqual(self._put_chunk(session_id, 4, content[4:8]).status_code, 200)
+        response = self._complete(session_id)
+        self.assertEqual(response.status_code, 201)
+        with ProjectFile.objects.get(pk=response.data['id']).file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_complete_verifies_assembled_file(self):
+        content = b'0123456789'
+        response = self._post('create', '/api/files/uploads/', {
+            'filename': 'layout.psd', 'size': 10, 'project': self.project.pk,
+            'requested_chunk_size': 4, 'checksum': hashlib.sha256(b'9876543210').hexdigest(),
+        })
+        session_id = response.data['id']
+        for offset in (0, 4, 8):
+            self._put_chunk(session_id, offset, content[offset:offset + 4])
+
+        # Файл не совпадает с суммой, указанной при начале загрузки
+        response = self._complete(session_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProjectFile.objects.exists())
+
+        # Часть, испорченная на диске после приема, должна быть отправлена заново
+        UploadSession.objects.filter(pk=session_id).update(checksum='')
+        session = UploadSession.objects.get(pk=session_id)
+        with open(get_session_path(session), 'r+b') as part:
+            part.seek(5)
+            part.write(b'X')
+        response = self._complete(session_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('1', response.data['error'])
+
+        self.assertEqual(self._put_chunk(session_id, 4, content[4:8]).status_code, 200)
+        self.assertEqual(self._complete(session_id).status_code, 201)
+
+    def test_chunk_with_wrong_offset_or_length_is_rejected(self):
+        session_id = self._start().data['id']
+        self.assertEqual(self._put_chunk(session_id, 2, b'2345').status_code, 400)
+        self.assertEqual(self._put_chunk(session_id, 0, b'012').status_code, 400)
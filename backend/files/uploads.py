@@ -0,0 +1,273 @@
+"""
+Докачиваемая загрузка файлов по частям.
+
+Большой файл (PSD, MOV) загружается не одним multipart-запросом, а частями,
+поэтому обрыв соединения стоит одной части, а не всего файла:
+    1. POST uploads/ - сеанс: имя, размер, проект или задача и, если клиент
+       ее знает, SHA-256 всего файла (checksum). Расширение и размер
+       проверяются здесь же, как при обычной загрузке. Сервер создает
+       временный файл полного размера и сообщает размер части;
+    2. PUT uploads/<id>/chunks/<offset>/ - часть, тело запроса - байты части,
+       заголовок X-Chunk-SHA256 - ее контрольная сумма. Смещение кратно
+       размеру части, части можно отправлять параллельно и в любом порядке:
+       каждая пишется потоком прямо на свое место во временном файле, без
+       буферизации в памяти и промежуточных файлов. Перед записью отметка
+       о приеме этой части снимается, поэтому часть с неверной суммой
+       (в том числе неудачный повтор уже принятой) не засчитывается
+       и отправляется заново;
+    3. GET uploads/<id>/ - какие части уже приняты (для продолжения загрузки);
+    4. POST uploads/<id>/complete/ - когда приняты все части, собранный файл
+       за одно чтение сверяется с суммами частей и с checksum сеанса, затем
+       переносится в хранилище ProjectFile. FileSystemStorage переносит его
+       переименованием, без повторного копирования данных.
+
+Снятие отметки перед записью и завершение выполняются под блокировкой строки
+сеанса (select_for_update): завершение не начнется, пока часть пишется,
+а часть, испорченная одновременными повторами, найдется при сверке.
+
+Временные файлы лежат в TEMP_DIR - он должен быть на той же файловой
+системе, что и MEDIA_ROOT. Незавершенные сеансы старше EXPIRE_HOURS часов
+удаляет команда cleanup_upload_sessions.
+
+Настройки берутся из settings.FILE_UPLOAD_SESSIONS:
+    TEMP_DIR        - каталог временных файлов (по умолчанию upload_sessions рядом с MEDIA_ROOT)
+    CHUNK_SIZE      - размер части по умолчанию, байт
+    MIN_CHUNK_SIZE  - наименьший размер части, который может запросить клиент
+    MAX_CHUNK_SIZE  - наибольший размер части
+    EXPIRE_HOURS    - время жизни незавершенного сеанса, ч
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ProjectFile, UploadChunk, UploadSession
+from .models.utils import get_file_type
+
+DEFAULT_UPLOAD_SETTINGS = {
+    'TEMP_DIR': None,
+    'CHUNK_SIZE': 5 * 1024 * 1024,
+    'MIN_CHUNK_SIZE': 256 * 1024,
+    'MAX_CHUNK_SIZE': 32 * 1024 * 1024,
+    'EXPIRE_HOURS': 24,
+}
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Ошибка загрузки части или завершения сеанса; status - HTTP-код ответа"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class AssembledFile(File):
+    """
+    Собранный временный файл. temporary_file_path() позволяет
+    FileSystemStorage перенести файл в хранилище переименованием
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def get_upload_settings():
+    """Настройки загрузки по частям с учетом значений по умолчанию"""
+    return {**DEFAULT_UPLOAD_SETTINGS, **getattr(settings, 'FILE_UPLOAD_SESSIONS', {})}
+
+
+def get_temp_dir():
+    # Не внутри MEDIA_ROOT: недокачанные файлы не должны быть доступны по MEDIA_URL
+    return get_upload_settings()['TEMP_DIR'] or os.path.join(os.path.dirname(settings.MEDIA_ROOT), 'upload_sessions')
+
+
+def get_session_path(session):
+    return os.path.join(get_temp_dir(), f'{session.pk}.part')
+
+
+def choose_chunk_size(requested=None):
+    """Размер части: запрошенный клиентом в пределах MIN/MAX или по умолчанию"""
+    options = get_upload_settings()
+    if not requested:
+        return options['CHUNK_SIZE']
+    return max(options['MIN_CHUNK_SIZE'], min(int(requested), options['MAX_CHUNK_SIZE']))
+
+
+def start_session(**fields):
+    """Сеанс загрузки и временный файл полного размера (без записи данных)"""
+    session = UploadSession.objects.create(
+        expires_at=timezone.now() + timedelta(hours=get_upload_settings()['EXPIRE_HOURS']),
+        **fields
+    )
+    os.makedirs(get_temp_dir(), exist_ok=True)
+    with open(get_session_path(session), 'wb') as part:
+        part.truncate(session.size)
+    return session
+
+
+def _check_active(session):
+    if session.status != 'active':
+        raise UploadError('Загрузка уже завершена или отменена', status=409)
+    if session.expires_at <= timezone.now():
+        raise UploadError('Срок сеанса загрузки истек', status=410)
+
+
+def write_chunk(session, offset, stream, length, checksum):
+    """
+    Запись части со смещением offset из потока stream (length байт)
+    с проверкой SHA-256. Возвращает принятую часть.
+    """
+    _check_active(session)
+    if offset < 0 or offset >= session.size or offset % session.chunk_size:
+        raise UploadError(f'Смещение должно быть кратно {session.chunk_size} и меньше размера файла')
+    index = offset // session.chunk_size
+    expected = session.get_chunk_length(index)
+    if length != expected:
+        raise UploadError(f'Размер части должен быть {expected} байт')
+    if not checksum:
+        raise UploadError('Не указана контрольная сумма части (X-Chunk-SHA256)')
+    _forget_chunk(session, index)
+
+    digest = hashlib.sha256()
+    received = 0
+    try:
+        part = open(get_session_path(session), 'r+b')
+    except FileNotFoundError:
+        raise UploadError('Временный файл загрузки не найден', status=409)
+    with part:
+        part.seek(offset)
+        while received < expected:
+            block = stream.read(min(READ_BLOCK_SIZE, expected - received))
+            if not block:
+                break
+            part.write(block)
+            digest.update(block)
+            received += len(block)
+
+    if received != expected:
+        raise UploadError('Часть получена не полностью')
+    if digest.hexdigest() != checksum.lower():
+        raise UploadError('Контрольная сумма части не совпадает')
+
+    chunk = UploadChunk(session=session, index=index, size=received, checksum=digest.hexdigest())
+    UploadChunk.objects.bulk_create(
+        [chunk],
+        update_conflicts=True,
+        unique_fields=['session', 'index'],
+        update_fields=['size', 'checksum', 'received_at']
+    )
+    return chunk
+
+
+def _forget_chunk(session, index):
+    """
+    Часть index перестает считаться принятой до конца записи: если запись
+    оборвется или сумма не совпадет, завершение потребует отправить ее заново
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        _check_active(session)
+        session.chunks.filter(index=index).delete()
+
+
+def get_received_chunks(session):
+    return list(session.chunks.order_by('index').values_list('index', flat=True))
+
+
+def complete_session(session):
+    """Перенос собранного файла в хранилище и создание ProjectFile"""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        _check_active(session)
+
+        checksums = dict(session.chunks.values_list('index', 'checksum'))
+        if len(checksums) != session.chunk_count:
+            raise UploadError(f'Получено частей: {len(checksums)} из {session.chunk_count}')
+        _verify_assembled(session, checksums)
+
+        project_file = ProjectFile(
+            name=session.name,
+            original_filename=session.original_filename,
+            file_type=get_file_type(session.extension),
+            extension=session.extension,
+            size=session.size,
+            project=session.project,
+            task=session.task,
+            category=session.category,
+            uploaded_by=session.uploaded_by,
+            description=session.description,
+        )
+        with open(get_session_path(session), 'rb') as assembled:
+            project_file.file.save(session.original_filename, AssembledFile(assembled), save=False)
+        project_file.save()
+
+        session.status = 'completed'
+        session.project_file = project_file
+        session.save(update_fields=['status', 'project_file'])
+        session.chunks.all().delete()
+
+    # Если хранилище скопировало файл, а не перенесло, временный файл больше не нужен
+    _remove_session_file(session)
+    return project_file
+
+
+def _verify_assembled(session, checksums):
+    """
+    Сверка собранного файла за одно чтение: каждая часть - с суммой,
+    с которой она была принята, весь файл - с checksum сеанса
+    """
+    file_digest = hashlib.sha256()
+    corrupted = []
+    with open(get_session_path(session), 'rb') as assembled:
+        for index in range(session.chunk_count):
+            chunk_digest = hashlib.sha256()
+            remaining = session.get_chunk_length(index)
+            while remaining:
+                block = assembled.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                chunk_digest.update(block)
+                file_digest.update(block)
+                remaining -= len(block)
+            if chunk_digest.hexdigest() != checksums[index]:
+                corrupted.append(index)
+
+    if corrupted:
+        raise UploadError(
+            f'Части повреждены, отправьте их заново: {", ".join(map(str, corrupted))}', status=409
+        )
+    if session.checksum and file_digest.hexdigest() != session.checksum.lower():
+        raise UploadError('Контрольная сумма файла не совпадает')
+
+
+def _remove_session_file(session):
+    try:
+        os.remove(get_session_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def cancel_session(session):
+    """Отмена загрузки: временный файл и принятые части удаляются"""
+    with transaction.atomic():
+        UploadSession.objects.filter(pk=session.pk, status='active').update(status='cancelled')
+        session.chunks.all().delete()
+    _remove_session_file(session)
+
+
+def cleanup_expired_sessions(now=None):
+    """Удаление незавершенных сеансов с истекшим сроком. Возвращает их число."""
+    now = now or timezone.now()
+    expired = list(UploadSession.objects.filter(status='active', expires_at__lte=now))
+    for session in expired:
+        _remove_session_file(session)
+    UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+    # Завершенные и отмененные сеансы нужны только для истории - удаляются через тот же срок
+    UploadSession.objects.filter(status__in=['completed', 'cancelled'], expires_at__lte=now).delete()
+    return len(expired)
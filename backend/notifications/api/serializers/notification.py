@@ -12,9 +12,9 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'notification_type', 'notification_type_display',
             'channel', 'channel_display', 'title', 'message', 'is_read',
-            'created_at', 'scheduled_for', 'sent_at', 'time_ago', 'icon'
+            'created_at', 'scheduled_for', 'sent_at', 'grouped_count', 'time_ago', 'icon'
         ]
-        read_only_fields = ['id', 'created_at', 'sent_at']
+        read_only_fields = ['id', 'created_at', 'sent_at', 'grouped_count']
     
     def get_time_ago(self, obj):
         from django.utils import timezone
@@ -45,7 +45,8 @@ class UserNotificationSettingsSerializer(serializers.ModelSerializer):
             'notify_new_tasks', 'notify_deadlines', 'notify_project_changes',
             'notify_file_uploads', 'notify_comments',
             'work_hours_start', 'work_hours_end',
-            'quiet_hours_start', 'quiet_hours_end'
+            'quiet_hours_start', 'quiet_hours_end',
+            'digest_window', 'telegram_chat_id'
         ]
         read_only_fields = ['id', 'user']
     
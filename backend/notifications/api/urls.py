@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     NotificationViewSet, UserNotificationSettingsViewSet,
-    MarkNotificationsAsReadView, UnreadNotificationsCountView
+    MarkNotificationsAsReadView, UnreadNotificationsCountView,
+    notification_stream
 )
 
 router = DefaultRouter()
@@ -17,6 +18,9 @@ notification_urls = [
 ]
 
 urlpatterns = [
-    path('', include(router.urls)),
+    # Поток уведомлений (SSE); список и unread_count остаются для опроса
+    path('stream/', notification_stream, name='notification-stream'),
+    # Раньше роутера: иначе unread_count/ и mark_all_read/ перехватывает маршрут notifications/<pk>/
     path('notifications/', include(notification_urls)),
+    path('', include(router.urls)),
 ]
\ No newline at end of file
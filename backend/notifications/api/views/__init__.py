@@ -1,8 +1,10 @@
 from .notification import NotificationViewSet, MarkNotificationsAsReadView, UnreadNotificationsCountView, UserNotificationSettingsViewSet
+from .stream import notification_stream
 
 __all__ = [
     'NotificationViewSet',
     'MarkNotificationsAsReadView',
     'UnreadNotificationsCountView',
     'UserNotificationSettingsViewSet',
+    'notification_stream',
 ]
\ No newline at end of file
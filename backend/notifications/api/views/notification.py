@@ -2,27 +2,42 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from ...models import Notification, UserNotificationSettings
 from ..serializers import NotificationSerializer, UserNotificationSettingsSerializer
+from ...counters import adjust_unread_counts, get_unread_count
+from ...retention import get_retention_start
+from ...stream import publish_notification_event
+from core.api.pagination import KeysetPagination
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
+        # Условие на created_at отсекает партиции старше срока хранения
         return Notification.objects.filter(
             user=self.request.user,
-            is_read=False
+            is_read=False,
+            created_at__gte=get_retention_start()
         ).order_by('-created_at')
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Пометить уведомление как прочитанное"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        
+        # Условное обновление: при одновременных запросах счетчик уменьшится один раз
+        with transaction.atomic():
+            updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+            if updated:
+                adjust_unread_counts({notification.user_id: -1})
+        if updated:
+            publish_notification_event(notification.user_id, 'updated', notification.pk)
         
         return Response({'status': 'Уведомление прочитано'})
     
@@ -37,10 +52,16 @@ class MarkNotificationsAsReadView(APIView):
     
     def post(self, request):
         """Пометить все уведомления как прочитанные"""
-        Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).update(is_read=True)
+        with transaction.atomic():
+            updated = Notification.objects.filter(
+                user=request.user,
+                is_read=False
+            ).update(is_read=True)
+            adjust_unread_counts({request.user.pk: -updated})
+        
+        # update() не вызывает сигналов - сообщаем открытым потокам явно
+        if updated:
+            publish_notification_event(request.user.pk, 'updated')
         
         return Response({'status': 'Все уведомления прочитаны'})
 
@@ -49,12 +70,7 @@ class UnreadNotificationsCountView(APIView):
     
     def get(self, request):
         """Получение количества непрочитанных уведомлений"""
-        count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count()
-        
-        return Response({'count': count})
+        return Response({'count': get_unread_count(request.user.pk)})
     
 class UserNotificationSettingsViewSet(viewsets.ModelViewSet):
     """API для управления настройками уведомлений пользователя"""
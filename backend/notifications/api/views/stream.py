@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from ...models import Notification
+from ...counters import get_unread_count
+from ...stream import hub, get_stream_settings
+from ..serializers import NotificationSerializer
+
+
+def _authenticate(request):
+    """
+    Пользователь по JWT из заголовка Authorization или параметра ?token=
+    (EventSource в браузере не умеет передавать заголовки).
+    """
+    authentication = JWTAuthentication()
+    raw_token = request.GET.get('token')
+    if not raw_token:
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _get_unread_count(user):
+    return get_unread_count(user.pk)
+
+
+def _get_notifications(user, ids):
+    notifications = Notification.objects.filter(user=user, id__in=ids).order_by('created_at')
+    return NotificationSerializer(notifications, many=True).data
+
+
+def _format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _event_stream(user):
+    stream_settings = get_stream_settings()
+    queue = hub.subscribe(user.pk)
+    try:
+        hub.ensure_listening()
+
+        yield f"retry: {stream_settings['RETRY_MS']}\n\n"
+        yield _format_event('unread_count', {'count': await sync_to_async(_get_unread_count)(user)})
+
+        while True:
+            try:
+                events = [await asyncio.wait_for(queue.get(), timeout=stream_settings['HEARTBEAT'])]
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+
+            # Пачка событий, накопившихся за время обработки, - один запрос счетчика
+            while not queue.empty():
+                events.append(queue.get_nowait())
+
+            if any(event['event'] == 'resync' for event in events):
+                hub.ensure_listening()
+                yield _format_event('resync', {})
+            else:
+                created_ids = [event['id'] for event in events if event['event'] == 'created']
+                if created_ids:
+                    for notification in await sync_to_async(_get_notifications)(user, created_ids):
+                        yield _format_event('notification', notification)
+
+            yield _format_event('unread_count', {'count': await sync_to_async(_get_unread_count)(user)})
+    finally:
+        hub.unsubscribe(user.pk, queue)
+
+
+async def notification_stream(request):
+    """
+    Поток уведомлений пользователя (text/event-stream), только под ASGI.
+    События: notification - новое уведомление, unread_count - число
+    непрочитанных, resync - клиенту нужно перечитать список целиком.
+    """
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Учетные данные не были предоставлены.'}, status=401)
+
+    response = StreamingHttpResponse(_event_stream(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,132 @@
+"""
+Счетчики непрочитанных уведомлений.
+
+NotificationCounter хранит число непрочитанных уведомлений пользователя,
+чтобы заголовок страницы не считал COUNT(*) по Notification. Счетчик
+меняется в той же транзакции, что и уведомления, на точное число строк,
+которые изменила операция:
+    - создание уведомлений (сигнал post_save, bulk_create в dispatch.py) - +N;
+    - прочтение (mark_read, mark_all_read) - минус число строк, которые
+      UPDATE ... WHERE is_read = false действительно обновил;
+    - удаление непрочитанного уведомления - -1.
+Приращение выполняется как UPDATE ... SET unread_count = unread_count + N,
+поэтому одновременные вставки и массовые обновления не теряют изменений.
+
+Число читается из счетчика по первичному ключу (user_id) - одна строка
+по индексу, без промежуточного кэша: кэш в памяти процесса расходился бы
+со счетчиком в других веб-воркерах и после уведомлений, созданных
+management-командами. Счетчики существующих пользователей создаются миграцией, новых - при первом изменении или чтении; расхождения
+(например, после правки данных SQL) исправляет команда
+reconcile_notification_counters.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+
+def _count_unread(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    """Число непрочитанных уведомлений из счетчика (по первичному ключу)"""
+    count = (
+        NotificationCounter.objects
+        .filter(pk=user_id)
+        .values_list('unread_count', flat=True)
+        .first()
+    )
+    if count is None:
+        # Счетчика еще нет - считаем один раз и создаем его
+        with transaction.atomic():
+            counter, _ = NotificationCounter.objects.select_for_update().get_or_create(
+                user_id=user_id, defaults={'unread_count': _count_unread(user_id)}
+            )
+            count = counter.unread_count
+    return count
+
+
+def adjust_unread_counts(deltas):
+    """
+    Изменение счетчиков: deltas - {user_id: приращение}.
+    Пользователи с одинаковым приращением обновляются одним запросом.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        # Недостающие счетчики создаются нулевыми (ON CONFLICT DO NOTHING), после чего
+        # приращение применяется ко всем: так параллельные операции не теряют изменений
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in deltas],
+            ignore_conflicts=True
+        )
+
+        groups = defaultdict(list)
+        for user_id, delta in deltas.items():
+            groups[delta].append(user_id)
+        for delta, user_ids in groups.items():
+            NotificationCounter.objects.filter(user_id__in=sorted(user_ids)).update(
+                unread_count=F('unread_count') + delta,
+                updated_at=timezone.now()
+            )
+
+
+def add_unread_notifications(notifications):
+    """Учет созданных уведомлений (после bulk_create)"""
+    adjust_unread_counts(Counter(n.user_id for n in notifications if not n.is_read))
+
+
+def reconcile_unread_counts(batch_size=1000):
+    """
+    Сверка счетчиков с таблицей уведомлений (пачками по batch_size пользователей).
+    Счетчики пачки блокируются до подсчета, поэтому изменения, идущие
+    параллельно, применяются после исправления и не теряются.
+    Возвращает число исправленных и созданных счетчиков.
+    """
+    result = {'fixed': 0, 'created': 0}
+
+    user_ids = sorted(
+        set(NotificationCounter.objects.values_list('user_id', flat=True))
+        | set(Notification.objects.filter(is_read=False).values_list('user_id', flat=True).distinct())
+    )
+
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        with transaction.atomic():
+            counters = {
+                counter.user_id: counter
+                for counter in NotificationCounter.objects.select_for_update().filter(user_id__in=batch)
+            }
+            actual = dict(
+                Notification.objects
+                .filter(user_id__in=batch, is_read=False)
+                .values('user_id')
+                .annotate(unread=Count('id'))
+                .values_list('user_id', 'unread')
+            )
+
+            changed = []
+            for user_id, counter in counters.items():
+                if counter.unread_count != actual.get(user_id, 0):
+                    counter.unread_count = actual.get(user_id, 0)
+                    counter.updated_at = timezone.now()
+                    changed.append(counter)
+            created = [
+                NotificationCounter(user_id=user_id, unread_count=unread)
+                for user_id, unread in actual.items()
+                if user_id not in counters
+            ]
+
+            NotificationCounter.objects.bulk_update(changed, ['unread_count', 'updated_at'])
+            NotificationCounter.objects.bulk_create(created, ignore_conflicts=True)
+
+        result['fixed'] += len(changed)
+        result['created'] += len(created)
+
+    return result
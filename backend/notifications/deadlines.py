@@ -0,0 +1,124 @@
+"""
+Уведомления о сроках задач (task_deadline).
+
+scan_task_deadlines() (команда scan_task_deadlines, запускается периодически)
+одним запросом по индексу Task.deadline находит открытые задачи со сроком
+от даты предыдущего прохода (отметка NotificationWatermark) до
+REMIND_DAYS дней вперед:
+    - срок сегодня или в ближайшие REMIND_DAYS дней - «срок подходит»;
+    - срок прошел - «задача просрочена».
+Задачи, о сроке которых на этом этапе уже сообщено (TaskDeadlineNotice),
+исключаются в том же запросе, поэтому повторный проход ничего не делает.
+При переносе срока уведомления отправляются заново.
+
+Уведомления получает исполнитель с учетом его настроек (notify_deadlines,
+каналы, тихие часы) и создаются пачками (notifications/dispatch.py).
+Проход выполняется в одной транзакции под блокировкой отметки, поэтому
+одновременные запуски не дублируют уведомления.
+
+Настройки берутся из settings.NOTIFICATION_DEADLINES:
+    REMIND_DAYS   - за сколько дней до срока напоминать
+    LOOKBACK_DAYS - глубина первого прохода (пока отметки нет), дней
+    CHANNELS      - каналы доставки
+    BATCH_SIZE    - задач в одной пачке вставки
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from projects.models import Task
+from .dispatch import dispatch_personal_notifications
+from .models import NotificationWatermark, TaskDeadlineNotice
+
+DEFAULT_DEADLINE_SETTINGS = {
+    'REMIND_DAYS': 1,
+    'LOOKBACK_DAYS': 7,
+    'CHANNELS': ('system', 'email'),
+    'BATCH_SIZE': 5000,
+}
+
+WATERMARK_NAME = 'task_deadlines'
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+STAGE_MESSAGES = {
+    'soon': ('Срок задачи подходит', 'Срок задачи «{title}» (проект «{project}») истекает {deadline:%d.%m.%Y}'),
+    'overdue': ('Задача просрочена', 'Срок задачи «{title}» (проект «{project}») истек {deadline:%d.%m.%Y}'),
+}
+
+
+def get_deadline_settings():
+    """Настройки уведомлений о сроках с учетом значений по умолчанию"""
+    return {**DEFAULT_DEADLINE_SETTINGS, **getattr(settings, 'NOTIFICATION_DEADLINES', {})}
+
+
+def _lock_watermark(now, lookback_days):
+    """Отметка предыдущего прохода под блокировкой (создается при первом проходе)"""
+    NotificationWatermark.objects.bulk_create(
+        [NotificationWatermark(name=WATERMARK_NAME, value=now - timedelta(days=lookback_days))],
+        ignore_conflicts=True
+    )
+    return NotificationWatermark.objects.select_for_update().get(name=WATERMARK_NAME)
+
+
+def get_pending_tasks(since, today, horizon):
+    """Открытые задачи со сроком в [since, horizon], о которых на текущем этапе еще не сообщено"""
+    already_notified = Q(deadline_notice__deadline=F('deadline')) & (
+        Q(deadline_notice__stage='overdue') | Q(deadline__gte=today)
+    )
+    return (
+        Task.objects
+        .filter(deadline__gte=since, deadline__lte=horizon, is_active=True, assigned_to__isnull=False)
+        .exclude(status__in=CLOSED_STATUSES)
+        .exclude(already_notified)
+        .order_by('deadline', 'id')
+        .values_list('id', 'title', 'deadline', 'assigned_to_id', 'project__title')
+    )
+
+
+def _notify_batch(tasks, today, channels, now):
+    messages, notices = [], []
+    for task_id, title, deadline, user_id, project_title in tasks:
+        stage = 'overdue' if deadline < today else 'soon'
+        notification_title, template = STAGE_MESSAGES[stage]
+        messages.append((
+            user_id,
+            notification_title,
+            template.format(title=title, project=project_title, deadline=deadline)
+        ))
+        notices.append(TaskDeadlineNotice(task_id=task_id, deadline=deadline, stage=stage))
+
+    dispatch_personal_notifications(messages, 'task_deadline', channels=channels, now=now)
+    TaskDeadlineNotice.objects.bulk_create(
+        notices,
+        update_conflicts=True,
+        unique_fields=['task'],
+        update_fields=['deadline', 'stage', 'notified_at']
+    )
+    return notices
+
+
+def scan_task_deadlines(now=None):
+    """Проход по срокам задач. Возвращает число задач по этапам уведомлений."""
+    options = get_deadline_settings()
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    horizon = today + timedelta(days=options['REMIND_DAYS'])
+    result = {'soon': 0, 'overdue': 0}
+
+    with transaction.atomic():
+        watermark = _lock_watermark(now, options['LOOKBACK_DAYS'])
+        since = min(timezone.localdate(watermark.value), today)
+
+        tasks = list(get_pending_tasks(since, today, horizon))
+        batch_size = options['BATCH_SIZE']
+        for start in range(0, len(tasks), batch_size):
+            for notice in _notify_batch(tasks[start:start + batch_size], today, options['CHANNELS'], now):
+                result[notice.stage] += 1
+
+        watermark.value = now
+        watermark.save(update_fields=['value'])
+
+    return result
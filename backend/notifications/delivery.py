@@ -0,0 +1,496 @@
+"""
+Доставка уведомлений по внешним каналам (email, telegram).
+
+Очередью служит сама таблица уведомлений: к отправке готовы строки
+внешних каналов без sent_at, у которых наступило scheduled_for.
+Пул воркеров (management-команда run_notification_delivery) забирает
+их пачками через SELECT ... FOR UPDATE SKIP LOCKED и отмечает
+locked_until - до этого времени строки не выдаются другим воркерам,
+а после аварийного завершения воркера возвращаются в очередь сами.
+
+Каждый воркер держит свои соединения (SMTP через EMAIL_BACKEND,
+HTTPS к Bot API Telegram) и использует их для всех пачек; соединение
+переоткрывается после ошибки и закрывается после IDLE_TIMEOUT простоя.
+
+Перед отправкой повторно проверяются тихие часы получателя: попавшие
+в них уведомления откладываются (scheduled_for) до их окончания.
+Отметка sent_at, отложенные и неудачные попытки записываются одним
+UPDATE на группу строк. Неудачная отправка повторяется через
+RETRY_DELAY секунд, всего не более MAX_ATTEMPTS раз.
+
+Настройки берутся из settings.NOTIFICATION_DELIVERY:
+    CHANNELS       - обслуживаемые каналы
+    WORKERS        - количество потоков-воркеров
+    BATCH_SIZE     - строк в одной пачке
+    POLL_INTERVAL  - пауза (сек) между опросами пустой очереди
+    LOCK_TIMEOUT   - на сколько секунд захватывается пачка
+    RETRY_DELAY    - пауза перед повторной попыткой, сек
+    MAX_ATTEMPTS   - предельное число попыток
+    IDLE_TIMEOUT   - через сколько секунд простоя закрывать соединения
+    TELEGRAM_TOKEN - токен бота Telegram
+    TELEGRAM_HOST  - адрес Bot API
+"""
+import http.client
+import json
+import logging
+import smtplib
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import User
+from .dispatch import QUIET_HOURS_FIELDS, _get_default_settings, _get_quiet_hours_end, _is_quiet_time
+from .models import Notification, UserNotificationSettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELIVERY_SETTINGS = {
+    'CHANNELS': ('email', 'telegram'),
+    'WORKERS': 2,
+    'BATCH_SIZE': 100,
+    'POLL_INTERVAL': 5,
+    'LOCK_TIMEOUT': 300,
+    'RETRY_DELAY': 300,
+    'MAX_ATTEMPTS': 5,
+    'IDLE_TIMEOUT': 60,
+    'TELEGRAM_TOKEN': '',
+    'TELEGRAM_HOST': 'api.telegram.org',
+}
+
+# Уведомление, подготовленное к отправке
+Delivery = namedtuple('Delivery', ['id', 'address', 'title', 'message'])
+
+
+class PermanentDeliveryError(Exception):
+    """Отправка невозможна и повторять ее бессмысленно (нет адреса, адрес отклонен)"""
+
+
+def get_delivery_settings():
+    """Настройки доставки с учетом значений по умолчанию"""
+    return {**DEFAULT_DELIVERY_SETTINGS, **getattr(settings, 'NOTIFICATION_DELIVERY', {})}
+
+
+def get_due_notifications(channel, now=None):
+    """Уведомления канала, готовые к отправке"""
+    options = get_delivery_settings()
+    now = now or timezone.now()
+    return Notification.objects.filter(
+        Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=now),
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+        channel=channel,
+        sent_at__isnull=True,
+        delivery_attempts__lt=options['MAX_ATTEMPTS'],
+    )
+
+
+def claim_notifications(channel, now=None):
+    """Захват пачки готовых уведомлений канала (строки, захваченные другими воркерами, пропускаются)"""
+    options = get_delivery_settings()
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        notifications = list(
+            get_due_notifications(channel, now)
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .only('id', 'user_id', 'title', 'message', 'scheduled_for', 'created_at')
+            [:options['BATCH_SIZE']]
+        )
+        if notifications:
+            Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+                locked_until=now + timedelta(seconds=options['LOCK_TIMEOUT'])
+            )
+    return notifications
+
+
+def _get_recipients(channel, user_ids):
+    """Адреса и тихие часы получателей: {user_id: (адрес, начало, конец)}"""
+    user_ids = set(user_ids)
+    addresses = {}
+    quiet_hours = {}
+
+    rows = UserNotificationSettings.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'telegram_chat_id', *QUIET_HOURS_FIELDS
+    )
+    for user_id, chat_id, quiet_start, quiet_end in rows:
+        quiet_hours[user_id] = (quiet_start, quiet_end)
+        if channel == 'telegram':
+            addresses[user_id] = chat_id
+
+    default_quiet_hours = _get_default_settings(QUIET_HOURS_FIELDS)
+    if channel == 'email':
+        addresses = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'email'))
+
+    return {
+        user_id: (addresses.get(user_id), *quiet_hours.get(user_id, default_quiet_hours))
+        for user_id in user_ids
+    }
+
+
+class EmailSender:
+    """Отправка писем через одно SMTP-соединение на все пачки воркера"""
+
+    channel = 'email'
+
+    def __init__(self):
+        self._connection = None
+        self.last_used = None
+
+    def _open(self):
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+        return self._connection
+
+    def _send_message(self, message):
+        try:
+            self._open().send_messages([message])
+        except smtplib.SMTPServerDisconnected:
+            # Сервер закрыл простаивавшее соединение - переоткрываем один раз
+            self.close()
+            self._open().send_messages([message])
+
+    def send(self, deliveries):
+        """Отправка пачки. Возвращает id отправленных и ошибки {id: исключение}."""
+        sent, errors = [], {}
+        for index, delivery in enumerate(deliveries):
+            message = EmailMessage(delivery.title, delivery.message, to=[delivery.address])
+            try:
+                self._send_message(message)
+            except smtplib.SMTPRecipientsRefused as e:
+                errors[delivery.id] = PermanentDeliveryError(f'Адрес отклонен: {e}')
+            except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                errors[delivery.id] = e
+            except Exception as e:
+                # Соединение недоступно - остаток пачки ждет следующей попытки
+                logger.warning("Доставка email: ошибка соединения: %s", e)
+                self.close()
+                for rest in deliveries[index:]:
+                    errors[rest.id] = e
+                break
+            else:
+                sent.append(delivery.id)
+        self.last_used = time.monotonic()
+        return sent, errors
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class TelegramSender:
+    """Отправка сообщений через Bot API по одному keep-alive HTTPS-соединению"""
+
+    channel = 'telegram'
+
+    def __init__(self, token=None, host=None, timeout=10):
+        options = get_delivery_settings()
+        self.token = token or options['TELEGRAM_TOKEN']
+        self.host = host or options['TELEGRAM_HOST']
+        self.timeout = timeout
+        self._connection = None
+        self.last_used = None
+
+    def _open(self):
+        if self._connection is None:
+            self._connection = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return self._connection
+
+    def _send_message(self, delivery):
+        body = json.dumps({'chat_id': delivery.address, 'text': f'{delivery.title}\n\n{delivery.message}'})
+        connection = self._open()
+        connection.request(
+            'POST', f'/bot{self.token}/sendMessage', body,
+            headers={'Content-Type': 'application/json'}
+        )
+        response = connection.getresponse()
+        payload = response.read()
+        if response.status == 200:
+            return
+        try:
+            description = json.loads(payload).get('description', '')
+        except ValueError:
+            description = payload[:200].decode('utf-8', 'replace')
+        if response.status in (400, 403):
+            # Чат не найден или бот заблокирован пользователем
+            raise PermanentDeliveryError(description)
+        raise RuntimeError(f'Bot API {response.status}: {description}')
+
+    def send(self, deliveries):
+        """Отправка пачки. Возвращает id отправленных и ошибки {id: исключение}."""
+        sent, errors = [], {}
+        if not self.token:
+            error = RuntimeError('Не задан NOTIFICATION_DELIVERY["TELEGRAM_TOKEN"]')
+            return sent, {delivery.id: error for delivery in deliveries}
+
+        for delivery in deliveries:
+            try:
+                self._send_message(delivery)
+            except (http.client.HTTPException, OSError) as e:
+                self.close()
+                errors[delivery.id] = e
+            except Exception as e:
+                errors[delivery.id] = e
+            else:
+                sent.append(delivery.id)
+        self.last_used = time.monotonic()
+        return sent, errors
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+SENDERS = {
+    'email': EmailSender,
+    'telegram': TelegramSender,
+}
+
+
+class DeliveryStats:
+    """Счетчики воркера по каналу: пропускная способность и задержка доставки"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = self.failed = self.deferred = self.batches = 0
+        self.busy_seconds = 0.0
+        self.max_lag = 0.0
+
+    def record(self, sent, failed, deferred, seconds, max_lag):
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+            self.deferred += deferred
+            self.batches += 1
+            self.busy_seconds += seconds
+            self.max_lag = max(self.max_lag, max_lag)
+
+    @property
+    def throughput(self):
+        """Отправлено в секунду работы"""
+        return self.sent / self.busy_seconds if self.busy_seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'deferred': self.deferred,
+            'batches': self.batches,
+            'throughput': round(self.throughput, 1),
+            'max_lag': round(self.max_lag, 1),
+        }
+
+
+def _defer_quiet(notifications, recipients, now):
+    """Отложить уведомления получателей, у которых сейчас тихие часы. Возвращает оставшиеся."""
+    local_now = timezone.localtime(now)
+    deferred = defaultdict(list)
+    ready = []
+    for notification in notifications:
+        _, quiet_start, quiet_end = recipients[notification.user_id]
+        if _is_quiet_time(local_now.time(), quiet_start, quiet_end):
+            deferred[_get_quiet_hours_end(local_now, quiet_start, quiet_end)].append(notification.pk)
+        else:
+            ready.append(notification)
+
+    for scheduled_for, ids in deferred.items():
+        Notification.objects.filter(pk__in=ids).update(scheduled_for=scheduled_for, locked_until=None)
+    return ready, sum(len(ids) for ids in deferred.values())
+
+
+def _record_errors(errors, now):
+    """Запись неудачных попыток: одна группа строк на текст ошибки"""
+    options = get_delivery_settings()
+    groups = defaultdict(list)
+    for notification_id, error in errors.items():
+        groups[(str(error)[:255], isinstance(error, PermanentDeliveryError))].append(notification_id)
+
+    for (message, permanent), ids in groups.items():
+        Notification.objects.filter(pk__in=ids).update(
+            delivery_attempts=options['MAX_ATTEMPTS'] if permanent else F('delivery_attempts') + 1,
+            delivery_error=message,
+            locked_until=now + timedelta(seconds=options['RETRY_DELAY']),
+        )
+
+
+def deliver_batch(sender, notifications, stats=None):
+    """Отправка захваченной пачки уведомлений канала sender.channel"""
+    started = time.monotonic()
+    now = timezone.now()
+    recipients = _get_recipients(sender.channel, {n.user_id for n in notifications})
+
+    notifications, deferred = _defer_quiet(notifications, recipients, now)
+
+    deliveries, errors = [], {}
+    for notification in notifications:
+        address = recipients[notification.user_id][0]
+        if not address:
+            errors[notification.pk] = PermanentDeliveryError('Не указан адрес получателя')
+            continue
+        deliveries.append(Delivery(notification.pk, address, notification.title, notification.message))
+
+    sent, send_errors = sender.send(deliveries) if deliveries else ([], {})
+    errors.update(send_errors)
+
+    finished_at = timezone.now()
+    if sent:
+        Notification.objects.filter(pk__in=sent).update(
+            sent_at=finished_at, locked_until=None, delivery_error=''
+        )
+    _record_errors(errors, finished_at)
+
+    sent_ids = set(sent)
+    lags = [
+        (finished_at - (n.scheduled_for or n.created_at)).total_seconds()
+        for n in notifications if n.pk in sent_ids
+    ]
+    if stats is not None:
+        stats.record(len(sent), len(errors), deferred, time.monotonic() - started, max(lags, default=0.0))
+    logger.info(
+        "Доставка %s: отправлено %d, ошибок %d, отложено %d, макс. задержка %.1f сек",
+        sender.channel, len(sent), len(errors), deferred, max(lags, default=0.0)
+    )
+    return {'sent': len(sent), 'failed': len(errors), 'deferred': deferred}
+
+
+def get_delivery_metrics(now=None):
+    """
+    Состояние очереди по каналам: сколько ждет отправки, задержка самого
+    старого ждущего уведомления, сколько отправлено за последний час и их
+    максимальная задержка, сколько исчерпало попытки.
+    """
+    options = get_delivery_settings()
+    now = now or timezone.now()
+    hour_ago = now - timedelta(hours=1)
+
+    rows = (
+        Notification.objects
+        .filter(channel__in=options['CHANNELS'])
+        .filter(Q(sent_at__isnull=True) | Q(sent_at__gte=hour_ago))
+        .values('channel')
+        .annotate(
+            due=Count('id', filter=Q(sent_at__isnull=True, delivery_attempts__lt=options['MAX_ATTEMPTS'])
+                      & (Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=now))),
+            scheduled=Count('id', filter=Q(sent_at__isnull=True, scheduled_for__gt=now)),
+            exhausted=Count('id', filter=Q(sent_at__isnull=True, delivery_attempts__gte=options['MAX_ATTEMPTS'])),
+            oldest_due=Min(
+                Coalesce('scheduled_for', 'created_at'),
+                filter=Q(sent_at__isnull=True, delivery_attempts__lt=options['MAX_ATTEMPTS'])
+                & (Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=now))
+            ),
+            sent_last_hour=Count('id', filter=Q(sent_at__gte=hour_ago)),
+            last_sent=Max('sent_at'),
+        )
+    )
+
+    metrics = {}
+    for channel in options['CHANNELS']:
+        metrics[channel] = {'due': 0, 'scheduled': 0, 'exhausted': 0, 'lag': 0.0,
+                            'sent_last_hour': 0, 'last_sent': None}
+    for row in rows:
+        channel = row.pop('channel')
+        oldest_due = row.pop('oldest_due')
+        row['lag'] = round((now - oldest_due).total_seconds(), 1) if oldest_due else 0.0
+        metrics[channel] = row
+    return metrics
+
+
+class DeliveryWorkerPool:
+    """Пул потоков, доставляющих уведомления по внешним каналам"""
+
+    def __init__(self, workers=None, poll_interval=None, channels=None):
+        options = get_delivery_settings()
+        self.workers = workers or options['WORKERS']
+        self.poll_interval = poll_interval or options['POLL_INTERVAL']
+        self.channels = [channel for channel in (channels or options['CHANNELS']) if channel in SENDERS]
+        self.idle_timeout = options['IDLE_TIMEOUT']
+        self.stats = {channel: DeliveryStats() for channel in self.channels}
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                name=f'notification-delivery-{i + 1}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _create_senders(self):
+        return {channel: SENDERS[channel]() for channel in self.channels}
+
+    def drain(self):
+        """Отправка всех готовых уведомлений в текущем потоке"""
+        senders = self._create_senders()
+        try:
+            processed = 0
+            while True:
+                batch_processed = self._process_channels(senders)
+                if not batch_processed:
+                    return processed
+                processed += batch_processed
+        finally:
+            for sender in senders.values():
+                sender.close()
+
+    def _process_channels(self, senders):
+        """По одной пачке каждого канала. Возвращает число обработанных строк."""
+        processed = 0
+        for channel, sender in senders.items():
+            notifications = claim_notifications(channel)
+            if not notifications:
+                continue
+            try:
+                deliver_batch(sender, notifications, self.stats[channel])
+            except Exception:
+                # Строки вернутся в очередь по истечении locked_until
+                logger.exception("Ошибка доставки уведомлений %s", channel)
+                sender.close()
+            processed += len(notifications)
+        return processed
+
+    def _close_idle(self, senders):
+        now = time.monotonic()
+        for sender in senders.values():
+            if sender.last_used is not None and now - sender.last_used > self.idle_timeout:
+                sender.close()
+                sender.last_used = None
+
+    def _run(self):
+        senders = self._create_senders()
+        while not self._stop_event.is_set():
+            close_old_connections()
+            try:
+                processed = self._process_channels(senders)
+            except Exception:
+                logger.exception("Ошибка при получении уведомлений из очереди")
+                processed = 0
+
+            if not processed:
+                self._close_idle(senders)
+                self._stop_event.wait(self.poll_interval)
+
+        for sender in senders.values():
+            sender.close()
+        close_old_connections()
@@ -0,0 +1,319 @@
+"""
+Рассылка уведомлений группе пользователей.
+
+dispatch_notifications() создает уведомления об одном событии для набора
+получателей за постоянное число запросов независимо от их количества:
+    1. настройки всех получателей (UserNotificationSettings) читаются
+       одним запросом; для пользователей без настроек берутся значения
+       по умолчанию;
+    2. получатели группируются по совпадающим настройкам, и правила
+       (включен ли канал, включен ли тип уведомления, тихие часы)
+       проверяются один раз на группу, а не на каждого пользователя;
+    3. строки Notification пишутся bulk_create, счетчики
+       непрочитанных (notifications/counters.py) обновляются по одному
+       запросу на группу, открытым потокам (notifications/stream.py)
+       уходит одна пачка событий.
+
+Уведомления по внешним каналам (email, sms, telegram), попавшие в тихие
+часы пользователя, не отбрасываются: им проставляется scheduled_for -
+окончание тихих часов, и отправка откладывается до этого времени.
+
+dispatch_personal_notifications() делает то же для уведомлений, текст
+которых у каждого получателя свой (например, о сроках задач).
+
+Дайджесты. Частые события типов NOTIFICATION_DIGEST['TYPES'] (комментарии,
+загрузки файлов) не создают по строке на событие:
+    - по внешним каналам события, отложенные до конца тихих часов,
+      добавляются в одно неотправленное уведомление на пользователя и тип;
+    - если у пользователя задано окно дайджеста (digest_window), так же
+      объединяются все события окна: внешние каналы отправляются в конце
+      окна, в канале «В системе» события добавляются к непрочитанному
+      уведомлению, созданному в этом окне.
+Уведомление-дайджест хранит число событий (grouped_count) и последние
+MAX_LINES из них в тексте.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from core.models import User
+from .counters import add_unread_notifications
+from .models import Notification, UserNotificationSettings
+from .stream import publish_created_notifications, publish_updated_notifications
+
+# Настройка, включающая уведомления каждого типа (типы без настройки отправляются всегда)
+TYPE_SETTINGS = {
+    'task_assigned': 'notify_new_tasks',
+    'task_deadline': 'notify_deadlines',
+    'project_status': 'notify_project_changes',
+    'file_uploaded': 'notify_file_uploads',
+    'comment_added': 'notify_comments',
+}
+
+CHANNEL_SETTINGS = {
+    'system': 'enable_system',
+    'email': 'enable_email',
+    'sms': 'enable_sms',
+    'telegram': 'enable_telegram',
+}
+
+QUIET_HOURS_FIELDS = ('quiet_hours_start', 'quiet_hours_end')
+
+DEFAULT_DIGEST_SETTINGS = {
+    'TYPES': ('comment_added', 'file_uploaded'),
+    'MAX_LINES': 10,
+}
+
+
+def get_digest_settings():
+    """Настройки дайджестов с учетом значений по умолчанию"""
+    return {**DEFAULT_DIGEST_SETTINGS, **getattr(settings, 'NOTIFICATION_DIGEST', {})}
+
+
+def _get_recipient_ids(recipients):
+    """id получателей: пользователи, их id или queryset (пользователей либо значений id)"""
+    if isinstance(recipients, QuerySet):
+        if recipients.model is User:
+            recipients = recipients.values_list('pk', flat=True)
+        return set(recipients)
+    return {getattr(recipient, 'pk', recipient) for recipient in recipients}
+
+
+def _get_default_settings(fields):
+    """Значения настроек по умолчанию для пользователей без UserNotificationSettings"""
+    defaults = []
+    for name in fields:
+        field = UserNotificationSettings._meta.get_field(name)
+        defaults.append(field.to_python(field.get_default()))
+    return tuple(defaults)
+
+
+def _is_quiet_time(moment, start, end):
+    """Попадает ли время moment в тихие часы (с переходом через полночь)"""
+    if start <= end:
+        return start <= moment < end
+    return moment >= start or moment < end
+
+
+def _get_quiet_hours_end(local_now, start, end):
+    """Ближайшее окончание тихих часов после local_now"""
+    end_at = timezone.make_aware(datetime.combine(local_now.date(), end))
+    if end_at <= local_now:
+        end_at += timedelta(days=1)
+    return end_at
+
+
+def _get_digest_window(local_now, minutes):
+    """Границы текущего окна дайджеста (окна отсчитываются от полуночи)"""
+    midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (local_now - midnight) // timedelta(minutes=minutes)
+    start = midnight + elapsed * timedelta(minutes=minutes)
+    return start, start + timedelta(minutes=minutes)
+
+
+def _get_deliveries(user_ids, notification_type, channels, now=None):
+    """
+    Каналы доставки для каждого получателя с учетом его настроек:
+    {user_id: [(канал, scheduled_for, digest_since), ...]}. Настройки читаются одним запросом.
+    digest_since - начало окна, в котором уведомление объединяется с другими
+    того же типа (None - уведомление не объединяется).
+    """
+    user_ids = set(user_ids)
+    type_setting = TYPE_SETTINGS.get(notification_type)
+    fields = [CHANNEL_SETTINGS[channel] for channel in channels]
+    if type_setting:
+        fields.append(type_setting)
+    fields.extend(QUIET_HOURS_FIELDS)
+    fields.append('digest_window')
+    is_digest_type = notification_type in get_digest_settings()['TYPES']
+
+    # Группы пользователей с одинаковыми значениями нужных настроек
+    profiles = defaultdict(list)
+    rows = UserNotificationSettings.objects.filter(user_id__in=user_ids).values_list('user_id', *fields)
+    for user_id, *values in rows:
+        profiles[tuple(values)].append(user_id)
+        user_ids.discard(user_id)
+    if user_ids:
+        profiles[_get_default_settings(fields)].extend(user_ids)
+
+    local_now = timezone.localtime(now or timezone.now())
+
+    deliveries = {}
+    for values, profile_user_ids in profiles.items():
+        profile = dict(zip(fields, values))
+        if type_setting and not profile[type_setting]:
+            continue
+
+        quiet_start, quiet_end = profile['quiet_hours_start'], profile['quiet_hours_end']
+        is_quiet = _is_quiet_time(local_now.time(), quiet_start, quiet_end)
+        window_start = window_end = None
+        if is_digest_type and profile['digest_window']:
+            window_start, window_end = _get_digest_window(local_now, profile['digest_window'])
+
+        profile_deliveries = []
+        for channel in channels:
+            if not profile[CHANNEL_SETTINGS[channel]]:
+                continue
+
+            scheduled_for = digest_since = None
+            if channel == 'system':
+                digest_since = window_start
+            elif is_quiet:
+                # Отложенные до конца тихих часов события одного типа отправляются одним письмом
+                scheduled_for = _get_quiet_hours_end(local_now, quiet_start, quiet_end)
+                digest_since = local_now if is_digest_type else None
+            elif window_end:
+                scheduled_for, digest_since = window_end, window_start
+            profile_deliveries.append((channel, scheduled_for, digest_since))
+
+        if profile_deliveries:
+            for user_id in profile_user_ids:
+                deliveries[user_id] = profile_deliveries
+    return deliveries
+
+
+def _build_notification(user_id, notification_type, title, message, delivery):
+    channel, scheduled_for, digest_since = delivery
+    notification = Notification(
+        user_id=user_id,
+        notification_type=notification_type,
+        channel=channel,
+        title=title,
+        message=message,
+        scheduled_for=scheduled_for,
+    )
+    notification._digest_since = digest_since
+    return notification
+
+
+def _merge_into_digest(digest, notification, max_lines):
+    """Добавление события notification в уведомление-дайджест digest"""
+    if digest.grouped_count == 1:
+        lines = [f'{digest.title}: {digest.message}']
+    else:
+        lines = digest.message.split('\n')
+    lines.insert(0, f'{notification.title}: {notification.message}')
+
+    digest.grouped_count += notification.grouped_count
+    digest.title = f'{digest.get_notification_type_display()} ({digest.grouped_count})'
+    digest.message = '\n'.join(lines[:max_lines])
+
+
+def _coalesce_digests(notifications, now=None):
+    """
+    Объединение уведомлений-дайджестов с уже существующими: для внешних каналов -
+    с неотправленным уведомлением того же типа с тем же временем отправки,
+    которое не захвачено воркером доставки (notifications/delivery.py: захваченное
+    письмо уже отправляется со старым текстом, добавленные события потерялись бы),
+    для канала «В системе» - с непрочитанным уведомлением того же типа,
+    созданным в текущем окне. Существующие строки читаются одним запросом
+    с блокировкой. Возвращает новые уведомления и измененные существующие.
+    """
+    candidates = [n for n in notifications if getattr(n, '_digest_since', None) is not None]
+    if not candidates:
+        return notifications, []
+
+    def _key(notification):
+        return (notification.user_id, notification.notification_type, notification.channel,
+                notification.scheduled_for)
+
+    conditions = Q()
+    system = [n for n in candidates if n.channel == 'system']
+    external = [n for n in candidates if n.channel != 'system']
+    if system:
+        conditions |= Q(
+            channel='system', is_read=False,
+            created_at__gte=min(n._digest_since for n in system),
+            user_id__in={n.user_id for n in system},
+            notification_type__in={n.notification_type for n in system},
+        )
+    if external:
+        now = now or timezone.now()
+        conditions |= Q(
+            Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+            channel__in={n.channel for n in external}, sent_at__isnull=True,
+            scheduled_for__in={n.scheduled_for for n in external},
+            user_id__in={n.user_id for n in external},
+            notification_type__in={n.notification_type for n in external},
+        )
+
+    existing = {}
+    for row in Notification.objects.select_for_update().filter(conditions).order_by('created_at'):
+        existing[_key(row)] = row
+
+    max_lines = get_digest_settings()['MAX_LINES']
+    created, updated = [], {}
+    for notification in notifications:
+        if getattr(notification, '_digest_since', None) is None:
+            created.append(notification)
+            continue
+
+        key = _key(notification)
+        digest = existing.get(key)
+        if digest is not None and digest.channel == 'system' and digest.created_at < notification._digest_since:
+            digest = None
+        if digest is None:
+            existing[key] = notification
+            created.append(notification)
+            continue
+
+        _merge_into_digest(digest, notification, max_lines)
+        if digest.pk:
+            updated[digest.pk] = digest
+
+    return created, list(updated.values())
+
+
+def _save_notifications(notifications, now=None):
+    with transaction.atomic():
+        notifications, updated = _coalesce_digests(notifications, now)
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+        Notification.objects.bulk_update(updated, ['title', 'message', 'grouped_count'], batch_size=1000)
+        add_unread_notifications(notifications)
+    publish_created_notifications(notifications)
+    publish_updated_notifications([n for n in updated if n.channel == 'system'])
+    return notifications + updated
+
+
+def dispatch_notifications(recipients, notification_type, title, message,
+                           channels=('system',), exclude=None, now=None):
+    """
+    Уведомления о событии для получателей recipients по каналам channels.
+    exclude - пользователь (или его id), которому уведомление не нужно
+    (обычно автор изменения). Возвращает список созданных уведомлений.
+    """
+    user_ids = _get_recipient_ids(recipients)
+    if exclude is not None:
+        user_ids.discard(getattr(exclude, 'pk', exclude))
+    if not user_ids:
+        return []
+
+    notifications = [
+        _build_notification(user_id, notification_type, title, message, delivery)
+        for user_id, user_deliveries in _get_deliveries(user_ids, notification_type, channels, now).items()
+        for delivery in user_deliveries
+    ]
+    return _save_notifications(notifications, now)
+
+
+def dispatch_personal_notifications(messages, notification_type, channels=('system',), now=None):
+    """
+    Уведомления с отдельным текстом для каждого получателя.
+    messages - список (пользователь или его id, заголовок, сообщение);
+    у одного пользователя может быть несколько сообщений.
+    """
+    messages = [(getattr(recipient, 'pk', recipient), title, message) for recipient, title, message in messages]
+    if not messages:
+        return []
+
+    deliveries = _get_deliveries({user_id for user_id, _, _ in messages}, notification_type, channels, now)
+    notifications = [
+        _build_notification(user_id, notification_type, title, message, delivery)
+        for user_id, title, message in messages
+        for delivery in deliveries.get(user_id, ())
+    ]
+    return _save_notifications(notifications, now)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from notifications.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = 'Создание партиций уведомлений, перенос старых уведомлений в архив и удаление старых партиций'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пачки при переносе в архив без партиций (не PostgreSQL)'
+        )
+    
+    def handle(self, *args, **options):
+        result = apply_retention(batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано партиций: {len(result['created_partitions'])}, "
+            f"перенесено в архив: {result['archived']}, "
+            f"удалено партиций: {len(result['dropped_partitions'])}"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from notifications.counters import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Сверка счетчиков непрочитанных уведомлений с таблицей уведомлений'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько пользователей сверять в одной транзакции'
+        )
+    
+    def handle(self, *args, **options):
+        result = reconcile_unread_counts(batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Исправлено счетчиков: {result['fixed']}, создано: {result['created']}"
+        ))
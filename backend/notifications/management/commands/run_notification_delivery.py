@@ -0,0 +1,84 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.delivery import DeliveryWorkerPool, get_delivery_metrics
+
+
+class Command(BaseCommand):
+    help = 'Запуск пула воркеров доставки уведомлений по email и Telegram'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Количество воркеров (по умолчанию NOTIFICATION_DELIVERY["WORKERS"])'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=None,
+            help='Пауза между опросами пустой очереди, сек'
+        )
+        parser.add_argument(
+            '--channel', action='append', dest='channels',
+            help='Обслуживаемый канал (можно указать несколько раз)'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить готовые уведомления и завершиться'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать состояние очереди по каналам и завершиться'
+        )
+    
+    def handle(self, *args, **options):
+        if options['stats']:
+            for channel, metrics in get_delivery_metrics().items():
+                self.stdout.write(
+                    f"{channel}: ждут {metrics['due']} (задержка {metrics['lag']} сек), "
+                    f"запланировано {metrics['scheduled']}, "
+                    f"отправлено за час {metrics['sent_last_hour']}, "
+                    f"исчерпали попытки {metrics['exhausted']}"
+                )
+            return
+        
+        pool = DeliveryWorkerPool(
+            workers=options['workers'],
+            poll_interval=options['poll_interval'],
+            channels=options['channels']
+        )
+        
+        if options['once']:
+            processed = pool.drain()
+            self.stdout.write(self.style.SUCCESS(f'Обработано уведомлений: {processed}'))
+            self._write_stats(pool)
+            return
+        
+        stopping = []
+        
+        def _shutdown(signum, frame):
+            stopping.append(signum)
+        
+        signal.signal(signal.SIGINT, _shutdown)
+        signal.signal(signal.SIGTERM, _shutdown)
+        
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(
+            f'Запущено воркеров: {pool.workers} (каналы: {", ".join(pool.channels)})'
+        ))
+        
+        while not stopping:
+            time.sleep(1)
+        
+        self.stdout.write('Остановка воркеров...')
+        pool.stop()
+        self._write_stats(pool)
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
+    
+    def _write_stats(self, pool):
+        for channel, stats in pool.stats.items():
+            stats = stats.as_dict()
+            self.stdout.write(
+                f"{channel}: отправлено {stats['sent']} ({stats['throughput']}/сек), "
+                f"ошибок {stats['failed']}, отложено {stats['deferred']}, "
+                f"макс. задержка {stats['max_lag']} сек"
+            )
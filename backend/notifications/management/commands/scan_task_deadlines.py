@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from notifications.deadlines import scan_task_deadlines
+
+
+class Command(BaseCommand):
+    help = 'Уведомления исполнителям о подходящих и истекших сроках задач'
+    
+    def handle(self, *args, **options):
+        result = scan_task_deadlines()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Срок подходит: {result['soon']}, просрочено: {result['overdue']}"
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_notification_counters(apps, schema_editor):
+    """Счетчики непрочитанных для всех существующих пользователей"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+
+    users = User.objects.annotate(
+        unread=Count('notification', filter=Q(notification__is_read=False))
+    ).values_list('id', 'unread')
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id, unread_count=unread) for user_id, unread in users.iterator()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_updated_at'),
+        ('notifications', '0002_notification_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('unread_count', models.IntegerField(default=0, verbose_name='Непрочитанных уведомлений')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Счетчик уведомлений',
+                'verbose_name_plural': 'Счетчики уведомлений',
+            },
+        ),
+        migrations.RunPython(fill_notification_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = 'notifications_notification'
+OLD_TABLE = 'notifications_notification_old'
+SEQUENCE = 'notifications_notification_id_seq'
+# Сколько месяцев вперед создаются партиции (дальше их создает notifications/retention.py)
+PREMAKE_MONTHS = 3
+
+
+def _add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=month_index + 1)
+
+
+def _get_table_definition(cursor, table):
+    """Индексы (кроме первичного ключа) и внешние ключи таблицы - для пересоздания"""
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """,
+        [table]
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    return indexes, cursor.fetchall()
+
+
+def _restore_table_definition(cursor, indexes, foreign_keys):
+    for index in indexes:
+        cursor.execute(index)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_notifications(apps, schema_editor):
+    """
+    Перестройка таблицы уведомлений в секционированную по месяцам created_at.
+    Первичный ключ секционированной таблицы обязан включать ключ секционирования,
+    поэтому он становится (id, created_at); id по-прежнему выдает одна последовательность.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    from datetime import datetime, timezone
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _get_table_definition(cursor, TABLE)
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        # id получит новую последовательность ниже; скопированный DEFAULT nextval()
+        # (если таблица уже перестраивалась) зависел бы от удаляемой таблицы
+        cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT')
+
+        cursor.execute(f'SELECT min(created_at), max(id) FROM {OLD_TABLE}')
+        first_created, max_id = cursor.fetchone()
+        now = datetime.now(timezone.utc)
+        month = (first_created or now).astimezone(timezone.utc)
+        month = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        last_month = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), PREMAKE_MONTHS)
+        while month <= last_month:
+            next_month = _add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+                [month, next_month]
+            )
+            month = next_month
+        # Страховка на случай, если партиции не были созданы заранее
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+        cursor.execute(f'DROP TABLE {OLD_TABLE}')
+
+        cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)')
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+        cursor.execute('SELECT setval(%s, %s, false)', [SEQUENCE, (max_id or 0) + 1])
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        _restore_table_definition(cursor, indexes, foreign_keys)
+
+
+def unpartition_notifications(apps, schema_editor):
+    """
+    Обратная перестройка в обычную таблицу (все партиции переносятся в нее).
+    id снова становится identity-столбцом, как в 0001_initial: иначе повторный
+    прямой переход скопировал бы DEFAULT nextval() и удалил таблицу вместе
+    с последовательностью, от которой зависит этот DEFAULT
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _get_table_definition(cursor, TABLE)
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+        # Последовательность принадлежит id старой таблицы и удаляется вместе с ней
+        cursor.execute(f'DROP TABLE {OLD_TABLE}')
+
+        cursor.execute(f'SELECT max(id) FROM {TABLE}')
+        max_id = cursor.fetchone()[0]
+        cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id)')
+        cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(
+            'SELECT setval(pg_get_serial_sequence(%s, %s), %s, false)', [TABLE, 'id', (max_id or 0) + 1]
+        )
+        _restore_table_definition(cursor, indexes, foreign_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notification_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('task_assigned', 'Новая задача'), ('task_deadline', 'Просроченная задача'), ('project_status', 'Изменение статуса проекта'), ('file_uploaded', 'Загружен новый файл'), ('comment_added', 'Добавлен комментарий'), ('report_ready', 'Отчет сформирован'), ('system', 'Системное уведомление')], max_length=20, verbose_name='Тип уведомления')),
+                ('channel', models.CharField(choices=[('system', 'В системе'), ('email', 'Email'), ('sms', 'SMS'), ('telegram', 'Telegram')], max_length=10, verbose_name='Канал отправки')),
+                ('title', models.CharField(max_length=255, verbose_name='Заголовок')),
+                ('was_read', models.BooleanField(verbose_name='Прочитано')),
+                ('created_at', models.DateTimeField(verbose_name='Создано')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесено в архив')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Архивное уведомление',
+                'verbose_name_plural': 'Архив уведомлений',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='notificatio_user_id_fbf7c9_idx')],
+            },
+        ),
+        migrations.RunPython(partition_notifications, unpartition_notifications),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_partitions'),
+        ('projects', '0006_task_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Задача')),
+                ('value', models.DateTimeField(verbose_name='Последний проход')),
+            ],
+            options={
+                'verbose_name': 'Отметка обработки уведомлений',
+                'verbose_name_plural': 'Отметки обработки уведомлений',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDeadlineNotice',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='deadline_notice', serialize=False, to='projects.task', verbose_name='Задача')),
+                ('deadline', models.DateField(verbose_name='Срок, о котором отправлено уведомление')),
+                ('stage', models.CharField(choices=[('soon', 'Срок подходит'), ('overdue', 'Срок истек')], max_length=10, verbose_name='Этап')),
+                ('notified_at', models.DateTimeField(auto_now=True, verbose_name='Отправлено')),
+            ],
+            options={
+                'verbose_name': 'Уведомление о сроке задачи',
+                'verbose_name_plural': 'Уведомления о сроках задач',
+            },
+        ),
+    ]
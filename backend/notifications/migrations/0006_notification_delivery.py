@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_task_deadline_notice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='delivery_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='delivery_error',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Ошибка отправки'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Захвачено до'),
+        ),
+        migrations.AddField(
+            model_name='usernotificationsettings',
+            name='telegram_chat_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Telegram Chat ID'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('sent_at__isnull', True), models.Q(('channel', 'system'), _negated=True)), fields=['channel', 'id'], name='notification_undelivered_idx'),
+        ),
+    ]
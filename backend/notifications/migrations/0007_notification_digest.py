@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='grouped_count',
+            field=models.PositiveIntegerField(default=1, verbose_name='Событий в уведомлении'),
+        ),
+        migrations.AddField(
+            model_name='usernotificationsettings',
+            name='digest_window',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Без дайджеста'), (15, '15 минут'), (60, 'Час'), (180, '3 часа'), (1440, 'Сутки')], default=0, verbose_name='Окно дайджеста (мин)'),
+        ),
+    ]
@@ -1,4 +1,11 @@
 from .notification import Notification
 from .user_notification_settings import UserNotificationSettings
+from .notification_counter import NotificationCounter
+from .notification_archive import NotificationArchive
+from .notification_watermark import NotificationWatermark
+from .task_deadline_notice import TaskDeadlineNotice
 
-__all__ = ['Notification', 'UserNotificationSettings']
\ No newline at end of file
+__all__ = [
+    'Notification', 'UserNotificationSettings', 'NotificationCounter', 'NotificationArchive',
+    'NotificationWatermark', 'TaskDeadlineNotice',
+]
@@ -29,6 +29,12 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     scheduled_for = models.DateTimeField(null=True, blank=True, verbose_name="Запланировано на")
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Отправлено")
+    # Сколько событий объединено в уведомление-дайджест (notifications/dispatch.py)
+    grouped_count = models.PositiveIntegerField(default=1, verbose_name="Событий в уведомлении")
+    # Доставка по внешним каналам (notifications/delivery.py)
+    delivery_attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток отправки")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Захвачено до")
+    delivery_error = models.CharField(max_length=255, blank=True, verbose_name="Ошибка отправки")
     
     class Meta:
         verbose_name = "Уведомление"
@@ -37,6 +43,14 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['scheduled_for']),
+            # Лента пользователя и курсорная пагинация (core/api/pagination.py)
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Очередь доставки: только неотправленные уведомления внешних каналов
+            models.Index(
+                fields=['channel', 'id'],
+                condition=models.Q(sent_at__isnull=True) & ~models.Q(channel='system'),
+                name='notification_undelivered_idx'
+            ),
         ]
     
     def __str__(self):
@@ -0,0 +1,28 @@
+from django.db import models
+from core.models import User
+from .notification import Notification
+
+
+class NotificationArchive(models.Model):
+    """
+    Архив старых уведомлений (notifications/retention.py).
+    Хранит только то, что нужно для истории: без текста сообщения и полей доставки.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name="Пользователь")
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES, verbose_name="Тип уведомления")
+    channel = models.CharField(max_length=10, choices=Notification.CHANNEL_CHOICES, verbose_name="Канал отправки")
+    title = models.CharField(max_length=255, verbose_name="Заголовок")
+    was_read = models.BooleanField(verbose_name="Прочитано")
+    created_at = models.DateTimeField(verbose_name="Создано")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Перенесено в архив")
+
+    class Meta:
+        verbose_name = "Архивное уведомление"
+        verbose_name_plural = "Архив уведомлений"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_notification_type_display()} для {self.user}"
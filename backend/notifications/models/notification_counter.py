@@ -0,0 +1,23 @@
+from django.db import models
+from core.models import User
+
+
+class NotificationCounter(models.Model):
+    """
+    Число непрочитанных уведомлений пользователя (денормализованный счетчик).
+    Обновляется атомарно вместе с уведомлениями (notifications/counters.py),
+    расхождения исправляет команда reconcile_notification_counters.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='notification_counter', verbose_name="Пользователь"
+    )
+    unread_count = models.IntegerField(default=0, verbose_name="Непрочитанных уведомлений")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Счетчик уведомлений"
+        verbose_name_plural = "Счетчики уведомлений"
+
+    def __str__(self):
+        return f"{self.user}: {self.unread_count}"
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class NotificationWatermark(models.Model):
+    """Отметка о последнем проходе периодической задачи уведомлений"""
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Задача")
+    value = models.DateTimeField(verbose_name="Последний проход")
+
+    class Meta:
+        verbose_name = "Отметка обработки уведомлений"
+        verbose_name_plural = "Отметки обработки уведомлений"
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class TaskDeadlineNotice(models.Model):
+    """
+    Последнее уведомление о сроке задачи (notifications/deadlines.py):
+    для какого срока и на каком этапе оно отправлено. Уведомление об одном
+    сроке на одном этапе отправляется один раз; при переносе срока - заново.
+    """
+    STAGE_CHOICES = [
+        ('soon', 'Срок подходит'),
+        ('overdue', 'Срок истек'),
+    ]
+
+    task = models.OneToOneField(
+        'projects.Task', on_delete=models.CASCADE, primary_key=True,
+        related_name='deadline_notice', verbose_name="Задача"
+    )
+    deadline = models.DateField(verbose_name="Срок, о котором отправлено уведомление")
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES, verbose_name="Этап")
+    notified_at = models.DateTimeField(auto_now=True, verbose_name="Отправлено")
+
+    class Meta:
+        verbose_name = "Уведомление о сроке задачи"
+        verbose_name_plural = "Уведомления о сроках задач"
+
+    def __str__(self):
+        return f"{self.task_id}: {self.deadline} ({self.stage})"
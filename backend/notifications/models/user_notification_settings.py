@@ -24,6 +24,21 @@ class UserNotificationSettings(models.Model):
     quiet_hours_start = models.TimeField(default='22:00', verbose_name="Начало тихих часов")
     quiet_hours_end = models.TimeField(default='08:00', verbose_name="Конец тихих часов")
     
+    # Дайджест: частые уведомления одного типа объединяются в одно за окно
+    DIGEST_WINDOW_CHOICES = [
+        (0, 'Без дайджеста'),
+        (15, '15 минут'),
+        (60, 'Час'),
+        (180, '3 часа'),
+        (1440, 'Сутки'),
+    ]
+    digest_window = models.PositiveSmallIntegerField(
+        default=0, choices=DIGEST_WINDOW_CHOICES, verbose_name="Окно дайджеста (мин)"
+    )
+    
+    # Адрес доставки в Telegram
+    telegram_chat_id = models.CharField(max_length=100, blank=True, verbose_name="Telegram Chat ID")
+    
     class Meta:
         verbose_name = "Настройка уведомлений"
         verbose_name_plural = "Настройки уведомлений"
@@ -0,0 +1,270 @@
+"""
+Хранение уведомлений: партиции по месяцам и перенос старых строк в архив.
+
+На PostgreSQL таблица уведомлений секционирована по месяцам created_at
+(миграция 0004_notification_partitions): партиция notifications_notification_pYYYYMM
+на каждый месяц и партиция по умолчанию на случай, если нужная еще не создана.
+Запросы с условием на created_at затрагивают только партиции своего периода.
+
+apply_retention() (команда apply_notification_retention, запускается раз в сутки):
+    1. создает партиции на PREMAKE_MONTHS месяцев вперед;
+    2. переносит прочитанные уведомления старше ARCHIVE_AFTER_DAYS дней
+       в NotificationArchive - по одному запросу на месяц, поэтому каждый
+       запрос работает с одной партицией;
+    3. партиции старше KEEP_MONTHS месяцев переносит в архив целиком
+       (вместе с непрочитанными, счетчики непрочитанных уменьшаются),
+       отсоединяет и удаляет - без построчного DELETE и VACUUM.
+В партицию по умолчанию попадают строки месяцев, для которых партиция
+не была создана заранее (например, все, что старше первой партиции).
+Ее строки переносятся в архив по тем же правилам, но построчно:
+DELETE ... RETURNING по created_at.
+
+На других СУБД (sqlite при разработке) партиций нет: строки переносятся
+в архив и удаляются пачками через ORM (сигналы сами поправляют счетчики).
+
+Настройки берутся из settings.NOTIFICATION_RETENTION:
+    ARCHIVE_AFTER_DAYS - возраст прочитанных уведомлений для переноса в архив, дней
+    KEEP_MONTHS        - сколько месяцев хранятся партиции
+    PREMAKE_MONTHS     - на сколько месяцев вперед создаются партиции
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import adjust_unread_counts
+from .models import Notification, NotificationArchive
+
+DEFAULT_RETENTION_SETTINGS = {
+    'ARCHIVE_AFTER_DAYS': 90,
+    'KEEP_MONTHS': 6,
+    'PREMAKE_MONTHS': 3,
+}
+
+TABLE = Notification._meta.db_table
+ARCHIVE_TABLE = NotificationArchive._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+# Поля, которые переносятся в архив: (поле уведомления, поле архива)
+ARCHIVE_FIELDS = (
+    ('user_id', 'user_id'),
+    ('notification_type', 'notification_type'),
+    ('channel', 'channel'),
+    ('title', 'title'),
+    ('is_read', 'was_read'),
+    ('created_at', 'created_at'),
+)
+
+
+def get_retention_settings():
+    """Настройки хранения уведомлений с учетом значений по умолчанию"""
+    return {**DEFAULT_RETENTION_SETTINGS, **getattr(settings, 'NOTIFICATION_RETENTION', {})}
+
+
+def month_start(moment):
+    """Начало месяца (UTC) - граница партиций"""
+    return moment.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=month_index + 1)
+
+
+def get_retention_start(now=None):
+    """
+    Начало самой старой хранимой партиции. Более старые строки удаляются
+    при очередном запуске apply_retention(), поэтому запросы к уведомлениям
+    ограничиваются этой датой и не затрагивают партиции, ожидающие удаления.
+    """
+    return add_months(month_start(now or timezone.now()), -get_retention_settings()['KEEP_MONTHS'])
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)', [TABLE])
+        return cursor.fetchone()[0]
+
+
+def get_partitions():
+    """Месячные партиции: {начало месяца: имя таблицы}"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def create_partitions(now=None):
+    """Партиции с текущего месяца на PREMAKE_MONTHS вперед. Возвращает имена созданных."""
+    current = month_start(now or timezone.now())
+    existing = get_partitions()
+    created = []
+
+    for offset in range(get_retention_settings()['PREMAKE_MONTHS'] + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        name = f'{TABLE}_p{month:%Y%m}'
+        bounds = [month, add_months(month, 1)]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)',
+                bounds
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)', bounds)
+            else:
+                # Строки этого месяца уже попали в партицию по умолчанию - переносим их
+                # в новую таблицу и только потом присоединяем ее
+                cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+                cursor.execute(
+                    f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+                    f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+                    f'INSERT INTO {name} SELECT * FROM moved',
+                    bounds
+                )
+                cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds)
+        created.append(name)
+
+    return created
+
+
+def _archive_columns():
+    source = ', '.join(field for field, _ in ARCHIVE_FIELDS)
+    target = ', '.join(field for _, field in ARCHIVE_FIELDS)
+    return source, target
+
+
+def _move_to_archive(queryset, batch_size):
+    """Перенос строк queryset в архив пачками через ORM (без партиций)"""
+    moved = 0
+    fields = [field for field, _ in ARCHIVE_FIELDS]
+    while True:
+        rows = list(queryset.order_by('pk').values('pk', *fields)[:batch_size])
+        if not rows:
+            return moved
+        with transaction.atomic():
+            NotificationArchive.objects.bulk_create([
+                NotificationArchive(**{target: row[source] for source, target in ARCHIVE_FIELDS})
+                for row in rows
+            ])
+            Notification.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+        moved += len(rows)
+
+
+def archive_read_notifications(now=None, batch_size=1000):
+    """Перенос прочитанных уведомлений старше ARCHIVE_AFTER_DAYS дней в архив"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=get_retention_settings()['ARCHIVE_AFTER_DAYS'])
+
+    if not is_partitioned():
+        return _move_to_archive(Notification.objects.filter(is_read=True, created_at__lt=cutoff), batch_size)
+
+    source, target = _archive_columns()
+    moved = 0
+    for month in sorted(get_partitions()):
+        if month >= cutoff:
+            break
+        # Границы месяца в условии - запрос затрагивает одну партицию
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {TABLE} '
+                f'WHERE is_read AND created_at >= %s AND created_at < %s RETURNING {source}) '
+                f'INSERT INTO {ARCHIVE_TABLE} ({target}, archived_at) SELECT {source}, %s FROM moved',
+                [month, min(add_months(month, 1), cutoff), now]
+            )
+            moved += cursor.rowcount
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+            f'WHERE is_read AND created_at < %s RETURNING {source}) '
+            f'INSERT INTO {ARCHIVE_TABLE} ({target}, archived_at) SELECT {source}, %s FROM moved',
+            [cutoff, now]
+        )
+        moved += cursor.rowcount
+    return moved
+
+
+def _archive_expired_default_rows(retention_start, now):
+    """Перенос в архив строк старше retention_start из партиции по умолчанию"""
+    source, target = _archive_columns()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+            f'WHERE created_at < %s RETURNING {source}), '
+            f'archived AS (INSERT INTO {ARCHIVE_TABLE} ({target}, archived_at) SELECT {source}, %s FROM moved) '
+            f'SELECT user_id, count(*) FILTER (WHERE NOT is_read), count(*) FROM moved GROUP BY user_id',
+            [retention_start, now]
+        )
+        rows = cursor.fetchall()
+        adjust_unread_counts({user_id: -unread for user_id, unread, _ in rows})
+    return sum(total for _, _, total in rows)
+
+
+def drop_expired_partitions(now=None, batch_size=1000):
+    """
+    Перенос в архив и удаление партиций старше KEEP_MONTHS месяцев.
+    Возвращает имена удаленных партиций и число перенесенных строк.
+    """
+    now = now or timezone.now()
+    retention_start = get_retention_start(now)
+
+    if not is_partitioned():
+        moved = _move_to_archive(Notification.objects.filter(created_at__lt=retention_start), batch_size)
+        return [], moved
+
+    source, target = _archive_columns()
+    dropped, moved = [], 0
+    for month, name in sorted(get_partitions().items()):
+        if add_months(month, 1) > retention_start:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'SELECT user_id, count(*) FROM {name} WHERE NOT is_read GROUP BY user_id')
+            unread = {user_id: -count for user_id, count in cursor.fetchall()}
+
+            cursor.execute(
+                f'INSERT INTO {ARCHIVE_TABLE} ({target}, archived_at) SELECT {source}, %s FROM {name}',
+                [now]
+            )
+            moved += cursor.rowcount
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+            adjust_unread_counts(unread)
+        dropped.append(name)
+
+    moved += _archive_expired_default_rows(retention_start, now)
+    return dropped, moved
+
+
+def apply_retention(now=None, batch_size=1000):
+    """Обслуживание таблицы уведомлений: новые партиции, архив, удаление старых партиций"""
+    now = now or timezone.now()
+    created = create_partitions(now) if is_partitioned() else []
+    archived = archive_read_notifications(now, batch_size)
+    dropped, expired = drop_expired_partitions(now, batch_size)
+    return {
+        'created_partitions': created,
+        'archived': archived + expired,
+        'dropped_partitions': dropped,
+    }
@@ -0,0 +1,42 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .counters import adjust_unread_counts
+from .models import Notification
+from .stream import publish_notification_event
+
+
+# Счетчик обновляется раньше публикации события: поток читает уже новое значение
+
+@receiver(pre_save, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    """Прежнее значение is_read - чтобы после сохранения поправить счетчик"""
+    instance._was_unread = None
+    if instance.pk:
+        was_read = Notification.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+        instance._was_unread = None if was_read is None else not was_read
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter(sender, instance, created, **kwargs):
+    is_unread = not instance.is_read
+    was_unread = False if created else getattr(instance, '_was_unread', None)
+    if was_unread is not None and was_unread != is_unread:
+        adjust_unread_counts({instance.user_id: 1 if is_unread else -1})
+
+
+@receiver(post_delete, sender=Notification)
+def remove_from_unread_counter(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_counts({instance.user_id: -1})
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification_saved(sender, instance, created, **kwargs):
+    """Новое или измененное (прочитанное) уведомление - в поток пользователя"""
+    publish_notification_event(instance.user_id, 'created' if created else 'updated', instance.pk)
+
+
+@receiver(post_delete, sender=Notification)
+def publish_notification_deleted(sender, instance, **kwargs):
+    publish_notification_event(instance.user_id, 'deleted', instance.pk)
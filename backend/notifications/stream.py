@@ -0,0 +1,175 @@
+"""
+Поток уведомлений для клиентов (server-sent events).
+
+Изменения уведомлений (создание, изменение, удаление) публикуются через
+PostgreSQL NOTIFY в канал NOTIFICATION_STREAM['CHANNEL'] после коммита
+транзакции. В каждом ASGI-процессе работает один NotificationHub: он держит
+отдельное соединение с LISTEN на этот канал и раздает события очередям
+открытых потоков соответствующего пользователя. Внешний брокер не нужен,
+а число соединений с БД не зависит от числа открытых вкладок.
+
+На других СУБД (sqlite при разработке) события доставляются только
+потокам того же процесса.
+
+Настройки берутся из settings.NOTIFICATION_STREAM:
+    CHANNEL    - канал LISTEN/NOTIFY
+    HEARTBEAT  - интервал комментариев-пингов в потоке, сек
+    QUEUE_SIZE - предельная длина очереди событий одного потока
+    RETRY_MS   - пауза перед переподключением клиента (поле retry SSE)
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM_SETTINGS = {
+    'CHANNEL': 'notifications',
+    'HEARTBEAT': 15,
+    'QUEUE_SIZE': 100,
+    'RETRY_MS': 5000,
+}
+
+# Событие-маркер переполнения очереди: поток перечитывает состояние целиком
+RESYNC_EVENT = {'event': 'resync'}
+
+
+def get_stream_settings():
+    """Настройки потока уведомлений с учетом значений по умолчанию"""
+    return {**DEFAULT_STREAM_SETTINGS, **getattr(settings, 'NOTIFICATION_STREAM', {})}
+
+
+class NotificationHub:
+    """Раздача событий уведомлений открытым потокам процесса"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._loop = None
+        self._listen_connection = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=get_stream_settings()['QUEUE_SIZE'])
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+        if not self._subscribers:
+            self._stop_listening()
+
+    def dispatch(self, event):
+        """Передача события очередям пользователя (в потоке цикла событий)"""
+        for queue in list(self._subscribers.get(event.get('user'), ())):
+            self._push(queue, event)
+
+    @staticmethod
+    def _push(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать - отбрасываем накопленное и просим перечитать
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+    def publish_local(self, event):
+        """Доставка события потокам этого процесса (без LISTEN/NOTIFY)"""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self.dispatch, event)
+
+    def ensure_listening(self):
+        """Запуск LISTEN при первом подписчике (вызывается из цикла событий)"""
+        self._loop = asyncio.get_running_loop()
+        if self._listen_connection is not None or connections['default'].vendor != 'postgresql':
+            return
+
+        import psycopg2
+
+        params = connections['default'].get_connection_params()
+        listen_connection = psycopg2.connect(**params)
+        listen_connection.autocommit = True
+        with listen_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{get_stream_settings()["CHANNEL"]}"')
+
+        self._loop.add_reader(listen_connection.fileno(), self._read_notifies)
+        self._listen_connection = listen_connection
+        logger.info("Поток уведомлений: LISTEN запущен")
+
+    def _read_notifies(self):
+        listen_connection = self._listen_connection
+        try:
+            listen_connection.poll()
+        except Exception:
+            logger.exception("Поток уведомлений: соединение LISTEN потеряно")
+            self._stop_listening()
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    self._push(queue, RESYNC_EVENT)
+            return
+
+        while listen_connection.notifies:
+            notify = listen_connection.notifies.pop(0)
+            try:
+                self.dispatch(json.loads(notify.payload))
+            except ValueError:
+                logger.warning("Поток уведомлений: некорректное событие %r", notify.payload)
+
+    def _stop_listening(self):
+        if self._listen_connection is None:
+            return
+        try:
+            self._loop.remove_reader(self._listen_connection.fileno())
+            self._listen_connection.close()
+        except Exception:
+            pass
+        self._listen_connection = None
+
+
+hub = NotificationHub()
+
+
+def _send_events(events):
+    if connection.vendor == 'postgresql':
+        # Одним запросом для всей пачки событий
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [get_stream_settings()['CHANNEL'], [json.dumps(event) for event in events]]
+            )
+    else:
+        for event in events:
+            hub.publish_local(event)
+
+
+def publish_notification_event(user_id, event, notification_id=None):
+    """
+    Публикация события уведомления после коммита текущей транзакции.
+    event: 'created', 'updated' или 'deleted'; для массовых операций
+    notification_id не передается.
+    """
+    payload = {'user': user_id, 'event': event, 'id': notification_id}
+    transaction.on_commit(lambda: _send_events([payload]))
+
+
+def publish_created_notifications(notifications, event='created'):
+    """Публикация пачки созданных уведомлений (bulk_create не вызывает сигналов)"""
+    payloads = [
+        {'user': notification.user_id, 'event': event, 'id': notification.pk}
+        for notification in notifications
+    ]
+    if payloads:
+        transaction.on_commit(lambda: _send_events(payloads))
+
+
+def publish_updated_notifications(notifications):
+    """Публикация пачки измененных уведомлений (bulk_update)"""
+    publish_created_notifications(notifications, event='updated')
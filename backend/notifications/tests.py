@@ -1,3 +1,458 @@
-from django.test import TestCase
+import asyncio
+import json
+import socketserver
+import threading
+from datetime import date, datetime, time, timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Client, User
+from projects.models import Project, Task
+
+from .counters import reconcile_unread_counts
+from .deadlines import scan_task_deadlines
+from .delivery import DeliveryWorkerPool, claim_notifications, get_delivery_metrics
+from .dispatch import dispatch_notifications
+from .models import Notification, NotificationArchive, NotificationCounter, UserNotificationSettings
+
+
+class NotificationStreamTest(TransactionTestCase):
+    """Поток уведомлений: счетчик при подключении и новые уведомления"""
+
+    def _parse(self, chunk):
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8')
+        lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        return lines['event'], json.loads(lines['data'])
+
+    async def _next_event(self, stream):
+        return self._parse(await asyncio.wait_for(stream.__anext__(), timeout=5))
+
+    def test_stream_requires_token(self):
+        response = self.client.get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_pushes_notifications(self):
+        user = await sync_to_async(User.objects.create)(username='designer', role='designer')
+        await sync_to_async(Notification.objects.create)(
+            user=user, notification_type='system', title='Старое', message='Текст'
+        )
+        token = str(AccessToken.for_user(user))
+
+        response = await self.async_client.get(f'/api/notifications/stream/?token={token}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+
+        self.assertTrue((await stream.__anext__()).startswith(b'retry: '))
+        self.assertEqual(await self._next_event(stream), ('unread_count', {'count': 1}))
+
+        await sync_to_async(Notification.objects.create)(
+            user=user, notification_type='task_assigned', title='Новая задача', message='Текст'
+        )
+        event, data = await self._next_event(stream)
+        self.assertEqual((event, data['title']), ('notification', 'Новая задача'))
+        self.assertEqual(await self._next_event(stream), ('unread_count', {'count': 2}))
+
+        await stream.aclose()
+
+
+class NotificationDispatchTest(TestCase):
+    """Рассылка: постоянное число запросов и правила настроек пользователей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Рассылка всем укладывается в одну пачку вставки и на sqlite (не более 999 параметров)
+        cls.users = User.objects.bulk_create([
+            User(username=f'user{i}', role='designer') for i in range(35)
+        ])
+        UserNotificationSettings.objects.create(user=cls.users[0], notify_project_changes=False)
+        UserNotificationSettings.objects.create(user=cls.users[1], enable_email=False)
+        UserNotificationSettings.objects.create(
+            user=cls.users[2], quiet_hours_start=time(22, 0), quiet_hours_end=time(8, 0)
+        )
+
+    def _dispatch(self, recipients, now):
+        with CaptureQueriesContext(connection) as ctx:
+            notifications = dispatch_notifications(
+                recipients, 'project_status', title='Статус проекта изменен', message='В работе',
+                channels=('system', 'email'), exclude=self.users[-1], now=now,
+            )
+        return len(ctx), notifications
+
+    def test_dispatch_applies_settings_in_constant_queries(self):
+        day = timezone.make_aware(datetime(2026, 3, 2, 12, 0))
+        night = timezone.make_aware(datetime(2026, 3, 2, 23, 0))
+
+        small_queries, _ = self._dispatch(User.objects.filter(pk__in=[u.pk for u in self.users[:5]]), day)
+        queries, notifications = self._dispatch(User.objects.all(), night)
+        self.assertEqual(queries, small_queries)
+
+        by_user = {}
+        for notification in notifications:
+            by_user.setdefault(notification.user_id, {})[notification.channel] = notification
+
+        self.assertNotIn(self.users[0].pk, by_user)
+        self.assertNotIn(self.users[-1].pk, by_user)
+        self.assertEqual(set(by_user[self.users[1].pk]), {'system'})
+        self.assertEqual(len(by_user), 33)
+
+        email = by_user[self.users[2].pk]['email']
+        self.assertEqual(timezone.localtime(email.scheduled_for), timezone.make_aware(datetime(2026, 3, 3, 8, 0)))
+        self.assertIsNone(by_user[self.users[2].pk]['system'].scheduled_for)
+        self.assertEqual(Notification.objects.filter(notification_type='project_status').count(), 7 + 65)
+
+
+class UnreadCounterTest(TestCase):
+    """Счетчик непрочитанных меняется вместе с уведомлениями и читается одним запросом"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='designer', role='designer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _unread_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/notifications/notifications/unread_count/')
+        return len(ctx), response.json()['count']
+
+    def _counter(self):
+        return NotificationCounter.objects.get(user=self.user).unread_count
+
+    def test_counter_follows_notifications(self):
+        dispatch_notifications([self.user], 'system', title='Первое', message='Текст')
+        dispatch_notifications([self.user], 'system', title='Второе', message='Текст')
+        single = Notification.objects.create(user=self.user, notification_type='system', title='Третье', message='Текст')
+        self.assertEqual(self._counter(), 3)
+
+        self.assertEqual(self._unread_count(), (1, 3))
+
+        response = self.client.post(f'/api/notifications/notifications/{single.pk}/mark_read/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counter(), 2)
+        self.assertEqual(self._unread_count(), (1, 2))
+
+        self.client.post('/api/notifications/notifications/mark_all_read/')
+        self.assertEqual(self._counter(), 0)
+        self.assertEqual(self._unread_count(), (1, 0))
+
+    def test_reconcile_fixes_drift(self):
+        dispatch_notifications([self.user], 'system', title='Первое', message='Текст')
+        NotificationCounter.objects.filter(user=self.user).update(unread_count=10)
+
+        self.assertEqual(reconcile_unread_counts(), {'fixed': 1, 'created': 0})
+        self.assertEqual(self._counter(), 1)
+
+
+class NotificationRetentionTest(TestCase):
+    """Старые уведомления переносятся в архив, счетчики и список не расходятся с таблицей"""
+
+    def test_retention_moves_old_notifications_to_archive(self):
+        user = User.objects.create(username='designer', role='designer')
+        now = timezone.now()
+        ages = {
+            'Свежее прочитанное': (10, True),
+            'Старое прочитанное': (120, True),
+            'Старое непрочитанное': (120, False),
+            'Просроченное непрочитанное': (400, False),
+            'Свежее непрочитанное': (1, False),
+        }
+        for title, (days, is_read) in ages.items():
+            notification = Notification.objects.create(
+                user=user, notification_type='system', title=title, message='Текст', is_read=is_read
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=now - timedelta(days=days))
+
+        # На PostgreSQL старые строки лежат в партиции по умолчанию: месячных партиций
+        # для них нет, поэтому архивируются они отдельным запросом
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('apply_notification_retention', stdout=StringIO())
+
+        self.assertEqual(
+            set(Notification.objects.values_list('title', flat=True)),
+            {'Свежее прочитанное', 'Старое непрочитанное', 'Свежее непрочитанное'}
+        )
+        self.assertEqual(
+            set(NotificationArchive.objects.values_list('title', 'was_read')),
+            {('Старое прочитанное', True), ('Просроченное непрочитанное', False)}
+        )
+        self.assertEqual(NotificationCounter.objects.get(user=user).unread_count, 2)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/notifications/notifications/')
+        self.assertEqual(
+            [notification['title'] for notification in response.json()['results']],
+            ['Свежее непрочитанное', 'Старое непрочитанное']
+        )
+
+
+class NotificationPartitionMigrationTest(TransactionTestCase):
+    """Секционирование уведомлений откатывается и применяется повторно без потери строк"""
+
+    def _migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate(target)
+
+    def _is_partitioned(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)',
+                [Notification._meta.db_table]
+            )
+            return cursor.fetchone()[0]
+
+    def test_backwards_then_forwards(self):
+        user = User.objects.create(username='designer', role='designer')
+        old = Notification.objects.create(user=user, notification_type='system', title='До отката', message='Текст')
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes('notifications')
+
+        self._migrate([('notifications', '0003_notification_counter')])
+        self.assertFalse(self._is_partitioned())
+        self._migrate(latest)
+        self.assertTrue(self._is_partitioned())
+
+        new = Notification.objects.create(user=user, notification_type='system', title='После', message='Текст')
+        self.assertGreater(new.pk, old.pk)
+        self.assertEqual(set(Notification.objects.values_list('title', flat=True)), {'До отката', 'После'})
+
+
+class TaskDeadlineScanTest(TestCase):
+    """Уведомления о сроках: один раз на срок и этап, повторный проход ничего не делает"""
+
+    def setUp(self):
+        self.designer = User.objects.create(username='designer', role='designer')
+        muted = User.objects.create(username='muted', role='designer')
+        UserNotificationSettings.objects.create(user=muted, notify_deadlines=False)
+
+        project = Project.objects.create(
+            title='Проект', manager=User.objects.create(username='manager', role='manager'),
+            client=Client.objects.create(
+                name='Клиент', contact_person='Иванов Иван',
+                phone='+79990000000', email='client@example.com'
+            ),
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        self.tasks = {
+            title: Task.objects.create(
+                title=title, description='', project=project, assigned_to=assignee,
+                deadline=deadline, status=status
+            )
+            for title, assignee, deadline, status in [
+                ('Завтра', self.designer, date(2026, 3, 11), 'in_work'),
+                ('Вчера', self.designer, date(2026, 3, 9), 'in_work'),
+                ('Через неделю', self.designer, date(2026, 3, 17), 'in_work'),
+                ('Выполнена', self.designer, date(2026, 3, 9), 'completed'),
+                ('Без уведомлений', muted, date(2026, 3, 11), 'in_work'),
+            ]
+        }
+
+    def _scan(self, day):
+        now = timezone.make_aware(datetime(2026, 3, day, 12, 0))
+        with CaptureQueriesContext(connection) as ctx:
+            result = scan_task_deadlines(now=now)
+        return result, len(ctx)
+
+    def _messages(self):
+        return sorted(
+            Notification.objects
+            .filter(notification_type='task_deadline', channel='system')
+            .values_list('title', 'message')
+        )
+
+    def test_scan_notifies_once_per_deadline_and_stage(self):
+        result, _ = self._scan(10)
+        self.assertEqual(result, {'soon': 2, 'overdue': 1})
+        self.assertEqual(self._messages(), [
+            ('Задача просрочена', 'Срок задачи «Вчера» (проект «Проект») истек 09.03.2026'),
+            ('Срок задачи подходит', 'Срок задачи «Завтра» (проект «Проект») истекает 11.03.2026'),
+        ])
+
+        result, queries = self._scan(10)
+        self.assertEqual(result, {'soon': 0, 'overdue': 0})
+        self.assertLessEqual(queries, 6)
+
+        # Срок прошел - второе уведомление; перенос срока - уведомление заново
+        task = self.tasks['Вчера']
+        task.deadline = date(2026, 3, 13)
+        task.save()
+        result, _ = self._scan(12)
+        self.assertEqual(result, {'soon': 1, 'overdue': 2})
+        self.assertEqual(Notification.objects.filter(channel='system').count(), 4)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма, адреса со словом refused отклоняет"""
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply('220 localhost')
+        data = None
+        for raw in self.rfile:
+            line = raw.decode('utf-8').rstrip('\r\n')
+            if data is not None:
+                if line == '.':
+                    self.server.messages.append('\n'.join(data))
+                    data = None
+                    self._reply('250 OK')
+                else:
+                    data.append(line)
+                continue
+
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self._reply('250 localhost')
+            elif command == 'RCPT' and 'refused' in line:
+                self._reply('550 No such user')
+            elif command == 'DATA':
+                data = []
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+
+class NotificationDeliveryTest(TestCase):
+    """Доставка по email: одно SMTP-соединение на все пачки, тихие часы, отметка sent_at"""
+
+    def setUp(self):
+        self.smtp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        self.smtp.daemon_threads = True
+        self.smtp.connections = 0
+        self.smtp.messages = []
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+
+        now = timezone.localtime()
+        self.receiver = User.objects.create(username='receiver', email='receiver@example.com')
+        refused = User.objects.create(username='refused', email='refused@example.com')
+        sleeping = User.objects.create(username='sleeping', email='sleeping@example.com')
+        for user, offset in ((self.receiver, 2), (refused, 2), (sleeping, -1)):
+            UserNotificationSettings.objects.create(
+                user=user,
+                quiet_hours_start=(now + timedelta(hours=offset)).time(),
+                quiet_hours_end=(now + timedelta(hours=offset + 2)).time(),
+            )
+
+        for user, count in ((self.receiver, 3), (refused, 1), (sleeping, 1)):
+            for i in range(count):
+                Notification.objects.create(
+                    user=user, notification_type='system', channel='email',
+                    title=f'Письмо {i}', message='Текст'
+                )
+        Notification.objects.create(user=self.receiver, notification_type='system', title='В системе', message='Текст')
+
+    def test_drain_delivers_over_one_connection(self):
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.smtp.server_address[1],
+            NOTIFICATION_DELIVERY={'CHANNELS': ('email',), 'BATCH_SIZE': 2},
+        ):
+            pool = DeliveryWorkerPool()
+            pool.drain()
+            metrics = get_delivery_metrics()['email']
+
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertEqual(pool.stats['email'].as_dict()['sent'], 3)
+
+        sent = Notification.objects.filter(sent_at__isnull=False)
+        self.assertEqual(set(sent.values_list('user__username', flat=True)), {'receiver'})
+        self.assertEqual(sent.count(), 3)
+
+        failed = Notification.objects.get(user__username='refused')
+        self.assertEqual(failed.delivery_attempts, 5)
+        self.assertTrue(failed.delivery_error.startswith('Адрес отклонен'))
+
+        deferred = Notification.objects.get(user__username='sleeping')
+        self.assertIsNone(deferred.sent_at)
+        self.assertGreater(deferred.scheduled_for, timezone.now())
+
+        self.assertEqual(
+            {key: metrics[key] for key in ('due', 'scheduled', 'exhausted', 'sent_last_hour')},
+            {'due': 0, 'scheduled': 1, 'exhausted': 1, 'sent_last_hour': 3}
+        )
+
+
+class NotificationDigestTest(TestCase):
+    """Дайджест: события одного типа за окно объединяются в одно уведомление на канал"""
+
+    def setUp(self):
+        self.digest_user = User.objects.create(username='digest', role='designer')
+        self.sleeping_user = User.objects.create(username='sleeping', role='designer')
+        self.plain_user = User.objects.create(username='plain', role='designer')
+        UserNotificationSettings.objects.create(user=self.digest_user, digest_window=60)
+        UserNotificationSettings.objects.create(
+            user=self.sleeping_user, quiet_hours_start=time(9, 0), quiet_hours_end=time(13, 0)
+        )
+
+    def _comment(self, minute, hour=10):
+        dispatch_notifications(
+            [self.digest_user, self.sleeping_user, self.plain_user], 'comment_added',
+            title='Новый комментарий', message=f'Комментарий {hour}:{minute:02d}',
+            channels=('system', 'email'), now=timezone.make_aware(datetime(2026, 3, 2, hour, minute)),
+        )
+
+    def _rows(self, user):
+        return list(
+            Notification.objects.filter(user=user).order_by('channel', 'created_at')
+            .values_list('channel', 'grouped_count', 'scheduled_for')
+        )
+
+    def test_events_are_coalesced_per_window(self):
+        for minute in range(0, 60, 2):
+            self._comment(minute)
+
+        window_end = timezone.make_aware(datetime(2026, 3, 2, 11, 0))
+        self.assertEqual(self._rows(self.digest_user), [('email', 30, window_end), ('system', 30, None)])
+
+        # Тихие часы без окна дайджеста: объединяются только отложенные письма
+        sleeping_rows = self._rows(self.sleeping_user)
+        self.assertEqual(sleeping_rows[0], ('email', 30, timezone.make_aware(datetime(2026, 3, 2, 13, 0))))
+        self.assertEqual(len(sleeping_rows), 31)
+        self.assertEqual(len(self._rows(self.plain_user)), 60)
+
+        digest = Notification.objects.get(user=self.digest_user, channel='system')
+        self.assertEqual(digest.title, 'Добавлен комментарий (30)')
+        self.assertEqual(digest.message.split('\n')[0], 'Новый комментарий: Комментарий 10:58')
+        self.assertEqual(len(digest.message.split('\n')), 10)
+        # Непрочитанные считаются по всем каналам: по одному дайджесту на канал
+        self.assertEqual(NotificationCounter.objects.get(user=self.digest_user).unread_count, 2)
+
+        # Следующее окно - новые уведомления
+        Notification.objects.update(created_at=timezone.make_aware(datetime(2026, 3, 2, 10, 58)))
+        self._comment(5, hour=11)
+        self.assertEqual(len(self._rows(self.digest_user)), 4)
+
+    def test_claimed_digest_is_not_rewritten(self):
+        self._comment(0)
+        window_end = timezone.make_aware(datetime(2026, 3, 2, 11, 0))
+        claimed = claim_notifications('email', now=window_end)
+        digest = next(n for n in claimed if n.user_id == self.digest_user.pk)
+
+        # Событие пришло, пока воркер отправляет захваченное письмо: оно не дописывается
+        # в отправляемую строку, а попадает в новое уведомление
+        self._comment(59)
+        digest.refresh_from_db()
+        self.assertEqual((digest.grouped_count, digest.message), (1, 'Комментарий 10:00'))
+        self.assertEqual(
+            list(
+                Notification.objects.filter(user=self.digest_user, channel='email')
+                .order_by('id').values_list('grouped_count', flat=True)
+            ),
+            [1, 1]
+        )
@@ -1,10 +1,14 @@
 from rest_framework import permissions
 
+from ..permission_cache import cached_object_permission
+from ..visibility import is_project_visible
+
 
 class CanViewProject(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
@@ -14,15 +18,16 @@ class CanViewProject(permissions.BasePermission):
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return obj.manager == user or obj.projectmember_set.filter(employee__user=user).exists()
+            return obj.manager_id == user.id or is_project_visible(user, obj.pk)
         else:
-            return obj.projectmember_set.filter(employee__user=user).exists()
+            return is_project_visible(user, obj.pk)
 
 
 class CanEditProject(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and hasattr(request.user, 'role') and request.user.role in ['director', 'manager']
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
@@ -32,7 +37,7 @@ class CanEditProject(permissions.BasePermission):
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return obj.manager == user
+            return obj.manager_id == user.id
         return False
 
 
@@ -57,6 +62,7 @@ class CanViewTask(permissions.BasePermission):
         # Для остальных методов проверяется в has_object_permission
         return True
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
@@ -66,17 +72,18 @@ class CanViewTask(permissions.BasePermission):
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return (obj.project.manager == user or 
-                   obj.assigned_to == user or 
-                   obj.created_by == user)
+            return (obj.project.manager_id == user.id or 
+                   obj.assigned_to_id == user.id or 
+                   obj.created_by_id == user.id)
         else:
-            return obj.assigned_to == user or obj.created_by == user
+            return obj.assigned_to_id == user.id or obj.created_by_id == user.id
 
 
 class CanEditTask(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
@@ -86,10 +93,10 @@ class CanEditTask(permissions.BasePermission):
         if user.role == 'director':
             return True
         elif user.role == 'manager':
-            return obj.project.manager == user or obj.created_by == user
+            return obj.project.manager_id == user.id or obj.created_by_id == user.id
         else:
             # Исполнитель может редактировать только свою задачу
-            return obj.assigned_to == user and request.method in ['PUT', 'PATCH', 'POST']
+            return obj.assigned_to_id == user.id and request.method in ['PUT', 'PATCH', 'POST']
 
 
 # Добавьте эти классы для клиентов
@@ -32,9 +32,14 @@ class ProjectSerializer(serializers.ModelSerializer):
         return ''
     
     def get_tasks_count(self, obj):
+        # Счетчик может быть уже посчитан аннотацией в ProjectViewSet.get_queryset
+        if hasattr(obj, 'tasks_count'):
+            return obj.tasks_count
         return Task.objects.filter(project=obj, is_active=True).count()
     
     def get_completed_tasks(self, obj):
+        if hasattr(obj, 'completed_tasks'):
+            return obj.completed_tasks
         return Task.objects.filter(project=obj, is_active=True, status='completed').count()
     
     def get_progress_percentage(self, obj):
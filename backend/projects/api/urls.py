@@ -13,6 +13,9 @@ router.register(r'', ProjectViewSet, basename='project')
 
 
 urlpatterns = [
+    # Статистика дашборда (фронтенд обращается к /api/dashboard/stats/)
+    path('stats/', ProjectViewSet.as_view({'get': 'dashboard_stats'}), name='dashboard-stats'),
+    
     path('', include(router.urls)),
     
     # Дополнительные URL для проектов
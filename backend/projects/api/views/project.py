@@ -5,8 +5,9 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Count
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 
-from ...models import Project, Task, ProjectMember
+from ...models import Project, Task, ProjectMember, ProjectVisibility
 from ..serializers import (
     ProjectSerializer, ProjectDetailSerializer,
     ProjectCreateSerializer, TaskSerializer,
@@ -14,6 +15,9 @@ from ..serializers import (
 )
 from ..permissions import CanViewProject, CanEditProject
 from ..filters import ProjectFilter
+from ...cache import get_dashboard_stats_cache_key, get_dashboard_stats_ttl
+from ...visibility import filter_visible_projects
+from notifications.dispatch import dispatch_notifications
 
 class ProjectViewSet(viewsets.ModelViewSet):
     queryset = Project.objects.filter(is_active=True)
@@ -41,19 +45,27 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Фильтрация проектов по правам доступа"""
         user = self.request.user
-        queryset = super().get_queryset()
-        
-        if user.role == 'director':
-            return queryset
-        elif user.role == 'manager':
-            # Менеджер видит проекты, где он менеджер или участник
-            return queryset.filter(
-                Q(manager=user) | 
-                Q(projectmember__employee__user=user)
-            ).distinct()
-        else:
-            # Обычные сотрудники видят проекты, где они участники
-            return queryset.filter(projectmember__employee__user=user).distinct()
+        queryset = self._filter_by_access(super().get_queryset(), user)
+        return self._with_task_counts(queryset)
+    
+    def _filter_by_access(self, queryset, user):
+        """
+        Проекты, доступные пользователю.
+        Менеджер видит проекты, где он менеджер или участник, остальные -
+        где они участники; обе связи хранятся в ProjectVisibility, поэтому
+        достаточно одного подзапроса без JOIN и distinct().
+        """
+        return filter_visible_projects(queryset, user)
+    
+    def _with_task_counts(self, queryset):
+        """
+        Клиент и менеджер через JOIN, счетчики задач - аннотациями,
+        чтобы ProjectSerializer не делал запросов на каждую строку
+        """
+        return queryset.select_related('client', 'manager').annotate(
+            tasks_count=Count('task', filter=Q(task__is_active=True)),
+            completed_tasks=Count('task', filter=Q(task__is_active=True, task__status='completed')),
+        )
     
     def get_object(self):
         """
@@ -76,21 +88,55 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
-        """Статистика для дашборда"""
-        user = request.user
-        projects = self.get_queryset()
+        """
+        Статистика для дашборда.
+        Кэшируется на пользователя на короткое время (см. projects/cache.py).
+        """
+        cache_key = get_dashboard_stats_cache_key(request.user)
+        stats = cache.get(cache_key)
         
-        stats = {
-            'total_projects': projects.count(),
-            'active_projects': projects.filter(status='in_work').count(),
-            'planned_projects': projects.filter(status='planned').count(),
-            'on_approval_projects': projects.filter(status='on_approval').count(),
-            'completed_projects': projects.filter(status='completed').count(),
-            'paused_projects': projects.filter(status='paused').count(),
-        }
+        if stats is None:
+            stats = self._collect_dashboard_stats(request.user)
+            cache.set(cache_key, stats, get_dashboard_stats_ttl())
         
         return Response(stats)
     
+    def _collect_dashboard_stats(self, user):
+        """Счетчики проектов и задач пользователя - по одному агрегирующему запросу"""
+        projects = self._filter_by_access(Project.objects.filter(is_active=True), user)
+        
+        stats = projects.aggregate(
+            total_projects=Count('id'),
+            active_projects=Count('id', filter=Q(status='in_work')),
+            planned_projects=Count('id', filter=Q(status='planned')),
+            on_approval_projects=Count('id', filter=Q(status='on_approval')),
+            completed_projects=Count('id', filter=Q(status='completed')),
+            paused_projects=Count('id', filter=Q(status='paused')),
+        )
+        
+        # Задачи пользователя (то, что раньше фронтенд считал по списку my_tasks)
+        stats.update(Task.objects.filter(is_active=True, assigned_to=user).aggregate(
+            my_tasks_count=Count('id'),
+            tasks_in_progress=Count('id', filter=Q(status='in_work')),
+            on_approval=Count('id', filter=Q(status='on_review')),
+            completed_tasks=Count('id', filter=Q(status='completed')),
+            overdue_tasks=Count('id', filter=Q(
+                deadline__lt=timezone.now().date(),
+                status__in=['created', 'in_work']
+            )),
+        ))
+        
+        # Сотрудники и клиенты - только для директора
+        if user.role == 'director':
+            from core.models import Client, Employee
+            stats['total_employees'] = Employee.objects.filter(is_active=True).count()
+            stats['total_clients'] = Client.objects.filter(is_active=True).count()
+        else:
+            stats['total_employees'] = 0
+            stats['total_clients'] = 0
+        
+        return stats
+    
     @action(detail=True, methods=['get'])
     def tasks(self, request, pk=None):
         """Получение задач проекта"""
@@ -181,25 +227,27 @@ class ProjectViewSet(viewsets.ModelViewSet):
         
         project.save()
         
+        # Уведомляем менеджера и участников проекта, кроме автора изменения
+        dispatch_notifications(
+            ProjectVisibility.objects.filter(project=project).values_list('user_id', flat=True),
+            'project_status',
+            title=f'Статус проекта «{project.title}» изменен',
+            message=f'Новый статус: {project.get_status_display()}',
+            exclude=request.user,
+        )
+        
         serializer = self.get_serializer(project)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def archived(self, request):
         """Получение архивных проектов"""
-        user = request.user
         archived_projects = Project.objects.filter(is_active=False)
         
         # Фильтрация по правам доступа
-        if user.role == 'director':
-            projects = archived_projects
-        elif user.role == 'manager':
-            projects = archived_projects.filter(
-                Q(manager=user) | 
-                Q(projectmember__employee__user=user)
-            ).distinct()
-        else:
-            projects = archived_projects.filter(projectmember__employee__user=user).distinct()
+        projects = self._with_task_counts(
+            self._filter_by_access(archived_projects, request.user)
+        )
         
         serializer = self.get_serializer(projects, many=True)
         return Response(serializer.data)
@@ -230,7 +278,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project.save()
         
         # Восстанавливаем все задачи проекта
-        project.task_set.update(is_active=True)
+        project.task_set.update(is_active=True, updated_at=timezone.now())
         
         serializer = self.get_serializer(project)
         return Response({
@@ -270,7 +318,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project.save()
         
         # Архивируем все задачи проекта
-        project.task_set.update(is_active=False)
+        project.task_set.update(is_active=False, updated_at=timezone.now())
         
         serializer = self.get_serializer(project)
         return Response({
@@ -297,7 +345,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         instance.save()
         
         # Архивируем все задачи проекта
-        instance.task_set.update(is_active=False)
+        instance.task_set.update(is_active=False, updated_at=timezone.now())
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -3,21 +3,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
 from django.utils import timezone
 from ...models import Task
+from ...visibility import filter_visible_tasks
 from ..serializers import TaskSerializer, TaskDetailSerializer, TaskCreateSerializer
 from ..permissions import CanEditTask, CanViewTask
 from ..filters import TaskFilter
+from core.api.pagination import KeysetPagination
+from search.filters import FullTextSearchFilter
 
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.filter(is_active=True)
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_class = TaskFilter
     search_fields = ['title', 'description']
     ordering_fields = ['deadline', 'priority', 'created_at']
+    pagination_class = KeysetPagination
+    cursor_ordering = ('priority', 'deadline', 'id')
     
     def create(self, request, *args, **kwargs):
         print("=" * 50)
@@ -64,23 +68,8 @@ class TaskViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Task.objects.none()
         
-        # Для директора - все задачи
-        if hasattr(user, 'role') and user.role == 'director':
-            return super().get_queryset()
-        
-        # Для менеджера - задачи своих проектов или свои задачи
-        elif hasattr(user, 'role') and user.role == 'manager':
-            return super().get_queryset().filter(
-                Q(project__manager=user) | 
-                Q(assigned_to=user) |
-                Q(created_by=user)
-            ).distinct()
-        
-        # Для остальных - только свои задачи
-        else:
-            return super().get_queryset().filter(
-                Q(assigned_to=user) | Q(created_by=user)
-            ).distinct()
+        # Директору - все задачи, менеджеру - задачи своих проектов и свои, остальным - свои
+        return filter_visible_tasks(super().get_queryset(), user)
     
     def perform_create(self, serializer):
         """Создание задачи с установкой создателя"""
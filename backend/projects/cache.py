@@ -0,0 +1,50 @@
+"""
+Кэш статистики дашборда.
+
+Статистика кэшируется на пользователя на DASHBOARD_STATS_CACHE_TTL секунд
+в общем для всех процессов кэше (settings.CACHES). Ключ включает общую
+версию данных: при сохранении или удалении проекта, задачи или участника
+проекта (projects/signals.py) и при исправлении таблицы видимости
+(check_project_visibility) версия меняется, и все ранее закэшированные
+значения перестают использоваться во всех процессах, включая
+management-команды. Каждый сброс - две записи в таблицу кэша: сразу
+и после фиксации транзакции.
+
+Версия - случайная метка, а не счетчик: одновременные сбросы из разных
+процессов не могут записать одно и то же значение. Версия меняется сразу
+и еще раз после фиксации транзакции, чтобы статистика, посчитанная другим
+процессом до фиксации изменений, не осталась в кэше под новой версией.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_STATS_VERSION_KEY = 'dashboard_stats:version'
+
+
+def get_dashboard_stats_ttl():
+    return getattr(settings, 'DASHBOARD_STATS_CACHE_TTL', 60)
+
+
+def _get_version():
+    version = cache.get(DASHBOARD_STATS_VERSION_KEY)
+    if version is None:
+        cache.add(DASHBOARD_STATS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(DASHBOARD_STATS_VERSION_KEY)
+    return version
+
+
+def _set_new_version():
+    cache.set(DASHBOARD_STATS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_dashboard_stats_cache_key(user):
+    return f'dashboard_stats:{_get_version()}:{user.pk}'
+
+
+def invalidate_dashboard_stats():
+    """Сброс статистики дашборда всех пользователей"""
+    _set_new_version()
+    transaction.on_commit(_set_new_version)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from projects.visibility import check_project_visibility
+
+
+class Command(BaseCommand):
+    help = 'Проверка и исправление таблицы видимости проектов (ProjectVisibility)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только показать расхождения, ничего не исправляя'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько проектов сверять за один проход'
+        )
+    
+    def handle(self, *args, **options):
+        repair = not options['check']
+        result = check_project_visibility(repair=repair, batch_size=options['batch_size'])
+        
+        summary = (
+            f"недостающих строк: {result['missing']}, "
+            f"лишних: {result['stale']}, "
+            f"с неверной ролью: {result['mismatched']}"
+        )
+        if not any(result.values()):
+            self.stdout.write(self.style.SUCCESS("Расхождений нет"))
+        elif repair:
+            self.stdout.write(self.style.SUCCESS(f"Исправлено - {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Найдены расхождения - {summary}"))
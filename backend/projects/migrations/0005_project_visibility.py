@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_project_visibility(apps, schema_editor):
+    """Первичное заполнение видимости по менеджерам и участникам проектов"""
+    Project = apps.get_model('projects', 'Project')
+    ProjectMember = apps.get_model('projects', 'ProjectMember')
+    ProjectVisibility = apps.get_model('projects', 'ProjectVisibility')
+
+    rows = {}
+    for project_id, manager_id in Project.objects.values_list('id', 'manager_id').iterator():
+        rows[(manager_id, project_id)] = ProjectVisibility(
+            user_id=manager_id, project_id=project_id, is_manager=True
+        )
+    for project_id, user_id in ProjectMember.objects.values_list('project_id', 'employee__user_id').iterator():
+        row = rows.setdefault((user_id, project_id), ProjectVisibility(user_id=user_id, project_id=project_id))
+        row.is_member = True
+
+    ProjectVisibility.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_task_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_manager', models.BooleanField(default=False, verbose_name='Менеджер проекта')),
+                ('is_member', models.BooleanField(default=False, verbose_name='Участник проекта')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.project', verbose_name='Проект')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Видимость проекта',
+                'verbose_name_plural': 'Видимость проектов',
+                'unique_together': {('user', 'project')},
+            },
+        ),
+        migrations.RunPython(fill_project_visibility, migrations.RunPython.noop),
+    ]
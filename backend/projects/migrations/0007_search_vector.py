@@ -0,0 +1,76 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# Таблица: поля документа с весами
+SEARCH_DOCUMENTS = {
+    'projects_project': (('title', 'A'), ('description', 'B')),
+    'projects_task': (('title', 'A'), ('description', 'B')),
+}
+
+
+def _document(columns, prefix=''):
+    return ' || '.join(
+        f"setweight(to_tsvector('russian', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def add_search_triggers(apps, schema_editor):
+    """
+    search_vector заполняется триггером при вставке и изменении полей документа,
+    существующие строки - одним UPDATE (до построения GIN-индекса)
+    """
+    for table, columns in SEARCH_DOCUMENTS.items():
+        schema_editor.execute(
+            f'CREATE FUNCTION {table}_search_update() RETURNS trigger AS $$ '
+            f'BEGIN NEW.search_vector := {_document(columns, "NEW.")}; RETURN NEW; END '
+            f'$$ LANGUAGE plpgsql'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {table}_search_update '
+            f'BEFORE INSERT OR UPDATE OF {", ".join(column for column, _ in columns)} ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_search_update()'
+        )
+        schema_editor.execute(f'UPDATE {table} SET search_vector = {_document(columns)}')
+
+
+def remove_search_triggers(apps, schema_editor):
+    for table in SEARCH_DOCUMENTS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_update ON {table}')
+        schema_editor.execute(f'DROP FUNCTION IF EXISTS {table}_search_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_updated_at'),
+        ('projects', '0006_task_cursor_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(add_search_triggers, remove_search_triggers),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='project_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_trigram_indexes'),
+        ('projects', '0007_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Расширение pg_trgm создает core.0003_trigram_indexes
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='project_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from .project import Project
 from .task import Task
 from .project_member import ProjectMember
+from .project_visibility import ProjectVisibility
 
-__all__ = ['Project', 'Task', 'ProjectMember']
\ No newline at end of file
+__all__ = ['Project', 'Task', 'ProjectMember', 'ProjectVisibility']
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -60,11 +62,23 @@ class Project(models.Model):
     restored_at = models.DateTimeField(null=True, blank=True)  # Новое поле
     restored_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
                                    related_name='restored_projects')  # Новое поле
+    # Полнотекстовый поиск (search/fulltext.py): на PostgreSQL заполняется триггером при записи
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = "Проект"
         verbose_name_plural = "Проекты"
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='project_search_idx'),
+            # Совпадения в заголовке (вес A) - первые кандидаты ранжирования (search/fulltext.py)
+            GinIndex(
+                models.Func('search_vector', models.Value('{a}'), function='ts_filter', output_field=SearchVectorField()),
+                name='project_title_search_idx',
+            ),
+            # Автодополнение по названию (search/suggest.py)
+            GinIndex(fields=['title'], name='project_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.title
@@ -0,0 +1,24 @@
+from django.db import models
+from core.models import User
+
+
+class ProjectVisibility(models.Model):
+    """
+    Видимость проектов пользователям (материализованная таблица).
+    Строка (user, project) есть, если пользователь - менеджер проекта
+    или его участник. Поддерживается сигналами (projects/visibility.py),
+    расхождения исправляет команда repair_project_visibility.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name="Пользователь")
+    project = models.ForeignKey('Project', on_delete=models.CASCADE, related_name='+', verbose_name="Проект")
+    is_manager = models.BooleanField(default=False, verbose_name="Менеджер проекта")
+    is_member = models.BooleanField(default=False, verbose_name="Участник проекта")
+
+    class Meta:
+        verbose_name = "Видимость проекта"
+        verbose_name_plural = "Видимость проектов"
+        # Индекс (user, project) покрывает подзапрос project_id по пользователю
+        unique_together = ['user', 'project']
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.project_id}"
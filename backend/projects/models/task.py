@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -52,6 +54,7 @@ class Task(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, 
                                   related_name='created_tasks', verbose_name="Создатель")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата постановки")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
     deadline = models.DateField(verbose_name="Срок выполнения")
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Фактическая дата выполнения")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='created', verbose_name="Статус задачи")
@@ -64,6 +67,8 @@ class Task(models.Model):
     estimated_hours = models.DecimalField(max_digits=5, decimal_places=1, null=True, blank=True, verbose_name="Оценка времени (ч)")
     actual_hours = models.DecimalField(max_digits=5, decimal_places=1, null=True, blank=True, verbose_name="Фактическое время (ч)")
     is_active = models.BooleanField(default=True)
+    # Полнотекстовый поиск (search/fulltext.py): на PostgreSQL заполняется триггером при записи
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = "Задача"
@@ -72,7 +77,14 @@ class Task(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['deadline']),
-            models.Index(fields=['priority']),
+            # Сортировка списка и курсорная пагинация (core/api/pagination.py)
+            models.Index(fields=['priority', 'deadline', 'id']),
+            GinIndex(fields=['search_vector'], name='task_search_idx'),
+            # Совпадения в заголовке (вес A) - первые кандидаты ранжирования (search/fulltext.py)
+            GinIndex(
+                models.Func('search_vector', models.Value('{a}'), function='ts_filter', output_field=SearchVectorField()),
+                name='task_title_search_idx',
+            ),
         ]
     
     def __str__(self):
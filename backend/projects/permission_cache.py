@@ -0,0 +1,157 @@
+"""
+Кэш проверок прав на объекты (has_object_permission).
+
+Результат проверки запоминается на двух уровнях:
+    - на время запроса (атрибут запроса), чтобы повторные проверки одного
+      объекта в рамках запроса не обращались к БД;
+    - в памяти процесса на TTL секунд.
+
+Ключ включает класс разрешения, пользователя, HTTP-метод, объект (модель,
+pk и updated_at, если он есть) и версию состава проектов. Версия хранится
+в общем для всех процессов кэше (settings.CACHES, таблица в PostgreSQL)
+и меняется при изменении участников проектов и смене менеджера
+(projects/signals.py) - сразу и еще раз после фиксации транзакции. Версия -
+случайная метка, а не счетчик, чтобы одновременные сбросы не записали одно значение.
+
+Чтение версии из общего кэша - такой же запрос к БД, как сама проверка,
+поэтому процесс держит копию версии и перечитывает ее не чаще раза в
+VERSION_REFRESH секунд. Процесс, в котором изменился состав проекта,
+сбрасывает свою память сразу; остальные процессы - не позже чем через
+VERSION_REFRESH секунд. Изменения связанных объектов (например, перестановка
+исполнителя задачи, к которой привязан файл) видны не позже чем через TTL секунд.
+
+Настройки берутся из settings.PERMISSION_CACHE:
+    ENABLED     - использовать ли кэш
+    TTL             - время жизни результата в памяти процесса, сек
+    MAX_ENTRIES     - предельное число результатов в памяти процесса
+    VERSION_REFRESH - как часто процесс перечитывает версию состава проектов, сек
+"""
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DEFAULT_PERMISSION_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TTL': 30,
+    'MAX_ENTRIES': 10000,
+    'VERSION_REFRESH': 5,
+}
+
+MEMBERSHIP_VERSION_KEY = 'permissions:membership_version'
+
+_process_cache = {}
+_process_cache_lock = threading.Lock()
+# Копия версии состава проектов в процессе: (версия, когда перечитать)
+_process_version = {'version': None, 'refresh_at': 0}
+
+
+def get_permission_cache_settings():
+    """Настройки кэша прав с учетом значений по умолчанию"""
+    return {**DEFAULT_PERMISSION_CACHE_SETTINGS, **getattr(settings, 'PERMISSION_CACHE', {})}
+
+
+def get_membership_version():
+    version = cache.get(MEMBERSHIP_VERSION_KEY)
+    if version is None:
+        cache.add(MEMBERSHIP_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(MEMBERSHIP_VERSION_KEY)
+    return version
+
+
+def _set_new_membership_version():
+    cache.set(MEMBERSHIP_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_permission_cache():
+    """Сброс сохраненных результатов проверок прав во всех процессах"""
+    _set_new_membership_version()
+    transaction.on_commit(_set_new_membership_version)
+    with _process_cache_lock:
+        _process_cache.clear()
+        _process_version['version'] = None
+    transaction.on_commit(_forget_process_version)
+
+
+def _forget_process_version():
+    with _process_cache_lock:
+        _process_version['version'] = None
+
+
+def _get_process_version(refresh_interval):
+    """Версия состава проектов из памяти процесса, из общего кэша - не чаще раза в refresh_interval"""
+    now = time.monotonic()
+    with _process_cache_lock:
+        if _process_version['version'] is not None and _process_version['refresh_at'] > now:
+            return _process_version['version']
+    version = get_membership_version()
+    with _process_cache_lock:
+        _process_version.update(version=version, refresh_at=now + refresh_interval)
+    return version
+
+
+def _get_request_cache(request, cache_settings):
+    """Кэш текущего запроса; версия состава проектов берется один раз на запрос"""
+    request_cache = getattr(request, '_permission_cache', None)
+    if request_cache is None:
+        request_cache = {'version': _get_process_version(cache_settings['VERSION_REFRESH']), 'results': {}}
+        request._permission_cache = request_cache
+    return request_cache
+
+
+def _get_object_key(obj):
+    updated_at = getattr(obj, 'updated_at', None)
+    return (obj._meta.label_lower, obj.pk, updated_at.isoformat() if updated_at else None)
+
+
+def check_cached(request, name, obj, check):
+    """
+    Результат проверки check() для объекта obj из кэша запроса или процесса.
+    name - имя проверки (класс разрешения).
+    """
+    cache_settings = get_permission_cache_settings()
+    if not cache_settings['ENABLED'] or obj.pk is None or not request.user.is_authenticated:
+        return check()
+
+    request_cache = _get_request_cache(request, cache_settings)
+    key = (name, request.user.pk, request.method, _get_object_key(obj), request_cache['version'])
+
+    results = request_cache['results']
+    if key in results:
+        return results[key]
+
+    now = time.monotonic()
+    with _process_cache_lock:
+        cached = _process_cache.get(key)
+    if cached is not None and cached[0] > now:
+        results[key] = cached[1]
+        return cached[1]
+
+    result = check()
+    results[key] = result
+
+    with _process_cache_lock:
+        if len(_process_cache) >= cache_settings['MAX_ENTRIES']:
+            # Простое вытеснение: сначала устаревшие записи, при нехватке места - все
+            for expired_key in [k for k, (expires, _) in _process_cache.items() if expires <= now]:
+                del _process_cache[expired_key]
+            if len(_process_cache) >= cache_settings['MAX_ENTRIES']:
+                _process_cache.clear()
+        _process_cache[key] = (now + cache_settings['TTL'], result)
+
+    return result
+
+
+def cached_object_permission(method):
+    """Декоратор has_object_permission: результат берется из кэша прав"""
+    @wraps(method)
+    def wrapper(self, request, view, obj):
+        return check_cached(
+            request, f'{type(self).__module__}.{type(self).__qualname__}', obj,
+            lambda: method(self, request, view, obj)
+        )
+    return wrapper
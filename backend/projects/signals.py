@@ -0,0 +1,85 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Employee
+from .cache import invalidate_dashboard_stats
+from .models import Project, Task, ProjectMember
+from .permission_cache import invalidate_permission_cache
+from .visibility import grant_project_visibility, revoke_project_visibility
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Task)
+def reset_dashboard_stats(sender, **kwargs):
+    """Статистика дашборда устаревает при изменении проектов и задач"""
+    invalidate_dashboard_stats()
+
+
+def _get_employee_user_id(employee_id):
+    return Employee.objects.filter(pk=employee_id).values_list('user_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_manager(sender, instance, **kwargs):
+    """Прежний менеджер проекта - чтобы после сохранения обновить видимость"""
+    instance._previous_manager_id = None
+    if instance.pk:
+        instance._previous_manager_id = (
+            Project.objects.filter(pk=instance.pk).values_list('manager_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Project)
+def update_manager_visibility(sender, instance, created, **kwargs):
+    """Видимость проекта его менеджеру (при создании и смене менеджера)"""
+    previous_manager_id = getattr(instance, '_previous_manager_id', None)
+    if not created and previous_manager_id == instance.manager_id:
+        return
+
+    if previous_manager_id is not None:
+        revoke_project_visibility(previous_manager_id, instance.pk, 'manager')
+        invalidate_permission_cache()
+    grant_project_visibility(instance.manager_id, instance.pk, 'manager')
+
+
+@receiver(pre_save, sender=ProjectMember)
+def remember_project_member(sender, instance, **kwargs):
+    """Прежние проект и сотрудник участника - на случай их изменения"""
+    instance._previous_membership = None
+    if instance.pk:
+        instance._previous_membership = (
+            ProjectMember.objects.filter(pk=instance.pk).values_list('project_id', 'employee_id').first()
+        )
+
+
+@receiver(post_save, sender=ProjectMember)
+def update_member_visibility(sender, instance, created, **kwargs):
+    """Видимость проекта его участнику"""
+    invalidate_permission_cache()
+    # Число проектов на дашборде считается по таблице видимости
+    invalidate_dashboard_stats()
+
+    previous = getattr(instance, '_previous_membership', None)
+    current = (instance.project_id, instance.employee_id)
+    if not created and previous == current:
+        return
+
+    if previous is not None:
+        previous_user_id = _get_employee_user_id(previous[1])
+        if previous_user_id is not None:
+            revoke_project_visibility(previous_user_id, previous[0], 'member')
+
+    user_id = _get_employee_user_id(instance.employee_id)
+    if user_id is not None:
+        grant_project_visibility(user_id, instance.project_id, 'member')
+
+
+@receiver(post_delete, sender=ProjectMember)
+def remove_member_visibility(sender, instance, **kwargs):
+    """Участник удален из проекта"""
+    invalidate_permission_cache()
+    invalidate_dashboard_stats()
+
+    user_id = _get_employee_user_id(instance.employee_id)
+    if user_id is not None:
+        revoke_project_visibility(user_id, instance.project_id, 'member')
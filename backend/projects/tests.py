@@ -1,3 +1,379 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import User, Client, Employee
+from .models import Project, Task, ProjectMember, ProjectVisibility
+from .permission_cache import invalidate_permission_cache
+from .visibility import check_project_visibility
+
+
+class ProjectListQueryCountTest(TestCase):
+    """Число запросов списка проектов не зависит от количества проектов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create(username='director', role='director')
+        cls.manager = User.objects.create(username='manager', role='manager')
+        cls.designer = User.objects.create(username='designer', role='designer')
+        cls.designer_employee = Employee.objects.create(
+            user=cls.designer, position='Дизайнер', work_email='designer@example.com',
+            hire_date=date(2025, 1, 1)
+        )
+        cls.client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+
+    def _create_projects(self, count):
+        start = Project.objects.count()
+        projects = Project.objects.bulk_create([
+            Project(
+                title=f'Проект {start + i}',
+                client=self.client_obj,
+                manager=self.manager,
+                start_date=date(2026, 1, 1),
+                planned_end_date=date(2026, 6, 1),
+            )
+            for i in range(count)
+        ])
+        Task.objects.bulk_create([
+            Task(
+                title=f'Задача {j}', description='', project=project,
+                assigned_to=self.designer, deadline=date(2026, 2, 1),
+                status='completed' if j == 0 else 'in_work',
+            )
+            for project in projects
+            for j in range(3)
+        ])
+        ProjectMember.objects.bulk_create([
+            ProjectMember(project=project, employee=self.designer_employee, role='designer')
+            for project in projects
+        ])
+        # bulk_create не вызывает сигналов - достраиваем таблицу видимости
+        check_project_visibility(repair=True)
+
+    def _list_queries(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.json()
+
+    def test_project_list_query_count(self):
+        counts = {}
+        for total in (20, 100, 1000):
+            self._create_projects(total - Project.objects.count())
+            for user in (self.director, self.manager, self.designer):
+                queries, data = self._list_queries(user)
+                counts.setdefault(user.username, set()).add(queries)
+                self.assertEqual(data['count'], total)
+
+        for username, query_counts in counts.items():
+            self.assertEqual(len(query_counts), 1, f'{username}: {sorted(query_counts)}')
+
+        project = data['results'][0]
+        self.assertEqual(project['tasks_count'], 3)
+        self.assertEqual(project['completed_tasks'], 1)
+        self.assertEqual(project['progress_percentage'], 33.3)
+        self.assertEqual(project['client_name'], 'Клиент')
+
+
+class DashboardStatsTest(TestCase):
+    """Статистика дашборда: один агрегирующий запрос и кэш на пользователя"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.manager = User.objects.create(username='manager', role='manager')
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        self.projects = [
+            Project.objects.create(
+                title=f'Проект {status}', client=client_obj, manager=self.manager,
+                start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1), status=status,
+            )
+            for status in ('planned', 'in_work', 'in_work', 'completed')
+        ]
+        Task.objects.bulk_create([
+            Task(title='Задача', description='', project=self.projects[1],
+                 assigned_to=self.manager, deadline=date(2026, 2, 1), status=status)
+            for status in ('in_work', 'on_review', 'completed')
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def _get_stats(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+        # Запросы к данным, без обращений к таблице кэша (settings.CACHES) и ее точек сохранения
+        queries = [
+            query for query in ctx.captured_queries
+            if 'django_cache' not in query['sql'] and 'SAVEPOINT' not in query['sql']
+        ]
+        return len(queries), response.json()
+
+    def test_stats_are_aggregated_and_cached(self):
+        queries, stats = self._get_stats()
+
+        self.assertEqual(queries, 2)
+        self.assertEqual(stats['total_projects'], 4)
+        self.assertEqual(stats['active_projects'], 2)
+        self.assertEqual(stats['planned_projects'], 1)
+        self.assertEqual(stats['completed_projects'], 1)
+        self.assertEqual(stats['my_tasks_count'], 3)
+        self.assertEqual(stats['tasks_in_progress'], 1)
+        self.assertEqual(stats['on_approval'], 1)
+        self.assertEqual(stats['completed_tasks'], 1)
+        self.assertEqual(stats['overdue_tasks'], 1)
+
+        queries, cached_stats = self._get_stats()
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached_stats, stats)
+
+    def test_project_save_invalidates_cache(self):
+        self._get_stats()
+
+        self.projects[0].status = 'in_work'
+        self.projects[0].save()
+
+        queries, stats = self._get_stats()
+        self.assertEqual(queries, 2)
+        self.assertEqual(stats['active_projects'], 3)
+
+    def test_membership_change_invalidates_cache(self):
+        designer = User.objects.create(username='designer', role='designer')
+        employee = Employee.objects.create(
+            user=designer, position='Дизайнер', work_email='designer@example.com', hire_date=date(2025, 1, 1)
+        )
+        self.client.force_authenticate(designer)
+        self.assertEqual(self._get_stats()[1]['total_projects'], 0)
+
+        member = ProjectMember.objects.create(project=self.projects[1], employee=employee, role='designer')
+        self.assertEqual(self._get_stats()[1]['total_projects'], 1)
+
+        member.delete()
+        self.assertEqual(self._get_stats()[1]['total_projects'], 0)
+
+        # Строки, добавленные в обход сигналов, учитываются после repair_project_visibility
+        ProjectMember.objects.bulk_create([ProjectMember(project=self.projects[2], employee=employee, role='designer')])
+        check_project_visibility(repair=True)
+        self.assertEqual(self._get_stats()[1]['total_projects'], 1)
+
+
+class ProjectVisibilityTest(TestCase):
+    """Таблица видимости проектов поддерживается сигналами и чинится командой"""
+
+    def setUp(self):
+        self.manager = User.objects.create(username='manager', role='manager')
+        self.other_manager = User.objects.create(username='other_manager', role='manager')
+        self.designer = User.objects.create(username='designer', role='designer')
+        self.employee = Employee.objects.create(
+            user=self.designer, position='Дизайнер', work_email='designer@example.com',
+            hire_date=date(2025, 1, 1)
+        )
+        self.project = Project.objects.create(
+            title='Проект', manager=self.manager,
+            client=Client.objects.create(
+                name='Клиент', contact_person='Иванов Иван',
+                phone='+79990000000', email='client@example.com'
+            ),
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+
+    def _visibility(self):
+        return set(
+            ProjectVisibility.objects
+            .filter(project=self.project)
+            .values_list('user__username', 'is_manager', 'is_member')
+        )
+
+    def _visible_titles(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        return [project['title'] for project in response.json()['results']]
+
+    def test_signals_maintain_visibility(self):
+        self.assertEqual(self._visibility(), {('manager', True, False)})
+
+        member = ProjectMember.objects.create(project=self.project, employee=self.employee, role='designer')
+        self.assertEqual(self._visibility(), {('manager', True, False), ('designer', False, True)})
+        self.assertEqual(self._visible_titles(self.designer), ['Проект'])
+
+        self.project.manager = self.other_manager
+        self.project.save()
+        self.assertEqual(self._visibility(), {('other_manager', True, False), ('designer', False, True)})
+        self.assertEqual(self._visible_titles(self.manager), [])
+
+        member.delete()
+        self.assertEqual(self._visibility(), {('other_manager', True, False)})
+        self.assertEqual(self._visible_titles(self.designer), [])
+
+    def test_repair_command_fixes_drift(self):
+        ProjectMember.objects.bulk_create([
+            ProjectMember(project=self.project, employee=self.employee, role='designer')
+        ])
+        ProjectVisibility.objects.filter(user=self.manager).update(is_member=True)
+        ProjectVisibility.objects.create(user=self.other_manager, project=self.project, is_manager=True)
+
+        self.assertEqual(check_project_visibility(), {'missing': 1, 'stale': 1, 'mismatched': 1})
+
+        call_command('repair_project_visibility', stdout=StringIO())
+
+        self.assertEqual(self._visibility(), {('manager', True, False), ('designer', False, True)})
+        self.assertEqual(check_project_visibility(), {'missing': 0, 'stale': 0, 'mismatched': 0})
+
+
+class PermissionCacheTest(TestCase):
+    """Проверки прав на объект кэшируются и сбрасываются при смене участников"""
+
+    def setUp(self):
+        invalidate_permission_cache()
+
+        manager = User.objects.create(username='manager', role='manager')
+        self.designer = User.objects.create(username='designer', role='designer')
+        employee = Employee.objects.create(
+            user=self.designer, position='Дизайнер', work_email='designer@example.com',
+            hire_date=date(2025, 1, 1)
+        )
+        self.project = Project.objects.create(
+            title='Проект', manager=manager,
+            client=Client.objects.create(
+                name='Клиент', contact_person='Иванов Иван',
+                phone='+79990000000', email='client@example.com'
+            ),
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        self.member = ProjectMember.objects.create(project=self.project, employee=employee, role='designer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.designer)
+
+    def _get_project(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/projects/{self.project.pk}/')
+        return response.status_code, len(ctx)
+
+    def test_object_permission_is_cached(self):
+        status_code, cold_queries = self._get_project()
+        self.assertEqual(status_code, 200)
+        # Повторно не проверяется видимость и не читается версия из общего кэша
+        self.assertEqual(self._get_project(), (200, cold_queries - 2))
+        self.assertEqual(self._get_project(), (200, cold_queries - 2))
+
+        self.member.delete()
+        status_code, _ = self._get_project()
+        self.assertEqual(status_code, 403)
+
+    def test_membership_change_in_other_process_resets_cache(self):
+        import time
+        from unittest import mock
+        from . import permission_cache
+
+        self.assertEqual(self._get_project()[0], 200)
+
+        # Участника исключают в другом процессе: его память не связана с памятью этого процесса,
+        # общей остается только версия состава проектов в settings.CACHES
+        with mock.patch.object(permission_cache, '_process_cache', {}), \
+                mock.patch.object(permission_cache, '_process_version', {'version': None, 'refresh_at': 0}):
+            self.member.delete()
+
+        # Этот процесс перечитывает версию не чаще раза в VERSION_REFRESH секунд
+        self.assertEqual(self._get_project()[0], 200)
+        later = time.monotonic() + permission_cache.get_permission_cache_settings()['VERSION_REFRESH']
+        with mock.patch.object(permission_cache.time, 'monotonic', return_value=later):
+            self.assertEqual(self._get_project()[0], 403)
+
+
+class TaskCursorPaginationTest(TestCase):
+    """Курсорный режим списка задач: все строки без повторов, переходы вперед и назад"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create(username='director', role='director')
+        project = Project.objects.create(
+            title='Проект', manager=cls.director,
+            client=Client.objects.create(
+                name='Клиент', contact_person='Иванов Иван',
+                phone='+79990000000', email='client@example.com'
+            ),
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        Task.objects.bulk_create([
+            Task(title=f'Задача {i}', description='', project=project,
+                 priority=('low', 'high', 'medium')[i % 3], deadline=date(2026, 2, 1 + i % 4))
+            for i in range(45)
+        ])
+
+    def _get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_pages(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+        expected = list(Task.objects.order_by('priority', 'deadline', 'id').values_list('id', flat=True))
+
+        # approximate_count - оценка планировщика (EXPLAIN), а не COUNT(*): точна только
+        # при свежей статистике и в пределах погрешности
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Task._meta.db_table}')
+
+        pages = []
+        data = self._get('/api/projects/project-tasks/?pagination=cursor')
+        self.assertAlmostEqual(data['approximate_count'], 45, delta=10)
+        self.assertIsNone(data['previous'])
+        pages.append([task['id'] for task in data['results']])
+        while data['next']:
+            data = self._get(data['next'])
+            pages.append([task['id'] for task in data['results']])
+
+        self.assertEqual([len(page) for page in pages], [20, 20, 5])
+        self.assertEqual(sum(pages, []), expected)
+
+        data = self._get(data['previous'])
+        self.assertEqual([task['id'] for task in data['results']], pages[1])
+        data = self._get(data['previous'])
+        self.assertEqual([task['id'] for task in data['results']], pages[0])
+        self.assertIsNone(data['previous'])
+
+        self.assertEqual(self.client.get('/api/projects/project-tasks/?cursor=broken').status_code, 404)
+        self.assertIn('count', self._get('/api/projects/project-tasks/'))
+
+    def test_cursor_is_index_start_key(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+        next_url = self._get('/api/projects/project-tasks/?pagination=cursor')['next']
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._get(next_url)
+        page_sql = next(query['sql'] for query in ctx.captured_queries if 'ROW(' in query['sql'])
+
+        # На 45 строках планировщик выбрал бы полный просмотр таблицы
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {page_sql}')
+            plan = cursor.fetchone()[0]
+
+        def _nodes(node):
+            yield node
+            for child in node.get('Plans', []):
+                yield from _nodes(child)
 
-# Create your tests here.
+        index_scan = next(node for node in _nodes(plan[0]['Plan']) if node.get('Index Name'))
+        self.assertEqual(index_scan['Index Name'], 'projects_ta_priorit_47e6ff_idx')
+        self.assertRegex(index_scan['Index Cond'], r'^\(ROW\(\(?priority.*, deadline, id\) > ROW\(')
+        self.assertNotIn('ROW(', index_scan.get('Filter', ''))
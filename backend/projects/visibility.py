@@ -0,0 +1,165 @@
+"""
+Видимость проектов пользователям.
+
+Таблица ProjectVisibility хранит пары (пользователь, проект), где
+пользователь - менеджер проекта (is_manager) или его участник (is_member).
+Фильтры доступа в представлениях проектов, задач, файлов и комментариев
+используют ее как полусоединение (project_id IN (SELECT ...)) по индексу
+(user_id, project_id) вместо OR-условий с JOIN через участников и distinct().
+Сами условия доступа собраны в функциях filter_visible_*: их применяют
+представления и общий поиск (search/fulltext.py).
+
+Таблица обновляется инкрементально сигналами (projects/signals.py) при
+создании проекта, смене его менеджера и изменении участников. Массовые
+операции (bulk_create, update, raw SQL) сигналов не вызывают - после них
+и для проверки на расхождения используется команда repair_project_visibility.
+"""
+from django.db.models import Q
+
+from .cache import invalidate_dashboard_stats
+from .models import Project, ProjectMember, ProjectVisibility, Task
+from .permission_cache import invalidate_permission_cache
+
+ROLE_FIELDS = {
+    'manager': 'is_manager',
+    'member': 'is_member',
+}
+
+
+def visible_project_ids(user, managed_only=False):
+    """Подзапрос id проектов, видимых пользователю (только управляемых, если managed_only)"""
+    rows = ProjectVisibility.objects.filter(user=user)
+    if managed_only:
+        rows = rows.filter(is_manager=True)
+    return rows.values('project_id')
+
+
+def filter_visible_projects(queryset, user):
+    """
+    Проекты, доступные пользователю: директору - все, остальным - где
+    пользователь менеджер или участник (одним подзапросом к ProjectVisibility)
+    """
+    if user.role == 'director':
+        return queryset
+    return queryset.filter(id__in=visible_project_ids(user))
+
+
+def filter_visible_tasks(queryset, user):
+    """Задачи: директору - все, менеджеру - его проектов и свои, остальным - только свои"""
+    if getattr(user, 'role', None) == 'director':
+        return queryset
+    own = Q(assigned_to=user) | Q(created_by=user)
+    if getattr(user, 'role', None) == 'manager':
+        return queryset.filter(Q(project_id__in=visible_project_ids(user, managed_only=True)) | own)
+    return queryset.filter(own)
+
+
+def filter_visible_files(queryset, user):
+    """Файлы проектов, где пользователь менеджер или участник, и загруженные им (сотруднику - и файлы его задач)"""
+    if user.role == 'director':
+        return queryset
+    visible = Q(project_id__in=visible_project_ids(user)) | Q(uploaded_by=user)
+    if user.role != 'manager':
+        visible |= Q(task__assigned_to=user)
+    return queryset.filter(visible)
+
+
+def filter_visible_comments(queryset, user):
+    """Комментарии: менеджеру - к его проектам и их задачам и свои, сотруднику - только свои"""
+    if user.role == 'director':
+        return queryset
+    if user.role == 'manager':
+        manager_projects = visible_project_ids(user, managed_only=True)
+        project_tasks = Task.objects.filter(project_id__in=manager_projects).values('id')
+        return queryset.filter(
+            Q(content_type='project', object_id__in=manager_projects) |
+            Q(content_type='task', object_id__in=project_tasks) |
+            Q(author=user)
+        )
+    return queryset.filter(author=user)
+
+
+def is_project_visible(user, project_id):
+    """Пользователь - менеджер или участник проекта"""
+    return ProjectVisibility.objects.filter(user=user, project_id=project_id).exists()
+
+
+def grant_project_visibility(user_id, project_id, role):
+    """Пользователь стал менеджером ('manager') или участником ('member') проекта"""
+    field = ROLE_FIELDS[role]
+    ProjectVisibility.objects.bulk_create(
+        [ProjectVisibility(user_id=user_id, project_id=project_id, **{field: True})],
+        ignore_conflicts=True
+    )
+    ProjectVisibility.objects.filter(
+        user_id=user_id, project_id=project_id
+    ).update(**{field: True})
+
+
+def revoke_project_visibility(user_id, project_id, role):
+    """Пользователь перестал быть менеджером или участником проекта"""
+    field = ROLE_FIELDS[role]
+    rows = ProjectVisibility.objects.filter(user_id=user_id, project_id=project_id)
+    rows.update(**{field: False})
+    rows.filter(is_manager=False, is_member=False).delete()
+
+
+def _expected_visibility(project_ids):
+    """Ожидаемые строки для проектов: {(user_id, project_id): (is_manager, is_member)}"""
+    expected = {}
+    for project_id, manager_id in Project.objects.filter(id__in=project_ids).values_list('id', 'manager_id'):
+        expected[(manager_id, project_id)] = (True, False)
+
+    members = ProjectMember.objects.filter(project_id__in=project_ids).values_list('project_id', 'employee__user_id')
+    for project_id, user_id in members:
+        is_manager, _ = expected.get((user_id, project_id), (False, False))
+        expected[(user_id, project_id)] = (is_manager, True)
+
+    return expected
+
+
+def check_project_visibility(repair=False, batch_size=1000):
+    """
+    Сверка таблицы видимости с менеджерами и участниками проектов
+    (пачками по batch_size проектов). Если repair - расхождения исправляются.
+    Возвращает число недостающих, лишних и неверных строк.
+    """
+    result = {'missing': 0, 'stale': 0, 'mismatched': 0}
+
+    # Строки проектов, которых уже нет, удаляются каскадно - проверяем только существующие
+    project_ids = list(Project.objects.order_by('id').values_list('id', flat=True))
+
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        expected = _expected_visibility(batch)
+        actual = {
+            (row.user_id, row.project_id): row
+            for row in ProjectVisibility.objects.filter(project_id__in=batch)
+        }
+
+        missing = [
+            ProjectVisibility(user_id=user_id, project_id=project_id, is_manager=is_manager, is_member=is_member)
+            for (user_id, project_id), (is_manager, is_member) in expected.items()
+            if (user_id, project_id) not in actual
+        ]
+        stale = [row.pk for key, row in actual.items() if key not in expected]
+        mismatched = []
+        for key, row in actual.items():
+            if key in expected and (row.is_manager, row.is_member) != expected[key]:
+                row.is_manager, row.is_member = expected[key]
+                mismatched.append(row)
+
+        result['missing'] += len(missing)
+        result['stale'] += len(stale)
+        result['mismatched'] += len(mismatched)
+
+        if repair:
+            ProjectVisibility.objects.bulk_create(missing, ignore_conflicts=True)
+            ProjectVisibility.objects.filter(pk__in=stale).delete()
+            ProjectVisibility.objects.bulk_update(mismatched, ['is_manager', 'is_member'])
+
+    if repair and any(result.values()):
+        invalidate_permission_cache()
+        invalidate_dashboard_stats()
+
+    return result
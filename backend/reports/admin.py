@@ -1,19 +1,29 @@
 # reports/admin.py
 from django.contrib import admin
-from .models import ReportTemplate, GeneratedReport
+from .models import ReportTemplate, GeneratedReport, ReportScheduleRun
 
 @admin.register(ReportTemplate)
 class ReportTemplateAdmin(admin.ModelAdmin):
-    list_display = ('name', 'template_type', 'is_active', 'created_at')
-    list_filter = ('template_type', 'is_active')
+    list_display = ('name', 'template_type', 'frequency', 'is_active', 'next_run_at', 'created_at')
+    list_filter = ('template_type', 'frequency', 'is_active')
     search_fields = ('name', 'description')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'last_run_at')
 
 @admin.register(GeneratedReport)
 class GeneratedReportAdmin(admin.ModelAdmin):
-    list_display = ('name', 'report_type', 'generated_by', 'is_success', 'generated_at', 'file')
-    list_filter = ('report_type', 'is_success', 'export_format', 'generated_at')
+    list_display = ('name', 'report_type', 'generated_by', 'status', 'is_success', 'generated_at', 'file')
+    list_filter = ('report_type', 'status', 'is_success', 'export_format', 'generated_at')
     search_fields = ('name', 'generated_by__username')
-    readonly_fields = ('generated_at', 'generation_time', 'error_message', 'file_size')
-    raw_id_fields = ('generated_by',)
-    list_editable = ('is_success',)
\ No newline at end of file
+    readonly_fields = ('generated_at', 'generation_time', 'error_message', 'file_size',
+                       'started_at', 'finished_at', 'cache_key')
+    raw_id_fields = ('generated_by', 'template')
+    list_editable = ('is_success',)
+
+@admin.register(ReportScheduleRun)
+class ReportScheduleRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'finished_at', 'templates_due', 'reports_enqueued',
+                    'reports_from_cache', 'max_lag_seconds', 'is_success')
+    list_filter = ('is_success',)
+    readonly_fields = ('started_at', 'finished_at', 'templates_due', 'reports_enqueued',
+                       'reports_from_cache', 'max_lag_seconds', 'avg_lag_seconds',
+                       'is_success', 'error_message')
\ No newline at end of file
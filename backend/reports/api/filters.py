@@ -4,6 +4,7 @@ from ..models import GeneratedReport
 class GeneratedReportFilter(filters.FilterSet):
     """Фильтры для отчетов"""
     report_type = filters.ChoiceFilter(choices=GeneratedReport.REPORT_TYPES)
+    status = filters.ChoiceFilter(choices=GeneratedReport.STATUS_CHOICES)
     start_date = filters.DateFilter(field_name='start_date', lookup_expr='gte')
     end_date = filters.DateFilter(field_name='end_date', lookup_expr='lte')
     generated_after = filters.DateFilter(field_name='generated_at', lookup_expr='gte')
@@ -14,6 +15,7 @@ class GeneratedReportFilter(filters.FilterSet):
         model = GeneratedReport
         fields = [
             'report_type', 
+            'status',
             'is_success', 
             'is_archived',
             'start_date',
@@ -1,16 +1,18 @@
 from rest_framework import permissions
+from projects.permission_cache import cached_object_permission
 
 class CanViewReport(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated
     
+    @cached_object_permission
     def has_object_permission(self, request, view, obj):
         user = request.user
         
         if user.role == 'director':
             return True
         else:
-            return obj.generated_by == user
+            return obj.generated_by_id == user.id
 
 class CanGenerateReport(permissions.BasePermission):
     def has_permission(self, request, view):
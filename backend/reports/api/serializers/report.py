@@ -19,16 +19,24 @@ class ReportTemplateSerializer(serializers.ModelSerializer):
             'include_columns', 'default_parameters',
             'show_totals', 'show_header', 'show_footer',
             'is_active', 'is_default', 'created_at', 'updated_at',
-            'available_columns'
+            'last_run_at', 'next_run_at', 'available_columns'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'available_columns']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'last_run_at', 'next_run_at',
+                            'available_columns']
     
     def get_available_columns(self, obj):
         return obj.get_available_columns()
+    
+    def update(self, instance, validated_data):
+        # При смене частоты расписание пересчитывается планировщиком заново
+        if 'frequency' in validated_data and validated_data['frequency'] != instance.frequency:
+            instance.next_run_at = None
+        return super().update(instance, validated_data)
 
 class GeneratedReportSerializer(serializers.ModelSerializer):
     report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
     export_format_display = serializers.CharField(source='get_export_format_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
     generated_by_name = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
     file_size_formatted = serializers.SerializerMethodField()
@@ -44,13 +52,14 @@ class GeneratedReportSerializer(serializers.ModelSerializer):
             'export_format', 'export_format_display',
             'file', 'file_url', 'file_size', 'file_size_formatted',
             'generated_by', 'generated_by_name', 'generated_at',
-            'generation_time', 'is_success', 'error_message',
-            'projects_count', 'duration_days', 'can_download',
+            'generation_time', 'status', 'status_display', 'started_at', 'finished_at',
+            'is_success', 'error_message', 'projects_count', 'duration_days', 'can_download',
             'is_active', 'is_archived'
         ]
         read_only_fields = [
             'id', 'generated_at', 'generation_time', 'is_success',
-            'error_message', 'file_size', 'file', 'generated_by'
+            'error_message', 'file_size', 'file', 'generated_by',
+            'status', 'started_at', 'finished_at'
         ]
     
     def get_generated_by_name(self, obj):
@@ -74,7 +83,7 @@ class GeneratedReportSerializer(serializers.ModelSerializer):
     
     def get_can_download(self, obj):
         request = self.context.get('request')
-        if request and obj.file:
+        if request and obj.is_ready:
             return obj.can_view(request.user)
         return False
     
@@ -126,6 +135,10 @@ class ReportGenerationSerializer(serializers.Serializer):
         queryset=User.objects.filter(is_active=True),
         required=False
     )
+    export_format = serializers.ChoiceField(
+        choices=GeneratedReport.EXPORT_FORMATS,
+        default='pdf'
+    )
     
     def validate(self, data):
         # Автоматическое название отчета, если не указано
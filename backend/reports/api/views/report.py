@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Count, Sum, Avg
 from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from django.http import FileResponse, HttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -12,19 +13,15 @@ import io
 import csv
 import os
 
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
 from reportlab.lib.units import cm, mm
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 
 import openpyxl
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
 
 from ...models import GeneratedReport, ReportTemplate
 from ..serializers import (
@@ -33,6 +30,12 @@ from ..serializers import (
 )
 from ..permissions import CanGenerateReport, CanViewReport
 from ..filters import GeneratedReportFilter
+from ...pdf_stream import StreamingStory, chunked
+from ...pdf_styles import get_pdf_styles
+from ...cache import build_cache_key, reuse_cached_file, get_cache_settings
+from ...queue import (
+    enqueue_report, requeue_report, ReportQueueLimitExceeded, ACTIVE_STATUSES
+)
 
 
 class ReportTemplateViewSet(viewsets.ModelViewSet):
@@ -80,161 +83,153 @@ class ReportGenerationView(generics.CreateAPIView):
     serializer_class = ReportGenerationSerializer
     permission_classes = [IsAuthenticated, CanGenerateReport]
     
-    def _register_fonts(self):
-        """Регистрация шрифтов с поддержкой кириллицы"""
-        try:
-            # Пути к шрифтам DejaVu (с поддержкой кириллицы)
-            font_paths = [
-                # Linux системные пути
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                '/usr/share/fonts/dejavu/DejaVuSans.ttf',
-                '/usr/local/share/fonts/dejavu/DejaVuSans.ttf',
-                
-                # Windows системные пути
-                'C:\\Windows\\Fonts\\arial.ttf',
-                'C:\\Windows\\Fonts\\arialbd.ttf',
-                
-                # macOS системные пути
-                '/Library/Fonts/Arial.ttf',
-                '/Library/Fonts/Arial Bold.ttf',
-                
-                # Попробуем найти в текущей директории
-                os.path.join(os.path.dirname(__file__), 'fonts', 'DejaVuSans.ttf'),
-                os.path.join(os.path.dirname(__file__), 'fonts', 'Arial.ttf'),
-            ]
-            
-            # Регистрируем Arial (обычно есть в Windows)
-            try:
-                pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
-                pdfmetrics.registerFont(TTFont('Arial-Bold', 'arialbd.ttf'))
-                print("Шрифты Arial зарегистрированы")
-                return 'Arial', 'Arial-Bold'
-            except:
-                pass
-            
-            # Ищем и регистрируем DejaVu
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    try:
-                        # Регистрируем обычный шрифт
-                        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                        
-                        # Пытаемся найти и зарегистрировать жирный шрифт
-                        bold_path = font_path.replace('Sans.ttf', 'Sans-Bold.ttf')
-                        if os.path.exists(bold_path):
-                            pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', bold_path))
-                        
-                        print(f"Шрифты DejaVu зарегистрированы из {font_path}")
-                        return 'DejaVuSans', 'DejaVuSans-Bold'
-                    except Exception as e:
-                        print(f"Ошибка регистрации шрифта {font_path}: {e}")
-                        continue
-            
-            # Если не нашли шрифты, выводим предупреждение
-            print("ВНИМАНИЕ: Шрифты с поддержкой кириллицы не найдены!")
-            print("Текст в PDF будет отображаться некорректно.")
-            print("Установите шрифты DejaVu или Arial в систему.")
-            
-            return 'Helvetica', 'Helvetica-Bold'
-            
-        except Exception as e:
-            print(f"Ошибка при регистрации шрифтов: {e}")
-            return 'Helvetica', 'Helvetica-Bold'
+    # PDF-отчеты по задачам могут содержать десятки тысяч строк,
+    # поэтому формируются потоково прямо во временный файл
+    STREAMING_REPORT_TYPES = ('tasks', 'tasks_period')
+    # Размер порции строк, читаемых из БД за один раз
+    ITERATOR_CHUNK_SIZE = 2000
+    # Строк в одной таблице PDF (примерно одна страница A4)
+    PDF_TABLE_ROWS = 40
+    
+    CONTENT_TYPES = {
+        'pdf': 'application/pdf',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'csv': 'text/csv',
+    }
     
     def post(self, request, *args, **kwargs):
+        """
+        Постановка отчета в очередь генерации.
+        Сразу возвращает запись в статусе 'pending'; готовность отчета
+        клиент отслеживает по полю status (GET /reports/generated/<id>/).
+        """
         serializer = self.get_serializer(data=request.data, context={'request': request})
         
         if serializer.is_valid():
-            report_data = serializer.validated_data
+            report_data = dict(serializer.validated_data)
+            report_data.setdefault('name', f"Отчет от {datetime.now().strftime('%d.%m.%Y')}")
             
             try:
-                # Создаем запись отчета
-                report = GeneratedReport.objects.create(
-                    name=report_data.get('name', f"Отчет от {datetime.now().strftime('%d.%m.%Y')}"),
-                    report_type=report_data['report_type'],
-                    start_date=report_data['start_date'],
-                    end_date=report_data['end_date'],
-                    export_format='pdf',  # Согласно ТЗ - только PDF
-                    generated_by=request.user
+                report = enqueue_report(request.user, report_data)
+            except ReportQueueLimitExceeded as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
                 )
-                
-                # Добавляем проекты если указаны
-                if 'projects' in report_data and report_data['projects']:
-                    report.projects.set(report_data['projects'])
-                
-                # Добавляем сотрудников если указаны
-                if 'employees' in report_data and report_data['employees']:
-                    report.employees.set(report_data['employees'])
-                
-                # Генерируем отчет
-                success = self._generate_report_file(report)
-                
-                if success:
-                    return Response(
-                        GeneratedReportSerializer(report, context={'request': request}).data,
-                        status=status.HTTP_201_CREATED
-                    )
-                else:
-                    # Если генерация не удалась, удаляем запись
-                    report.delete()
-                    return Response(
-                        {'error': 'Не удалось сгенерировать отчет'},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-                    
             except Exception as e:
                 return Response(
                     {'error': f'Ошибка при создании отчета: {str(e)}'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
+            
+            return Response(
+                GeneratedReportSerializer(report, context={'request': request}).data,
+                status=status.HTTP_202_ACCEPTED
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def _generate_report_file(self, report):
-        """Генерация файла отчета в формате PDF"""
+        """Генерация файла отчета в выбранном формате (PDF, XLSX, CSV)"""
         try:
             start_time = timezone.now()
             
-            # Сбор данных для отчета согласно ТЗ
-            data = self._collect_report_data(report)
-            
-            # Генерация PDF
-            pdf_content = self._generate_pdf_report(report, data)
-            
-            if pdf_content:
-                # Сохранение файла
-                file_name = report.get_file_name()
-                report.file.save(file_name, ContentFile(pdf_content))
-                report.file_size = len(pdf_content)
+            # Такой же отчет по неизменившимся данным уже сформирован - берем его файл
+            if get_cache_settings()['ENABLED']:
+                # Ключ мог быть посчитан заранее при постановке в очередь (планировщик)
+                cache_key = report.cache_key or build_cache_key(report)
+                if reuse_cached_file(report, cache_key):
+                    report.generation_time = (timezone.now() - start_time).total_seconds()
+                    report.is_success = True
+                    report.status = 'completed'
+                    report.finished_at = timezone.now()
+                    report.save()
+                    
+                    return True
+                
+                report.cache_key = cache_key
+            
+            if report.export_format == 'xlsx':
+                self._save_to_temporary_file(report, self._generate_xlsx_report)
+            elif report.export_format == 'csv':
+                self._save_to_temporary_file(report, self._generate_csv_report)
+            elif report.report_type in self.STREAMING_REPORT_TYPES:
+                self._save_to_temporary_file(report, self._generate_pdf_report_streaming)
+            else:
+                # Сбор данных для отчета согласно ТЗ
+                data = self._collect_report_data(report)
+                
+                # Генерация PDF
+                pdf_content = self._generate_pdf_report(report, data)
                 
-                # Расчет времени генерации
-                report.generation_time = (timezone.now() - start_time).total_seconds()
-                report.is_success = True
-                report.save()
+                if not pdf_content:
+                    report.is_success = False
+                    report.status = 'failed'
+                    report.error_message = report.error_message or 'Не удалось сформировать PDF'
+                    report.finished_at = timezone.now()
+                    report.save()
+                    return False
                 
-                return True
+                # Сохранение файла
+                report.file.save(report.get_file_name(), ContentFile(pdf_content), save=False)
+                report.file_size = len(pdf_content)
             
-            return False
+            # Расчет времени генерации
+            report.generation_time = (timezone.now() - start_time).total_seconds()
+            report.is_success = True
+            report.status = 'completed'
+            report.finished_at = timezone.now()
+            report.save()
+            
+            return True
             
         except Exception as e:
             report.is_success = False
+            report.status = 'failed'
             report.error_message = str(e)
+            report.finished_at = timezone.now()
             report.save()
             print(f"Ошибка генерации отчета: {e}")
             import traceback
             traceback.print_exc()
             return False
     
+    def _get_report_header(self, report):
+        """Шапка отчета: организация, название, период и автор"""
+        return {
+            'organization': 'ООО «АртСтудия»',
+            'report_name': report.name,
+            'period': f"{report.start_date.strftime('%d.%m.%Y')} - {report.end_date.strftime('%d.%m.%Y')}",
+            'generated_at': report.generated_at.strftime('%d.%m.%Y %H:%M'),
+            'generated_by': (
+                report.generated_by.get_full_name() if report.generated_by
+                else 'Автоматически по расписанию' if report.template_id
+                else 'Неизвестно'
+            ),
+        }
+    
+    def _save_to_temporary_file(self, report, write_report):
+        """
+        Потоковая запись отчета во временный файл с последующим
+        перемещением в хранилище FileField (без копии в памяти).
+        write_report(report, output) пишет содержимое файла в output.
+        """
+        file_name = report.get_file_name()
+        tmp_file = TemporaryUploadedFile(file_name, self.CONTENT_TYPES[report.export_format], 0, None)
+        try:
+            write_report(report, tmp_file.file)
+            tmp_file.file.flush()
+            
+            tmp_file.size = os.path.getsize(tmp_file.temporary_file_path())
+            report.file.save(file_name, tmp_file, save=False)
+            report.file_size = tmp_file.size
+        finally:
+            tmp_file.close()
+    
     def _collect_report_data(self, report):
         """Сбор данных для отчета согласно ТЗ"""
         data = {
-            'header': {
-                'organization': 'ООО «АртСтудия»',
-                'report_name': report.name,
-                'period': f"{report.start_date.strftime('%d.%m.%Y')} - {report.end_date.strftime('%d.%m.%Y')}",
-                'generated_at': report.generated_at.strftime('%d.%m.%Y %H:%M'),
-                'generated_by': report.generated_by.get_full_name() if report.generated_by else 'Неизвестно',
-            },
+            'header': self._get_report_header(report),
             'data': [],
             'summary': {},
             'has_data': False
@@ -258,8 +253,70 @@ class ReportGenerationView(generics.CreateAPIView):
             
         return data
     
+    def _get_row_iterator(self, report_type):
+        """
+        Источник строк табличной части для типа отчета.
+        Итератор вызывается как rows(report, totals) и накапливает итоги в totals.
+        """
+        return {
+            'projects': self._iter_projects_rows,
+            'tasks': self._iter_tasks_rows,
+            'employees': self._iter_employees_rows,
+            'tasks_period': self._iter_tasks_period_rows,
+            'summary': self._iter_summary_rows,
+        }[report_type]
+    
+    def _collect_rows(self, report, data):
+        """Заполнение data строками и итогами отчета"""
+        totals = {}
+        data['data'] = list(self._get_row_iterator(report.report_type)(report, totals))
+        data['summary'] = self._get_report_summary(report, totals)
+        data['has_data'] = bool(data['data'])
+        return data
+    
+    def _get_report_summary(self, report, totals):
+        """Итоги отчета по накопленным при обходе строк значениям"""
+        if report.report_type == 'summary':
+            return {
+                'text': f"Статистика за период {report.start_date.strftime('%d.%m.%Y')} - {report.end_date.strftime('%d.%m.%Y')}"
+            }
+        
+        if report.report_type == 'projects' and totals.get('total_projects'):
+            # Итоги (согласно ТЗ п.5.1)
+            avg_completion = round(totals['total_completion'] / totals['total_projects'], 1)
+            return {
+                'total_projects': totals['total_projects'],
+                'avg_completion': f"{avg_completion}%",
+                'text': f"Всего проектов: {totals['total_projects']}, Средний процент выполнения: {avg_completion}%"
+            }
+        
+        if report.report_type == 'employees' and totals.get('total_employees'):
+            return {
+                'total_employees': totals['total_employees'],
+                'text': f"Всего сотрудников: {totals['total_employees']}"
+            }
+        
+        if report.report_type == 'tasks_period' and totals.get('total_tasks'):
+            return {
+                'total_tasks': totals['total_tasks'],
+                'delayed_tasks': totals['delayed_tasks'],
+                'text': f"Всего задач: {totals['total_tasks']}, С задержкой: {totals['delayed_tasks']}"
+            }
+        
+        if report.report_type == 'tasks' and totals.get('total_tasks'):
+            return {
+                'total_tasks': totals['total_tasks'],
+                'text': f"Всего задач: {totals['total_tasks']}"
+            }
+        
+        return {'text': 'Нет данных за выбранный период'}
+    
     def _collect_projects_data(self, report, data):
         """Сбор данных для отчета по проектам (согласно ТЗ п.5.1)"""
+        return self._collect_rows(report, data)
+    
+    def _iter_projects_rows(self, report, totals):
+        """Строки отчета по проектам (согласно ТЗ п.5.1)"""
         from projects.models import Project
         
         # Фильтруем проекты
@@ -273,24 +330,31 @@ class ReportGenerationView(generics.CreateAPIView):
         
         # По выбранным проектам
         if report.projects.exists():
-            projects_qs = projects_qs.filter(id__in=report.projects.values_list('id', flat=True))
+            projects_qs = projects_qs.filter(id__in=report.projects.values('id'))
+        
+        # Счетчики задач считаются одним запросом вместе с проектами,
+        # клиент и менеджер подтягиваются через JOIN
+        projects_qs = projects_qs.select_related('client', 'manager').annotate(
+            tasks_total=Count('task', filter=Q(task__is_active=True)),
+            tasks_completed=Count('task', filter=Q(task__is_active=True, task__status='completed')),
+        )
         
-        data['data'] = []
-        total_projects = 0
-        total_completion = 0
+        totals['total_projects'] = 0
+        totals['total_completion'] = 0
         
-        for i, project in enumerate(projects_qs, 1):
-            # Получаем задачи проекта
-            tasks = project.task_set.filter(is_active=True)
-            completed_tasks = tasks.filter(status='completed').count()
-            total_tasks = tasks.count()
+        for i, project in enumerate(projects_qs.iterator(chunk_size=self.ITERATOR_CHUNK_SIZE), 1):
+            completed_tasks = project.tasks_completed
+            total_tasks = project.tasks_total
             
             # Процент выполнения
             completion_percentage = 0
             if total_tasks > 0:
                 completion_percentage = round((completed_tasks / total_tasks) * 100, 1)
             
-            project_data = [
+            totals['total_projects'] += 1
+            totals['total_completion'] += completion_percentage
+            
+            yield [
                 str(i),  # №
                 project.title,  # Наименование проекта
                 project.client.name if project.client else 'Не указан',  # Клиент
@@ -302,35 +366,14 @@ class ReportGenerationView(generics.CreateAPIView):
                 str(completed_tasks),  # Количество выполненных задач
                 f"{completion_percentage}%"  # Процент выполнения проекта
             ]
-            
-            data['data'].append(project_data)
-            total_projects += 1
-            total_completion += completion_percentage
-        
-        # Итоги (согласно ТЗ п.5.1)
-        if total_projects > 0:
-            avg_completion = round(total_completion / total_projects, 1)
-            data['summary'] = {
-                'total_projects': total_projects,
-                'avg_completion': f"{avg_completion}%",
-                'text': f"Всего проектов: {total_projects}, Средний процент выполнения: {avg_completion}%"
-            }
-            data['has_data'] = True
-        else:
-            data['summary'] = {'text': 'Нет данных за выбранный период'}
-            data['has_data'] = False
-            
-        return data
     
-    def _collect_tasks_data(self, report, data):
-        """Сбор данных для отчета по задачам (согласно ТЗ п.5.2)"""
+    def _get_tasks_queryset(self, report):
+        """Задачи, попадающие в отчет по задачам"""
         from projects.models import Task
         
-        # Фильтруем задачи
-        tasks_qs = Task.objects.filter(is_active=True)
-        
-        # По датам создания
-        tasks_qs = tasks_qs.filter(
+        # Фильтруем задачи по датам создания
+        tasks_qs = Task.objects.filter(
+            is_active=True,
             created_at__date__range=(report.start_date, report.end_date)
         )
         
@@ -338,10 +381,25 @@ class ReportGenerationView(generics.CreateAPIView):
         if report.projects.exists():
             tasks_qs = tasks_qs.filter(project__in=report.projects.all())
         
-        data['data'] = []
-        
-        for i, task in enumerate(tasks_qs, 1):
-            task_data = [
+        # Проект и исполнитель подтягиваются через JOIN
+        return tasks_qs.select_related('project', 'assigned_to')
+    
+    def _collect_tasks_data(self, report, data):
+        """Сбор данных для отчета по задачам (согласно ТЗ п.5.2)"""
+        return self._collect_rows(report, data)
+    
+    def _iter_tasks_rows(self, report, totals):
+        """
+        Строки отчета по задачам (согласно ТЗ п.5.2).
+        Задачи читаются порциями через iterator(), итоги накапливаются в totals.
+        """
+        tasks_qs = self._get_tasks_queryset(report)
+        totals['total_tasks'] = 0
+        
+        for i, task in enumerate(tasks_qs.iterator(chunk_size=self.ITERATOR_CHUNK_SIZE), 1):
+            totals['total_tasks'] += 1
+            
+            yield [
                 str(i),  # №
                 task.title,  # Наименование задачи
                 task.project.title if task.project else 'Без проекта',  # Проект
@@ -350,25 +408,15 @@ class ReportGenerationView(generics.CreateAPIView):
                 task.get_status_display(),  # Статус задачи
                 task.completed_at.strftime('%d.%m.%Y') if task.completed_at else 'Не выполнена'  # Фактическая дата выполнения
             ]
-            
-            data['data'].append(task_data)
-        
-        # Итоги
-        if tasks_qs.exists():
-            data['summary'] = {
-                'total_tasks': tasks_qs.count(),
-                'text': f"Всего задач: {tasks_qs.count()}"
-            }
-            data['has_data'] = True
-        else:
-            data['summary'] = {'text': 'Нет данных за выбранный период'}
-            data['has_data'] = False
-            
-        return data
     
     def _collect_employees_data(self, report, data):
         """Сбор данных для отчета по загрузке сотрудников (согласно ТЗ п.5.3)"""
+        return self._collect_rows(report, data)
+    
+    def _iter_employees_rows(self, report, totals):
+        """Строки отчета по загрузке сотрудников (согласно ТЗ п.5.3)"""
         from projects.models import Task
+        from core.models import Employee
         from django.contrib.auth import get_user_model
         
         User = get_user_model()
@@ -378,79 +426,75 @@ class ReportGenerationView(generics.CreateAPIView):
         
         # По выбранным сотрудникам
         if report.employees.exists():
-            employees_qs = employees_qs.filter(id__in=report.employees.values_list('id', flat=True))
-        
-        data['data'] = []
-        total_employees = 0
+            employees_qs = employees_qs.filter(id__in=report.employees.values('id'))
         
-        for i, employee in enumerate(employees_qs, 1):
-            # Активные задачи
-            active_tasks = Task.objects.filter(
-                assigned_to=employee,
+        # Счетчики задач по всем сотрудникам одним сгруппированным запросом
+        task_stats = {
+            row['assigned_to']: row
+            for row in Task.objects.filter(
                 is_active=True,
-                status__in=['in_progress', 'review']
-            ).count()
-            
-            # Выполненные задачи за период
-            completed_tasks = Task.objects.filter(
-                assigned_to=employee,
-                is_active=True,
-                status='completed',
-                completed_at__date__range=(report.start_date, report.end_date)
-            ).count()
+                assigned_to__in=employees_qs.values('id')
+            ).values('assigned_to').annotate(
+                # Активные задачи
+                active_tasks=Count('id', filter=Q(status__in=['in_work', 'on_review'])),
+                # Выполненные задачи за период
+                completed_tasks=Count('id', filter=Q(
+                    status='completed',
+                    completed_at__date__range=(report.start_date, report.end_date)
+                )),
+            )
+        }
+        
+        # Должности берутся из профилей сотрудников
+        positions = dict(
+            Employee.objects.filter(user__in=employees_qs.values('id'))
+            .values_list('user_id', 'position')
+        )
+        
+        totals['total_employees'] = 0
+        
+        for i, employee in enumerate(employees_qs.iterator(chunk_size=self.ITERATOR_CHUNK_SIZE), 1):
+            stats = task_stats.get(employee.id, {})
+            active_tasks = stats.get('active_tasks', 0)
+            completed_tasks = stats.get('completed_tasks', 0)
             
             # Процент выполнения (если есть активные задачи)
             completion_percentage = 0
             if active_tasks > 0:
                 completion_percentage = round((completed_tasks / max(active_tasks, 1)) * 100, 1)
             
-            employee_data = [
+            totals['total_employees'] += 1
+            
+            yield [
                 str(i),  # №
                 employee.get_full_name(),  # Фамилия и имя сотрудника
-                employee.position or 'Не указана',  # Должность
+                positions.get(employee.id) or 'Не указана',  # Должность
                 str(active_tasks),  # Количество активных задач
                 str(completed_tasks),  # Количество выполненных задач за период
                 f"{completion_percentage}%"  # Процент выполнения задач
             ]
-            
-            data['data'].append(employee_data)
-            total_employees += 1
-        
-        # Итоги
-        if total_employees > 0:
-            data['summary'] = {
-                'total_employees': total_employees,
-                'text': f"Всего сотрудников: {total_employees}"
-            }
-            data['has_data'] = True
-        else:
-            data['summary'] = {'text': 'Нет данных за выбранный период'}
-            data['has_data'] = False
-            
-        return data
     
     def _collect_tasks_period_data(self, report, data):
         """Сбор данных для отчета по выполнению задач за период"""
-        from projects.models import Task
-        
-        tasks_qs = Task.objects.filter(
-            is_active=True,
-            created_at__date__range=(report.start_date, report.end_date)
-        )
-        
-        if report.projects.exists():
-            tasks_qs = tasks_qs.filter(project__in=report.projects.all())
-        
-        data['data'] = []
+        return self._collect_rows(report, data)
+    
+    def _iter_tasks_period_rows(self, report, totals):
+        """Строки отчета по выполнению задач за период"""
+        tasks_qs = self._get_tasks_queryset(report)
+        totals['total_tasks'] = 0
+        totals['delayed_tasks'] = 0
         
-        for i, task in enumerate(tasks_qs, 1):
+        for i, task in enumerate(tasks_qs.iterator(chunk_size=self.ITERATOR_CHUNK_SIZE), 1):
+            totals['total_tasks'] += 1
+            
             # Расчет задержки
             delay_days = 0
             if task.deadline and task.completed_at:
                 if task.completed_at.date() > task.deadline:
                     delay_days = (task.completed_at.date() - task.deadline).days
+                    totals['delayed_tasks'] += 1
             
-            task_data = [
+            yield [
                 str(i),  # №
                 task.title,  # Задача
                 task.project.title if task.project else 'Без проекта',  # Проект
@@ -460,26 +504,13 @@ class ReportGenerationView(generics.CreateAPIView):
                 task.completed_at.strftime('%d.%m.%Y') if task.completed_at else 'Не выполнена',  # Фактический срок
                 str(delay_days) if delay_days > 0 else '0'  # Задержка (дней)
             ]
-            
-            data['data'].append(task_data)
-        
-        # Итоги
-        if tasks_qs.exists():
-            delayed_tasks = sum(1 for task in tasks_qs if task.deadline and task.completed_at and task.completed_at.date() > task.deadline)
-            data['summary'] = {
-                'total_tasks': tasks_qs.count(),
-                'delayed_tasks': delayed_tasks,
-                'text': f"Всего задач: {tasks_qs.count()}, С задержкой: {delayed_tasks}"
-            }
-            data['has_data'] = True
-        else:
-            data['summary'] = {'text': 'Нет данных за выбранный период'}
-            data['has_data'] = False
-            
-        return data
     
     def _collect_summary_data(self, report, data):
         """Сбор данных для сводного отчета"""
+        return self._collect_rows(report, data)
+    
+    def _iter_summary_rows(self, report, totals):
+        """Строки сводного отчета"""
         from projects.models import Project, Task
         from django.contrib.auth import get_user_model
         
@@ -507,7 +538,7 @@ class ReportGenerationView(generics.CreateAPIView):
             status='completed'
         ).count()
         
-        data['data'] = [
+        yield from [
             ['Количество проектов всего', str(total_projects), '', ''],
             ['Активных проектов', str(active_projects), '', ''],
             ['Завершенных проектов', str(completed_projects), '', ''],
@@ -517,130 +548,59 @@ class ReportGenerationView(generics.CreateAPIView):
             ['Задач создано за период', str(period_tasks), '', ''],
             ['Задач выполнено за период', str(period_completed), '', ''],
         ]
+    
+    def _create_pdf_document(self, output):
+        """Документ PDF с полями согласно ТЗ"""
+        return SimpleDocTemplate(
+            output,
+            pagesize=A4,
+            rightMargin=20,
+            leftMargin=20,
+            topMargin=40,
+            bottomMargin=40
+        )
+    
+    def _build_pdf_header(self, header, pdf_styles):
+        """Заголовок и метаданные отчета (согласно ТЗ п.4, 7)"""
+        story = [
+            Paragraph(header['organization'], pdf_styles['title']),
+            Paragraph(header['report_name'], pdf_styles['subtitle']),
+            Spacer(1, 10),
+        ]
         
-        data['summary'] = {
-            'text': f"Статистика за период {report.start_date.strftime('%d.%m.%Y')} - {report.end_date.strftime('%d.%m.%Y')}"
-        }
-        data['has_data'] = True
+        meta_data = [
+            f"<b>Период:</b> {header['period']}",
+            f"<b>Дата формирования:</b> {header['generated_at']}",
+            f"<b>Пользователь:</b> {header['generated_by']}"
+        ]
         
-        return data
+        for meta in meta_data:
+            story.append(Paragraph(meta, pdf_styles['meta']))
+        
+        story.append(Spacer(1, 20))
+        return story
+    
+    def _build_pdf_footer(self, pdf_styles):
+        """Подвал отчета (согласно ТЗ п.7)"""
+        return [
+            Spacer(1, 30),
+            Paragraph(f"Отчет сформирован программой управления проектами ООО «АртСтудия»", pdf_styles['footer']),
+        ]
     
     def _generate_pdf_report(self, report, data):
         """Генерация PDF отчета согласно ТЗ"""
         try:
             buffer = io.BytesIO()
             
-            # Регистрируем шрифты с поддержкой кириллицы
-            normal_font, bold_font = self._register_fonts()
+            # Шрифты с поддержкой кириллицы и стили общие для всех отчетов процесса
+            registry = get_pdf_styles()
+            pdf_styles = registry.paragraph_styles
             
             # Создаем документ
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=A4,
-                rightMargin=20,
-                leftMargin=20,
-                topMargin=40,
-                bottomMargin=40
-            )
-            
-            story = []
-            styles = getSampleStyleSheet()
+            doc = self._create_pdf_document(buffer)
             
-            # ========== СОЗДАЕМ СТИЛИ С РУССКИМИ ШРИФТАМИ ==========
-            
-            # Стиль для заголовка
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Title'],
-                fontName=bold_font,
-                fontSize=16,
-                alignment=TA_CENTER,
-                spaceAfter=20
-            )
-            
-            # Стиль для подзаголовка
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Normal'],
-                fontName=bold_font,
-                fontSize=12,
-                alignment=TA_CENTER,
-                textColor=colors.gray,
-                spaceAfter=20
-            )
-            
-            # Стиль для метаданных
-            meta_style = ParagraphStyle(
-                'Meta',
-                parent=styles['Normal'],
-                fontName=normal_font,
-                fontSize=10,
-                textColor=colors.gray,
-                spaceAfter=5
-            )
-            
-            # Стиль для основного текста
-            normal_style = ParagraphStyle(
-                'NormalText',
-                parent=styles['Normal'],
-                fontName=normal_font,
-                fontSize=10,
-                spaceAfter=10
-            )
-            
-            # Стиль для итогов
-            summary_style = ParagraphStyle(
-                'Summary',
-                parent=styles['Normal'],
-                fontName=bold_font,
-                fontSize=11,
-                alignment=TA_LEFT,
-                spaceBefore=15,
-                spaceAfter=15,
-                textColor=colors.HexColor('#2c3e50')
-            )
-            
-            # Стиль для сообщения об отсутствии данных
-            no_data_style = ParagraphStyle(
-                'NoData',
-                parent=styles['Normal'],
-                fontName=normal_font,
-                fontSize=12,
-                alignment=TA_CENTER,
-                textColor=colors.gray,
-                spaceBefore=50,
-                spaceAfter=50
-            )
-            
-            # Стиль для подвала
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontName=normal_font,
-                fontSize=8,
-                alignment=TA_CENTER,
-                textColor=colors.gray,
-                spaceBefore=20
-            )
-            
-            # ========== ГЕНЕРАЦИЯ СОДЕРЖАНИЯ ОТЧЕТА ==========
-            
-            # 1. ЗАГОЛОВОК ОТЧЕТА (согласно ТЗ п.4, 7)
-            story.append(Paragraph(data['header']['organization'], title_style))
-            story.append(Paragraph(data['header']['report_name'], subtitle_style))
-            story.append(Spacer(1, 10))
-            
-            # 2. МЕТАДАННЫЕ (согласно ТЗ п.4)
-            meta_data = [
-                f"<b>Период:</b> {data['header']['period']}",
-                f"<b>Дата формирования:</b> {data['header']['generated_at']}",
-                f"<b>Пользователь:</b> {data['header']['generated_by']}"
-            ]
-            
-            for meta in meta_data:
-                story.append(Paragraph(meta, meta_style))
-            
-            story.append(Spacer(1, 20))
+            # 1-2. ЗАГОЛОВОК И МЕТАДАННЫЕ
+            story = self._build_pdf_header(data['header'], pdf_styles)
             
             # 3. ТАБЛИЧНАЯ ЧАСТЬ 
             if data.get('has_data') and data['data']:
@@ -655,50 +615,19 @@ class ReportGenerationView(generics.CreateAPIView):
                 
                 # Создаем таблицу с заданными ширинами
                 table = Table(table_data, colWidths=col_widths, repeatRows=1)
-                
-                # Стили для таблицы
-                table_style = TableStyle([
-                    # Заголовок
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), bold_font),
-                    ('FONTSIZE', (0, 0), (-1, 0), 7),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                    ('TOPPADDING', (0, 0), (-1, 0), 8),
-                    
-                    # Данные
-                    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 1), (-1, -1), normal_font),
-                    ('FONTSIZE', (0, 1), (-1, -1), 5),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                    ('TOPPADDING', (0, 1), (-1, -1), 6),
-                    
-                    # Чередование строк
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-                    
-                    # Первая колонка (№) выровнять по центру
-                    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-                    
-                    # Последняя колонка (проценты/задержка) выровнять по центру
-                    ('ALIGN', (-1, 1), (-1, -1), 'CENTER'),
-                ])
-                
-                table.setStyle(table_style)
+                table.setStyle(registry.table_style)
                 story.append(table)
                 story.append(Spacer(1, 15))
                 
                 # 4. ИТОГИ (согласно ТЗ п.5.1)
                 if 'summary' in data and 'text' in data['summary']:
-                    story.append(Paragraph(f"<b>Итоги:</b> {data['summary']['text']}", summary_style))
+                    story.append(Paragraph(f"<b>Итоги:</b> {data['summary']['text']}", pdf_styles['summary']))
             else:
                 # Сообщение об отсутствии данных (согласно ТЗ п.6)
-                story.append(Paragraph("Данные для формирования отчета отсутствуют", no_data_style))
+                story.append(Paragraph("Данные для формирования отчета отсутствуют", pdf_styles['no_data']))
             
-            # 5. ПОДВАЛ (согласно ТЗ п.7)
-            story.append(Spacer(1, 30))
-            story.append(Paragraph(f"Отчет сформирован программой управления проектами ООО «АртСтудия»", footer_style))
+            # 5. ПОДВАЛ
+            story.extend(self._build_pdf_footer(pdf_styles))
             
             # Собираем документ
             doc.build(story)
@@ -712,6 +641,139 @@ class ReportGenerationView(generics.CreateAPIView):
             traceback.print_exc()
             return None
     
+    def _iter_streaming_story(self, report, header, pdf_styles, table_style):
+        """
+        Содержимое потокового PDF-отчета.
+        Табличная часть разбивается на таблицы размером примерно в страницу,
+        каждая таблица создается только когда до нее дойдет верстка.
+        """
+        yield from self._build_pdf_header(header, pdf_styles)
+        
+        headers = self._get_report_headers(report.report_type)
+        col_widths = self._get_column_widths(report.report_type, len(headers))
+        
+        totals = {}
+        rows = self._get_row_iterator(report.report_type)(report, totals)
+        
+        has_data = False
+        for chunk in chunked(rows, self.PDF_TABLE_ROWS):
+            has_data = True
+            table = Table([headers] + chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(table_style)
+            yield table
+        
+        if has_data:
+            yield Spacer(1, 15)
+            summary = self._get_report_summary(report, totals)
+            yield Paragraph(f"<b>Итоги:</b> {summary['text']}", pdf_styles['summary'])
+        else:
+            yield Paragraph("Данные для формирования отчета отсутствуют", pdf_styles['no_data'])
+        
+        yield from self._build_pdf_footer(pdf_styles)
+    
+    def _generate_pdf_report_streaming(self, report, output):
+        """
+        Потоковая генерация PDF для больших отчетов по задачам.
+        Строки читаются из БД порциями, а документ пишется в output,
+        поэтому расход памяти не зависит от количества задач.
+        """
+        registry = get_pdf_styles()
+        
+        doc = self._create_pdf_document(output)
+        story = self._iter_streaming_story(
+            report, self._get_report_header(report),
+            registry.paragraph_styles, registry.table_style
+        )
+        doc.build(StreamingStory(story))
+    
+    def _iter_export_rows(self, report, totals):
+        """
+        Строки табличного экспорта: заголовки столбцов и данные отчета.
+        Данные читаются из БД порциями (на PostgreSQL - серверным курсором).
+        """
+        yield self._get_report_headers(report.report_type)
+        yield from self._get_row_iterator(report.report_type)(report, totals)
+    
+    def _xlsx_value(self, value):
+        """Числовые значения сохраняются в XLSX числами, а не текстом"""
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+        return value
+    
+    def _generate_xlsx_report(self, report, output):
+        """
+        Экспорт отчета в XLSX.
+        Книга открывается в режиме write_only: строки сразу сбрасываются
+        на диск, поэтому расход памяти не зависит от объема отчета.
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title='Отчет')
+        
+        headers = self._get_report_headers(report.report_type)
+        col_widths = self._get_column_widths(report.report_type, len(headers))
+        
+        # Ширина столбцов задается до записи строк (ограничение write_only)
+        for index, width in enumerate(col_widths, 1):
+            sheet.column_dimensions[get_column_letter(index)].width = max(round(width / 5), 6)
+        
+        # Шапка отчета (согласно ТЗ п.4)
+        header = self._get_report_header(report)
+        title_cell = WriteOnlyCell(sheet, value=header['organization'])
+        title_cell.font = Font(bold=True, size=14)
+        sheet.append([title_cell])
+        sheet.append([header['report_name']])
+        sheet.append([f"Период: {header['period']}"])
+        sheet.append([f"Дата формирования: {header['generated_at']}"])
+        sheet.append([f"Пользователь: {header['generated_by']}"])
+        sheet.append([])
+        
+        # Стиль строки заголовков
+        header_font = Font(bold=True, color='FFFFFF')
+        header_fill = PatternFill('solid', fgColor='2C3E50')
+        header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        thin = Side(style='thin', color='808080')
+        header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        
+        totals = {}
+        rows = self._iter_export_rows(report, totals)
+        
+        header_cells = []
+        for value in next(rows):
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            cell.border = header_border
+            header_cells.append(cell)
+        sheet.append(header_cells)
+        
+        for row in rows:
+            sheet.append([self._xlsx_value(value) for value in row])
+        
+        # Итоги
+        summary = self._get_report_summary(report, totals)
+        sheet.append([])
+        summary_cell = WriteOnlyCell(sheet, value=f"Итоги: {summary['text']}")
+        summary_cell.font = Font(bold=True)
+        sheet.append([summary_cell])
+        
+        workbook.save(output)
+    
+    def _generate_csv_report(self, report, output):
+        """
+        Экспорт отчета в CSV.
+        Разделитель ';' и BOM в начале файла - чтобы Excel
+        корректно открывал файл с кириллицей.
+        """
+        text_output = io.TextIOWrapper(output, encoding='utf-8-sig', newline='')
+        try:
+            writer = csv.writer(text_output, delimiter=';')
+            writer.writerows(self._iter_export_rows(report, {}))
+            text_output.flush()
+        finally:
+            # Файл output закрывает вызывающий код
+            text_output.detach()
+    
     def _get_report_headers(self, report_type):
         """Получение заголовков столбцов согласно ТЗ"""
         headers_by_type = {
@@ -785,6 +847,12 @@ class GeneratedReportViewSet(viewsets.ModelViewSet):
         """Скачивание отчета (согласно ТЗ п.3)"""
         report = self.get_object()
         
+        if report.status in ACTIVE_STATUSES:
+            return Response(
+                {'error': 'Отчет еще формируется', 'status': report.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        
         if not report.file:
             return Response(
                 {'error': 'Файл отчета не сгенерирован'},
@@ -803,20 +871,20 @@ class GeneratedReportViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def regenerate(self, request, pk=None):
-        """Повторная генерация отчета"""
+        """Повторная генерация отчета (через очередь)"""
         report = self.get_object()
         
-        # Генерируем отчет заново
-        view = ReportGenerationView()
-        success = view._generate_report_file(report)
-        
-        if success:
-            return Response({'status': 'Отчет успешно перегенерирован'})
-        else:
+        if report.status in ACTIVE_STATUSES:
             return Response(
-                {'error': 'Не удалось перегенерировать отчет'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Отчет уже находится в очереди на формирование'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        report = requeue_report(report)
+        return Response(
+            GeneratedReportSerializer(report, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['post'])
     def archive(self, request, pk=None):
@@ -0,0 +1,222 @@
+"""
+Кэш сформированных отчетов.
+
+Ключ кэша строится из параметров отчета (тип, период, формат, выбранные
+проекты и сотрудники), названия и автора отчета (они выводятся в шапке
+файла, поэтому файл одного пользователя не достается другому) и версии данных - максимального updated_at и числа
+строк в таблицах, из которых собирается отчет. Если отчет с таким же ключом
+уже сформирован, новая запись GeneratedReport ссылается на тот же файл,
+и повторная генерация не выполняется.
+
+Файлы отчетов в MEDIA_ROOT/reports вытесняются по возрасту и по суммарному
+размеру (management-команда evict_report_cache).
+
+Настройки берутся из settings.REPORT_CACHE:
+    ENABLED      - использовать ли кэш
+    MAX_AGE_DAYS - сколько дней хранить файлы отчетов
+    MAX_SIZE_MB  - предельный суммарный размер файлов отчетов
+"""
+import hashlib
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+
+from .models import GeneratedReport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'MAX_AGE_DAYS': 30,
+    'MAX_SIZE_MB': 1024,
+}
+
+REPORTS_DIR = 'reports'
+
+# Таблицы, от которых зависит содержимое отчета каждого типа
+REPORT_DATA_MODELS = {
+    'projects': ['projects.Project', 'projects.Task', 'core.Client', 'core.User'],
+    'tasks': ['projects.Task', 'projects.Project', 'core.User'],
+    'tasks_period': ['projects.Task', 'projects.Project', 'core.User'],
+    'employees': ['core.User', 'core.Employee', 'projects.Task'],
+    'summary': ['projects.Project', 'projects.Task', 'core.User'],
+}
+
+
+def get_cache_settings():
+    """Настройки кэша с учетом значений по умолчанию"""
+    return {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'REPORT_CACHE', {})}
+
+
+def get_data_version(report_type):
+    """
+    Версия данных для отчета заданного типа.
+    Число строк учитывается, чтобы удаление записей тоже меняло версию.
+    """
+    parts = []
+    for model_label in REPORT_DATA_MODELS.get(report_type, []):
+        stats = apps.get_model(model_label).objects.aggregate(
+            last_update=Max('updated_at'),
+            rows=Count('pk')
+        )
+        last_update = stats['last_update'].isoformat() if stats['last_update'] else '-'
+        parts.append(f"{model_label}:{last_update}:{stats['rows']}")
+    return '|'.join(parts)
+
+
+def build_cache_key(report, data_versions=None, project_ids=None, employee_ids=None):
+    """
+    Ключ кэша для отчета.
+    data_versions - заранее посчитанные версии данных по типам отчетов
+    (планировщик считает их один раз на все шаблоны запуска).
+    project_ids/employee_ids передаются, если отчет еще не сохранен.
+    """
+    if project_ids is None:
+        project_ids = report.projects.values_list('id', flat=True)
+    if employee_ids is None:
+        employee_ids = report.employees.values_list('id', flat=True)
+    project_ids = sorted(project_ids)
+    employee_ids = sorted(employee_ids)
+
+    if data_versions is not None and report.report_type in data_versions:
+        data_version = data_versions[report.report_type]
+    else:
+        data_version = get_data_version(report.report_type)
+
+    # Шапка файла: название отчета и автор (или «по расписанию» для отчетов шаблонов)
+    author = report.generated_by_id or ('schedule' if report.template_id else '')
+
+    key_parts = [
+        report.name,
+        str(author),
+        report.report_type,
+        report.export_format,
+        report.start_date.isoformat(),
+        report.end_date.isoformat(),
+        ','.join(map(str, project_ids)),
+        ','.join(map(str, employee_ids)),
+        data_version,
+    ]
+    return hashlib.sha256('\n'.join(key_parts).encode('utf-8')).hexdigest()
+
+
+def find_cached_report(cache_key, exclude_pk=None):
+    """Последний успешно сформированный отчет с тем же ключом и существующим файлом"""
+    candidates = (
+        GeneratedReport.objects
+        .filter(cache_key=cache_key, status='completed', is_success=True)
+        .exclude(file='')
+        .exclude(file__isnull=True)
+        .order_by('-finished_at')
+    )
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+
+    for cached in candidates[:3]:
+        if default_storage.exists(cached.file.name):
+            return cached
+    return None
+
+
+def reuse_cached_file(report, cache_key):
+    """
+    Привязка к отчету файла ранее сформированного отчета с тем же ключом.
+    Возвращает True, если файл найден. Запись report не сохраняется.
+    """
+    cached = find_cached_report(cache_key, exclude_pk=report.pk)
+    if cached is None:
+        return False
+
+    report.file.name = cached.file.name
+    report.file_size = cached.file_size
+    report.cache_key = cache_key
+
+    # Обновляем время доступа к файлу, чтобы вытеснение шло по давности использования
+    try:
+        os.utime(default_storage.path(cached.file.name))
+    except (NotImplementedError, OSError):
+        pass
+
+    return True
+
+
+def _iter_report_files():
+    """Файлы отчетов в MEDIA_ROOT/reports: (имя в хранилище, размер, время изменения)"""
+    root = os.path.join(settings.MEDIA_ROOT, REPORTS_DIR)
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            name = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            yield name, stat.st_size, stat.st_mtime
+
+
+def _evict_file(name):
+    """Удаление файла и отвязка его от всех отчетов, которые на него ссылаются"""
+    GeneratedReport.objects.filter(file=name).update(
+        file='',
+        file_size=None,
+        cache_key=''
+    )
+    default_storage.delete(name)
+
+
+def evict_report_files(max_age_days=None, max_size_mb=None):
+    """
+    Вытеснение файлов отчетов.
+    Сначала удаляются файлы старше max_age_days, затем самые давние файлы,
+    пока суммарный размер не станет меньше max_size_mb.
+    Файлы формируемых сейчас отчетов не трогаются.
+    """
+    cache_settings = get_cache_settings()
+    if max_age_days is None:
+        max_age_days = cache_settings['MAX_AGE_DAYS']
+    if max_size_mb is None:
+        max_size_mb = cache_settings['MAX_SIZE_MB']
+
+    in_progress = set(
+        GeneratedReport.objects
+        .filter(status__in=['pending', 'processing'])
+        .exclude(file='')
+        .values_list('file', flat=True)
+    )
+
+    files = sorted(
+        (f for f in _iter_report_files() if f[0] not in in_progress),
+        key=lambda f: f[2]
+    )
+
+    age_threshold = time.time() - max_age_days * 24 * 3600
+    size_limit = max_size_mb * 1024 * 1024
+    total_size = sum(size for _, size, _ in files)
+
+    evicted_files = 0
+    evicted_bytes = 0
+
+    for name, size, mtime in files:
+        if mtime >= age_threshold and total_size <= size_limit:
+            break
+
+        try:
+            _evict_file(name)
+        except OSError:
+            logger.exception("Не удалось удалить файл отчета %s", name)
+            continue
+
+        total_size -= size
+        evicted_files += 1
+        evicted_bytes += size
+
+    return {
+        'evicted_files': evicted_files,
+        'evicted_bytes': evicted_bytes,
+        'remaining_bytes': total_size,
+    }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from reports.cache import evict_report_files, get_cache_settings
+
+
+class Command(BaseCommand):
+    help = 'Вытеснение устаревших файлов отчетов из MEDIA_ROOT/reports'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days', type=int, default=None,
+            help='Максимальный возраст файла, дней (по умолчанию REPORT_CACHE["MAX_AGE_DAYS"])'
+        )
+        parser.add_argument(
+            '--max-size-mb', type=int, default=None,
+            help='Предельный суммарный размер файлов, МБ (по умолчанию REPORT_CACHE["MAX_SIZE_MB"])'
+        )
+    
+    def handle(self, *args, **options):
+        cache_settings = get_cache_settings()
+        max_age_days = options['max_age_days'] or cache_settings['MAX_AGE_DAYS']
+        max_size_mb = options['max_size_mb'] or cache_settings['MAX_SIZE_MB']
+        
+        result = evict_report_files(max_age_days=max_age_days, max_size_mb=max_size_mb)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено файлов: {result['evicted_files']} "
+            f"({result['evicted_bytes'] / 1024 / 1024:.1f} МБ), "
+            f"осталось {result['remaining_bytes'] / 1024 / 1024:.1f} МБ"
+        ))
@@ -0,0 +1,54 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from reports.scheduler import ReportScheduler, run_scheduler_tick, get_scheduler_metrics
+
+
+class Command(BaseCommand):
+    help = 'Запуск планировщика отчетов по расписанию шаблонов'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить один запуск и завершиться (для cron)'
+        )
+        parser.add_argument(
+            '--tick-interval', type=float, default=None,
+            help='Пауза между запусками, сек (по умолчанию REPORT_SCHEDULER["TICK_INTERVAL"])'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать метрики планировщика за последние 7 дней'
+        )
+    
+    def handle(self, *args, **options):
+        if options['stats']:
+            for name, value in get_scheduler_metrics().items():
+                self.stdout.write(f'{name}: {value}')
+            return
+        
+        if options['once']:
+            run = run_scheduler_tick()
+            if not run.is_success:
+                self.stderr.write(self.style.ERROR(f'Ошибка: {run.error_message}'))
+                return
+            self.stdout.write(self.style.SUCCESS(
+                f'Шаблонов к запуску: {run.templates_due}, '
+                f'поставлено в очередь: {run.reports_enqueued}, '
+                f'взято из кэша: {run.reports_from_cache}'
+            ))
+            return
+        
+        scheduler = ReportScheduler(tick_interval=options['tick_interval'])
+        
+        def _shutdown(signum, frame):
+            scheduler.stop()
+        
+        signal.signal(signal.SIGINT, _shutdown)
+        signal.signal(signal.SIGTERM, _shutdown)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Планировщик отчетов запущен (интервал {scheduler.tick_interval} сек)'
+        ))
+        scheduler.run_forever()
+        self.stdout.write(self.style.SUCCESS('Планировщик остановлен'))
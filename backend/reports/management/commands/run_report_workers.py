@@ -0,0 +1,60 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from reports.queue import ReportWorkerPool, get_queue_settings
+from reports.pdf_styles import get_pdf_styles
+
+
+class Command(BaseCommand):
+    help = 'Запуск пула воркеров фоновой генерации отчетов'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Количество воркеров (по умолчанию REPORT_QUEUE["WORKERS"])'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=None,
+            help='Пауза между опросами пустой очереди, сек'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущую очередь и завершиться'
+        )
+    
+    def handle(self, *args, **options):
+        pool = ReportWorkerPool(
+            workers=options['workers'],
+            poll_interval=options['poll_interval']
+        )
+        
+        if options['once']:
+            processed = pool.drain()
+            self.stdout.write(self.style.SUCCESS(f'Обработано отчетов: {processed}'))
+            return
+        
+        stopping = []
+        
+        def _shutdown(signum, frame):
+            stopping.append(signum)
+        
+        signal.signal(signal.SIGINT, _shutdown)
+        signal.signal(signal.SIGTERM, _shutdown)
+        
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(
+            f'Запущено воркеров: {pool.workers} '
+            f'(лимит на пользователя: {get_queue_settings()["MAX_RUNNING_PER_USER"]})'
+        ))
+        self.stdout.write(
+            f'Шрифты PDF: {get_pdf_styles().normal_font}, '
+            f'инициализация {get_pdf_styles().init_seconds:.3f} сек'
+        )
+        
+        while not stopping:
+            time.sleep(1)
+        
+        self.stdout.write('Остановка воркеров...')
+        pool.stop()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
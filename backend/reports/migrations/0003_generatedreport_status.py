@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:47
+
+from django.db import migrations, models
+
+
+def mark_existing_reports(apps, schema_editor):
+    """Отчеты, сформированные до появления очереди, уже завершены"""
+    GeneratedReport = apps.get_model('reports', 'GeneratedReport')
+    GeneratedReport.objects.filter(is_success=True).update(status='completed')
+    GeneratedReport.objects.filter(is_success=False).update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_alter_reporttemplate_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Окончание генерации'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Начало генерации'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В очереди'), ('processing', 'Формируется'), ('completed', 'Сформирован'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус генерации'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedreport',
+            index=models.Index(fields=['status', 'generated_at'], name='reports_gen_status_4d1741_idx'),
+        ),
+        migrations.RunPython(mark_existing_reports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_generatedreport_cache_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='export_format',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('xlsx', 'Excel (XLSX)'), ('csv', 'CSV')], default='pdf', max_length=10, verbose_name='Формат экспорта'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_generatedreport_export_formats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportScheduleRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Начало запуска')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание запуска')),
+                ('templates_due', models.PositiveIntegerField(default=0, verbose_name='Шаблонов к запуску')),
+                ('reports_enqueued', models.PositiveIntegerField(default=0, verbose_name='Поставлено в очередь')),
+                ('reports_from_cache', models.PositiveIntegerField(default=0, verbose_name='Взято из кэша')),
+                ('max_lag_seconds', models.FloatField(blank=True, null=True, verbose_name='Макс. задержка (сек)')),
+                ('avg_lag_seconds', models.FloatField(blank=True, null=True, verbose_name='Средняя задержка (сек)')),
+                ('is_success', models.BooleanField(default=True, verbose_name='Успешно')),
+                ('error_message', models.TextField(blank=True, verbose_name='Сообщение об ошибке')),
+            ],
+            options={
+                'verbose_name': 'Запуск планировщика отчетов',
+                'verbose_name_plural': 'Запуски планировщика отчетов',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Плановое время формирования'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_reports', to='reports.reporttemplate', verbose_name='Шаблон'),
+        ),
+        migrations.AddField(
+            model_name='reporttemplate',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний запуск'),
+        ),
+        migrations.AddField(
+            model_name='reporttemplate',
+            name='next_run_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Следующий запуск'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from .report_template import ReportTemplate
 from .generated_report import GeneratedReport
+from .report_schedule_run import ReportScheduleRun
 
-__all__ = ['ReportTemplate', 'GeneratedReport']
\ No newline at end of file
+__all__ = ['ReportTemplate', 'GeneratedReport', 'ReportScheduleRun']
\ No newline at end of file
@@ -14,6 +14,15 @@ class GeneratedReport(models.Model):
     
     EXPORT_FORMATS = [
         ('pdf', 'PDF'),
+        ('xlsx', 'Excel (XLSX)'),
+        ('csv', 'CSV'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('processing', 'Формируется'),
+        ('completed', 'Сформирован'),
+        ('failed', 'Ошибка'),
     ]
     
     # Основная информация (согласно ТЗ п.4)
@@ -35,6 +44,15 @@ class GeneratedReport(models.Model):
     file = models.FileField(upload_to='reports/%Y/%m/', null=True, blank=True, 
                             verbose_name="Файл отчета")
     file_size = models.BigIntegerField(null=True, blank=True, verbose_name="Размер файла")
+    # Ключ кэша: параметры отчета + версия данных (см. reports/cache.py)
+    cache_key = models.CharField(max_length=64, blank=True, db_index=True,
+                                 verbose_name="Ключ кэша")
+    
+    # Отчеты, сформированные по расписанию (см. reports/scheduler.py)
+    template = models.ForeignKey('ReportTemplate', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='generated_reports', verbose_name="Шаблон")
+    scheduled_for = models.DateTimeField(null=True, blank=True,
+                                         verbose_name="Плановое время формирования")
     
     # Метаданные (согласно ТЗ п.4)
     generated_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, 
@@ -44,6 +62,12 @@ class GeneratedReport(models.Model):
     generation_time = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, 
                                           verbose_name="Время генерации (сек)")
     
+    # Состояние фоновой генерации (см. reports/queue.py)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending',
+                              verbose_name="Статус генерации")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начало генерации")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Окончание генерации")
+    
     is_success = models.BooleanField(default=True, verbose_name="Успешно сформирован")
     error_message = models.TextField(blank=True, verbose_name="Сообщение об ошибке")
     is_active = models.BooleanField(default=True)
@@ -56,11 +80,17 @@ class GeneratedReport(models.Model):
         indexes = [
             models.Index(fields=['report_type', 'generated_at']),
             models.Index(fields=['is_archived', 'is_active']),
+            models.Index(fields=['status', 'generated_at']),
         ]
     
     def __str__(self):
         return f"{self.name} от {self.generated_at.strftime('%d.%m.%Y %H:%M')}"
     
+    @property
+    def is_ready(self):
+        """Отчет сформирован и доступен для скачивания"""
+        return self.status == 'completed' and bool(self.file)
+    
     def archive(self):
         """Перемещение в архив"""
         self.is_archived = True
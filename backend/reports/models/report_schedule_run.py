@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class ReportScheduleRun(models.Model):
+    """История запусков планировщика отчетов"""
+    started_at = models.DateTimeField(verbose_name="Начало запуска")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Окончание запуска")
+    
+    templates_due = models.PositiveIntegerField(default=0, verbose_name="Шаблонов к запуску")
+    reports_enqueued = models.PositiveIntegerField(default=0, verbose_name="Поставлено в очередь")
+    reports_from_cache = models.PositiveIntegerField(default=0, verbose_name="Взято из кэша")
+    
+    # Задержка постановки в очередь относительно планового времени
+    max_lag_seconds = models.FloatField(null=True, blank=True, verbose_name="Макс. задержка (сек)")
+    avg_lag_seconds = models.FloatField(null=True, blank=True, verbose_name="Средняя задержка (сек)")
+    
+    is_success = models.BooleanField(default=True, verbose_name="Успешно")
+    error_message = models.TextField(blank=True, verbose_name="Сообщение об ошибке")
+    
+    class Meta:
+        verbose_name = "Запуск планировщика отчетов"
+        verbose_name_plural = "Запуски планировщика отчетов"
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Запуск от {self.started_at.strftime('%d.%m.%Y %H:%M')}"
+    
+    @property
+    def duration_seconds(self):
+        """Длительность запуска"""
+        if not self.finished_at:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
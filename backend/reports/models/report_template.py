@@ -44,6 +44,11 @@ class ReportTemplate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Расписание (см. reports/scheduler.py)
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name="Последний запуск")
+    next_run_at = models.DateTimeField(null=True, blank=True, db_index=True,
+                                       verbose_name="Следующий запуск")
+    
     class Meta:
         verbose_name = "Шаблон отчета"
         verbose_name_plural = "Шаблоны отчетов"
@@ -0,0 +1,72 @@
+"""
+Потоковая сборка PDF-отчетов.
+
+SimpleDocTemplate.build() принимает список flowable-объектов и разбирает его
+с головы: читает flowables[0], удаляет обработанные элементы и вставляет
+в начало остатки разбитых таблиц. StreamingStory реализует эти операции
+поверх генератора, поэтому в памяти одновременно находится только несколько
+flowable-объектов, а не вся таблица отчета.
+"""
+from itertools import islice
+
+
+class StreamingStory:
+    """
+    Ленивая замена списка story для doc.build().
+
+    lookahead - сколько элементов держать в буфере для операций,
+    которым нужно заглянуть вперед (keepWithNext).
+    """
+
+    def __init__(self, flowables, lookahead=2):
+        self._source = iter(flowables)
+        self._buffer = []
+        self._lookahead = lookahead
+        self._exhausted = False
+
+    def _fill(self, size):
+        if self._exhausted or len(self._buffer) >= size:
+            return
+        chunk = list(islice(self._source, size - len(self._buffer)))
+        if len(chunk) < size - len(self._buffer):
+            self._exhausted = True
+        self._buffer.extend(chunk)
+
+    def __len__(self):
+        self._fill(self._lookahead)
+        return len(self._buffer)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else self._lookahead)
+            return self._buffer[index]
+        self._fill(index + 1)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._fill(index.stop or 0)
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop or 0)
+        else:
+            self._fill(index + 1)
+        del self._buffer[index]
+
+    def insert(self, index, value):
+        self._buffer.insert(index, value)
+
+
+def chunked(rows, size):
+    """Разбиение итератора строк на списки по size элементов"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,229 @@
+"""
+Шрифты и стили PDF-отчетов, общие для всего процесса.
+
+Поиск и разбор TTF-шрифтов с кириллицей и сборка стилей reportlab
+выполняются один раз при первом обращении (под блокировкой, так как
+отчеты формируются в нескольких потоках-воркерах). Дальше все отчеты
+используют готовые объекты. Воркеры прогревают реестр при старте
+(ReportWorkerPool.start), чтобы первый отчет не платил за инициализацию.
+
+Время инициализации доступно в PdfStyleRegistry.init_seconds.
+"""
+import logging
+import os
+import threading
+import time
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import TableStyle
+
+logger = logging.getLogger(__name__)
+
+# Пути к шрифтам DejaVu / Arial (с поддержкой кириллицы)
+FONT_PATHS = [
+    # Linux системные пути
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    '/usr/local/share/fonts/dejavu/DejaVuSans.ttf',
+
+    # Windows системные пути
+    'C:\\Windows\\Fonts\\arial.ttf',
+    'C:\\Windows\\Fonts\\arialbd.ttf',
+
+    # macOS системные пути
+    '/Library/Fonts/Arial.ttf',
+    '/Library/Fonts/Arial Bold.ttf',
+
+    # Шрифты, положенные рядом с кодом отчетов
+    os.path.join(os.path.dirname(__file__), 'api', 'views', 'fonts', 'DejaVuSans.ttf'),
+    os.path.join(os.path.dirname(__file__), 'api', 'views', 'fonts', 'Arial.ttf'),
+]
+
+
+class PdfStyleRegistry:
+    """Реестр шрифтов и стилей PDF-отчетов"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.normal_font = 'Helvetica'
+        self.bold_font = 'Helvetica-Bold'
+        self.font_source = None
+        self.paragraph_styles = {}
+        self.table_style = None
+        self.init_seconds = None
+
+    def ensure_initialized(self):
+        """Инициализация при первом обращении"""
+        if self._initialized:
+            return self
+
+        with self._lock:
+            if not self._initialized:
+                started = time.perf_counter()
+                self.normal_font, self.bold_font = self._register_fonts()
+                self.paragraph_styles = self._build_paragraph_styles()
+                self.table_style = self._build_table_style()
+                self.init_seconds = time.perf_counter() - started
+                self._initialized = True
+
+                logger.info(
+                    "Шрифты и стили PDF инициализированы за %.3f сек (шрифт: %s)",
+                    self.init_seconds, self.font_source or self.normal_font
+                )
+
+        return self
+
+    def _register_fonts(self):
+        """Регистрация шрифтов с поддержкой кириллицы"""
+        # Arial (обычно есть в Windows)
+        try:
+            pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
+            pdfmetrics.registerFont(TTFont('Arial-Bold', 'arialbd.ttf'))
+            self.font_source = 'arial.ttf'
+            return 'Arial', 'Arial-Bold'
+        except Exception:
+            pass
+
+        # Ищем и регистрируем DejaVu
+        for font_path in FONT_PATHS:
+            if not os.path.exists(font_path):
+                continue
+            try:
+                pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
+
+                # Жирное начертание, если оно есть рядом
+                bold_font = 'DejaVuSans'
+                bold_path = font_path.replace('Sans.ttf', 'Sans-Bold.ttf')
+                if os.path.exists(bold_path):
+                    pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', bold_path))
+                    bold_font = 'DejaVuSans-Bold'
+
+                self.font_source = font_path
+                return 'DejaVuSans', bold_font
+            except Exception as e:
+                logger.warning("Ошибка регистрации шрифта %s: %s", font_path, e)
+
+        logger.warning(
+            "Шрифты с поддержкой кириллицы не найдены, текст в PDF будет отображаться "
+            "некорректно. Установите шрифты DejaVu или Arial в систему."
+        )
+        return 'Helvetica', 'Helvetica-Bold'
+
+    def _build_paragraph_styles(self):
+        """Стили абзацев PDF-отчета с русскими шрифтами"""
+        styles = getSampleStyleSheet()
+        normal_font, bold_font = self.normal_font, self.bold_font
+
+        return {
+            # Стиль для заголовка
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Title'],
+                fontName=bold_font,
+                fontSize=16,
+                alignment=TA_CENTER,
+                spaceAfter=20
+            ),
+            # Стиль для подзаголовка
+            'subtitle': ParagraphStyle(
+                'CustomSubtitle',
+                parent=styles['Normal'],
+                fontName=bold_font,
+                fontSize=12,
+                alignment=TA_CENTER,
+                textColor=colors.gray,
+                spaceAfter=20
+            ),
+            # Стиль для метаданных
+            'meta': ParagraphStyle(
+                'Meta',
+                parent=styles['Normal'],
+                fontName=normal_font,
+                fontSize=10,
+                textColor=colors.gray,
+                spaceAfter=5
+            ),
+            # Стиль для основного текста
+            'normal': ParagraphStyle(
+                'NormalText',
+                parent=styles['Normal'],
+                fontName=normal_font,
+                fontSize=10,
+                spaceAfter=10
+            ),
+            # Стиль для итогов
+            'summary': ParagraphStyle(
+                'Summary',
+                parent=styles['Normal'],
+                fontName=bold_font,
+                fontSize=11,
+                alignment=TA_LEFT,
+                spaceBefore=15,
+                spaceAfter=15,
+                textColor=colors.HexColor('#2c3e50')
+            ),
+            # Стиль для сообщения об отсутствии данных
+            'no_data': ParagraphStyle(
+                'NoData',
+                parent=styles['Normal'],
+                fontName=normal_font,
+                fontSize=12,
+                alignment=TA_CENTER,
+                textColor=colors.gray,
+                spaceBefore=50,
+                spaceAfter=50
+            ),
+            # Стиль для подвала
+            'footer': ParagraphStyle(
+                'Footer',
+                parent=styles['Normal'],
+                fontName=normal_font,
+                fontSize=8,
+                alignment=TA_CENTER,
+                textColor=colors.gray,
+                spaceBefore=20
+            ),
+        }
+
+    def _build_table_style(self):
+        """Стиль табличной части отчета"""
+        return TableStyle([
+            # Заголовок
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), self.bold_font),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+
+            # Данные
+            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 1), (-1, -1), self.normal_font),
+            ('FONTSIZE', (0, 1), (-1, -1), 5),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+            ('TOPPADDING', (0, 1), (-1, -1), 6),
+
+            # Чередование строк
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+
+            # Первая колонка (№) выровнять по центру
+            ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+
+            # Последняя колонка (проценты/задержка) выровнять по центру
+            ('ALIGN', (-1, 1), (-1, -1), 'CENTER'),
+        ])
+
+
+_registry = PdfStyleRegistry()
+
+
+def get_pdf_styles():
+    """Общий для процесса реестр шрифтов и стилей (инициализируется при первом вызове)"""
+    return _registry.ensure_initialized()
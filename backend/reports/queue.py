@@ -0,0 +1,285 @@
+"""
+Очередь фоновой генерации отчетов.
+
+Брокером служит сама таблица GeneratedReport: запрос на формирование
+создает запись в статусе 'pending', а пул воркеров (management-команда
+run_report_workers) забирает записи через SELECT ... FOR UPDATE SKIP LOCKED
+и формирует файлы. Redis и другие внешние брокеры не требуются.
+
+Настройки берутся из settings.REPORT_QUEUE:
+    WORKERS               - количество потоков-воркеров
+    MAX_QUEUED_PER_USER   - сколько незавершенных отчетов может быть у пользователя
+    MAX_RUNNING_PER_USER  - сколько отчетов пользователя формируется одновременно
+    POLL_INTERVAL         - пауза (сек) между опросами пустой очереди
+    STALE_AFTER           - через сколько секунд зависший 'processing' возвращается в очередь
+    EAGER                 - формировать отчет сразу в запросе (для разработки и тестов)
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import GeneratedReport
+from .pdf_styles import get_pdf_styles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SETTINGS = {
+    'WORKERS': 2,
+    'MAX_QUEUED_PER_USER': 5,
+    'MAX_RUNNING_PER_USER': 1,
+    'POLL_INTERVAL': 2,
+    'STALE_AFTER': 600,
+    'EAGER': False,
+}
+
+ACTIVE_STATUSES = ['pending', 'processing']
+
+
+class ReportQueueLimitExceeded(Exception):
+    """У пользователя слишком много незавершенных отчетов"""
+
+
+def get_queue_settings():
+    """Настройки очереди с учетом значений по умолчанию"""
+    return {**DEFAULT_QUEUE_SETTINGS, **getattr(settings, 'REPORT_QUEUE', {})}
+
+
+def enqueue_report(user, report_data):
+    """
+    Постановка отчета в очередь.
+    Возвращает запись GeneratedReport в статусе 'pending'.
+    """
+    queue_settings = get_queue_settings()
+
+    with transaction.atomic():
+        # Блокируем строку пользователя, чтобы параллельные запросы
+        # одного пользователя не обошли лимит
+        type(user).objects.select_for_update().filter(pk=user.pk).first()
+
+        active_count = GeneratedReport.objects.filter(
+            generated_by=user,
+            status__in=ACTIVE_STATUSES
+        ).count()
+
+        if active_count >= queue_settings['MAX_QUEUED_PER_USER']:
+            raise ReportQueueLimitExceeded(
+                f"В очереди уже {active_count} ваших отчетов. "
+                f"Дождитесь их формирования."
+            )
+
+        report = GeneratedReport.objects.create(
+            name=report_data['name'],
+            report_type=report_data['report_type'],
+            start_date=report_data['start_date'],
+            end_date=report_data['end_date'],
+            export_format=report_data.get('export_format', 'pdf'),
+            generated_by=user,
+            status='pending',
+            is_success=False,
+        )
+
+        if report_data.get('projects'):
+            report.projects.set(report_data['projects'])
+
+        if report_data.get('employees'):
+            report.employees.set(report_data['employees'])
+
+    if queue_settings['EAGER']:
+        process_report(report)
+        report.refresh_from_db()
+
+    return report
+
+
+def requeue_report(report):
+    """Повторная постановка существующего отчета в очередь"""
+    GeneratedReport.objects.filter(pk=report.pk).update(
+        status='pending',
+        started_at=None,
+        finished_at=None,
+        error_message='',
+        cache_key='',
+    )
+    report.refresh_from_db()
+
+    if get_queue_settings()['EAGER']:
+        process_report(report)
+        report.refresh_from_db()
+
+    return report
+
+
+def claim_next_report():
+    """
+    Захват следующего отчета из очереди.
+    Пропускает пользователей, у которых уже формируется
+    MAX_RUNNING_PER_USER отчетов, и отчеты, такой же экземпляр которых
+    (с тем же ключом кэша) формируется прямо сейчас - они возьмут готовый файл.
+    """
+    max_running = get_queue_settings()['MAX_RUNNING_PER_USER']
+    user_model = GeneratedReport._meta.get_field('generated_by').related_model
+    skipped_users = set()
+
+    with transaction.atomic():
+        busy_users = (
+            GeneratedReport.objects
+            .filter(status='processing', generated_by__isnull=False)
+            .values('generated_by')
+            .annotate(running=Count('id'))
+            .filter(running__gte=max_running)
+            .values('generated_by')
+        )
+
+        keys_in_progress = (
+            GeneratedReport.objects
+            .filter(status='processing')
+            .exclude(cache_key='')
+            .values('cache_key')
+        )
+        
+        while True:
+            report = (
+                GeneratedReport.objects
+                .select_for_update(skip_locked=True)
+                .filter(status='pending', is_active=True)
+                .exclude(generated_by__in=busy_users)
+                .exclude(generated_by__in=skipped_users)
+                .exclude(cache_key__in=keys_in_progress)
+                .order_by('generated_at')
+                .first()
+            )
+
+            if report is None:
+                return None
+
+            if report.generated_by_id is None or _lock_user_slot(user_model, report.generated_by_id, max_running):
+                break
+
+            skipped_users.add(report.generated_by_id)
+
+        report.status = 'processing'
+        report.started_at = timezone.now()
+        report.save(update_fields=['status', 'started_at'])
+
+    return report
+
+
+def _lock_user_slot(user_model, user_id, max_running):
+    """
+    Блокировка строки пользователя до конца транзакции захвата и повторная
+    проверка числа его формируемых отчетов. Без блокировки два воркера
+    могли бы одновременно взять отчеты одного пользователя сверх лимита.
+    Строку, заблокированную другим воркером, пропускаем (skip_locked).
+    """
+    locked = (
+        user_model.objects
+        .select_for_update(skip_locked=True)
+        .filter(pk=user_id)
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if locked is None:
+        return False
+
+    running = GeneratedReport.objects.filter(generated_by_id=user_id, status='processing').count()
+    return running < max_running
+
+
+def process_report(report):
+    """Формирование файла отчета"""
+    from .api.views.report import ReportGenerationView
+
+    if report.status != 'processing':
+        report.status = 'processing'
+        report.started_at = timezone.now()
+        report.save(update_fields=['status', 'started_at'])
+
+    view = ReportGenerationView()
+    return view._generate_report_file(report)
+
+
+def requeue_stale_reports():
+    """Возврат в очередь отчетов, воркер которых завершился аварийно"""
+    stale_after = get_queue_settings()['STALE_AFTER']
+    threshold = timezone.now() - timedelta(seconds=stale_after)
+
+    return GeneratedReport.objects.filter(
+        status='processing',
+        started_at__lt=threshold
+    ).update(status='pending', started_at=None)
+
+
+class ReportWorkerPool:
+    """Пул потоков, разбирающих очередь отчетов"""
+
+    def __init__(self, workers=None, poll_interval=None):
+        queue_settings = get_queue_settings()
+        self.workers = workers or queue_settings['WORKERS']
+        self.poll_interval = poll_interval or queue_settings['POLL_INTERVAL']
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        requeue_stale_reports()
+        
+        # Шрифты и стили PDF загружаются один раз до приема отчетов
+        get_pdf_styles()
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                name=f'report-worker-{i + 1}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self):
+        """Обработка очереди в текущем потоке до опустошения"""
+        processed = 0
+        while True:
+            report = claim_next_report()
+            if report is None:
+                return processed
+            self._process(report)
+            processed += 1
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            close_old_connections()
+            try:
+                report = claim_next_report()
+            except Exception:
+                logger.exception("Ошибка при получении отчета из очереди")
+                report = None
+
+            if report is None:
+                self._stop_event.wait(self.poll_interval)
+                continue
+
+            self._process(report)
+
+        close_old_connections()
+
+    def _process(self, report):
+        try:
+            process_report(report)
+        except Exception as e:
+            logger.exception("Ошибка генерации отчета %s", report.pk)
+            GeneratedReport.objects.filter(pk=report.pk).update(
+                status='failed',
+                is_success=False,
+                error_message=str(e),
+                finished_at=timezone.now()
+            )
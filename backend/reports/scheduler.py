@@ -0,0 +1,435 @@
+"""
+Планировщик отчетов по расписанию шаблонов.
+
+Шаблон ReportTemplate с частотой, отличной от 'manual', формирует отчет
+в начале каждого периода (полночь, понедельник, первое число месяца,
+квартала или года) за предыдущий полный период. Время следующего запуска
+хранится в ReportTemplate.next_run_at.
+
+Каждый запуск (тик) планировщика:
+    1. забирает шаблоны, у которых наступило время запуска, пачками
+       по BATCH_SIZE через SELECT ... FOR UPDATE SKIP LOCKED;
+    2. один раз на весь тик считает версии данных (см. reports/cache.py),
+       общие для всех шаблонов одного типа;
+    3. для каждого шаблона создает отчет: если такой же отчет по тем же
+       данным уже сформирован - сразу привязывает его файл, иначе ставит
+       отчет в очередь (reports/queue.py) с заранее посчитанным ключом кэша,
+       так что одинаковые шаблоны формируются один раз. Автор, проекты и
+       сотрудники из default_parameters проверяются по БД: ссылки на удаленные
+       записи отбрасываются. Шаблон, отчет которого создать не удалось,
+       пропускает период (ошибка пишется в историю запуска) и не блокирует
+       остальные шаблоны;
+    4. пишет историю запуска и задержки в ReportScheduleRun.
+
+Пропущенные периоды (если планировщик не работал) не догоняются:
+формируется отчет только за последний полный период.
+
+Настройки берутся из settings.REPORT_SCHEDULER:
+    BATCH_SIZE    - сколько шаблонов обрабатывается в одной транзакции
+    TICK_INTERVAL - пауза (сек) между запусками в режиме демона
+"""
+import logging
+import threading
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import Avg, Max, F
+from django.utils import timezone
+
+from .cache import build_cache_key, find_cached_report, get_cache_settings, get_data_version
+from .models import GeneratedReport, ReportTemplate, ReportScheduleRun
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULER_SETTINGS = {
+    'BATCH_SIZE': 50,
+    'TICK_INTERVAL': 60,
+}
+
+# Длина периода в месяцах для периодов, кратных месяцу
+MONTHS_IN_PERIOD = {
+    'monthly': 1,
+    'quarterly': 3,
+    'yearly': 12,
+}
+
+
+def get_scheduler_settings():
+    """Настройки планировщика с учетом значений по умолчанию"""
+    return {**DEFAULT_SCHEDULER_SETTINGS, **getattr(settings, 'REPORT_SCHEDULER', {})}
+
+
+def _shift_months(day, months):
+    """Первое число месяца, отстоящего от day на months месяцев"""
+    month_index = day.year * 12 + day.month - 1 + months
+    return day.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def get_period_start(frequency, day):
+    """Начало периода, в который попадает дата day"""
+    if frequency == 'daily':
+        return day
+    if frequency == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if frequency == 'monthly':
+        return day.replace(day=1)
+    if frequency == 'quarterly':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    if frequency == 'yearly':
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Неизвестная частота формирования: {frequency}")
+
+
+def get_next_period_start(frequency, day):
+    """Начало периода, следующего за периодом, в который попадает дата day"""
+    period_start = get_period_start(frequency, day)
+    if frequency == 'daily':
+        return period_start + timedelta(days=1)
+    if frequency == 'weekly':
+        return period_start + timedelta(days=7)
+    return _shift_months(period_start, MONTHS_IN_PERIOD[frequency])
+
+
+def get_next_run_at(frequency, after):
+    """Время следующего запуска шаблона: начало следующего периода после after"""
+    local_day = timezone.localtime(after).date()
+    next_day = get_next_period_start(frequency, local_day)
+    return timezone.make_aware(datetime.combine(next_day, time.min))
+
+
+def get_report_period(frequency, scheduled_for):
+    """
+    Период отчета для запуска в момент scheduled_for:
+    предыдущий полный период (например, прошлый месяц для ежемесячного отчета).
+    """
+    end_date = timezone.localtime(scheduled_for).date() - timedelta(days=1)
+    return get_period_start(frequency, end_date), end_date
+
+
+def get_due_templates(now):
+    """Шаблоны с наступившим временем запуска"""
+    return (
+        ReportTemplate.objects
+        .filter(is_active=True, next_run_at__lte=now)
+        .exclude(frequency='manual')
+    )
+
+
+def schedule_new_templates(now):
+    """Первичное планирование шаблонов, для которых время запуска еще не задано"""
+    templates = list(
+        ReportTemplate.objects
+        .filter(is_active=True, next_run_at__isnull=True)
+        .exclude(frequency='manual')
+    )
+    for template in templates:
+        template.next_run_at = get_next_run_at(template.frequency, now)
+    ReportTemplate.objects.bulk_update(templates, ['next_run_at'])
+    return len(templates)
+
+
+def _get_template_parameters(template):
+    """Параметры отчета из default_parameters шаблона"""
+    parameters = template.default_parameters or {}
+    export_format = parameters.get('export_format', 'pdf')
+    if export_format not in dict(GeneratedReport.EXPORT_FORMATS):
+        export_format = 'pdf'
+
+    return {
+        'export_format': export_format,
+        'generated_by_id': parameters.get('generated_by'),
+        'project_ids': [int(pk) for pk in parameters.get('projects', [])],
+        'employee_ids': [int(pk) for pk in parameters.get('employees', [])],
+    }
+
+
+def _get_existing_ids(parameters_list):
+    """
+    id пользователей и проектов из параметров шаблонов, которые есть в БД
+    (одним запросом на таблицу): шаблон может ссылаться на удаленные записи
+    """
+    user_model = GeneratedReport._meta.get_field('generated_by').related_model
+    project_model = GeneratedReport._meta.get_field('projects').related_model
+
+    user_ids = set()
+    project_ids = set()
+    for parameters in parameters_list:
+        if parameters['generated_by_id'] is not None:
+            user_ids.add(parameters['generated_by_id'])
+        user_ids.update(parameters['employee_ids'])
+        project_ids.update(parameters['project_ids'])
+
+    return (
+        set(user_model.objects.filter(pk__in=user_ids).values_list('pk', flat=True)),
+        set(project_model.objects.filter(pk__in=project_ids).values_list('pk', flat=True)),
+    )
+
+
+def _validate_parameters(template, parameters, existing_users, existing_projects):
+    """Удаление из параметров ссылок на несуществующие записи"""
+    missing = []
+    if parameters['generated_by_id'] is not None and parameters['generated_by_id'] not in existing_users:
+        missing.append(f"автор {parameters['generated_by_id']}")
+        parameters['generated_by_id'] = None
+    for key, existing, label in (('project_ids', existing_projects, 'проекты'),
+                                 ('employee_ids', existing_users, 'сотрудники')):
+        absent = [pk for pk in parameters[key] if pk not in existing]
+        if absent:
+            missing.append(f"{label} {', '.join(map(str, absent))}")
+            parameters[key] = [pk for pk in parameters[key] if pk in existing]
+    if missing:
+        logger.warning("Шаблон отчета %s ссылается на удаленные записи: %s", template.pk, '; '.join(missing))
+    return parameters
+
+
+def _create_reports(templates, now, data_versions, use_cache):
+    """
+    Создание отчетов для шаблонов templates.
+    Возвращает (поставлено в очередь, взято из кэша, задержки в секундах).
+    """
+    enqueued = 0
+    from_cache = 0
+    lags = []
+
+    parameters_list = [_get_template_parameters(template) for template in templates]
+    existing_users, existing_projects = _get_existing_ids(parameters_list)
+
+    reports = []
+    relations = []
+    for template, parameters in zip(templates, parameters_list):
+        scheduled_for = template.next_run_at
+        start_date, end_date = get_report_period(template.frequency, scheduled_for)
+        parameters = _validate_parameters(template, parameters, existing_users, existing_projects)
+
+        report = GeneratedReport(
+            name=f"{template.name} за период {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}",
+            report_type=template.template_type,
+            start_date=start_date,
+            end_date=end_date,
+            export_format=parameters['export_format'],
+            generated_by_id=parameters['generated_by_id'],
+            template=template,
+            scheduled_for=scheduled_for,
+            status='pending',
+            is_success=False,
+        )
+
+        if use_cache:
+            report.cache_key = build_cache_key(
+                report,
+                data_versions=data_versions,
+                project_ids=parameters['project_ids'],
+                employee_ids=parameters['employee_ids'],
+            )
+            cached = find_cached_report(report.cache_key)
+            if cached is not None:
+                report.file.name = cached.file.name
+                report.file_size = cached.file_size
+                report.status = 'completed'
+                report.is_success = True
+                report.started_at = now
+                report.finished_at = now
+                from_cache += 1
+            else:
+                enqueued += 1
+        else:
+            enqueued += 1
+
+        reports.append(report)
+        relations.append((parameters['project_ids'], parameters['employee_ids']))
+        lags.append((now - scheduled_for).total_seconds())
+
+    GeneratedReport.objects.bulk_create(reports)
+
+    ProjectLink = GeneratedReport.projects.through
+    EmployeeLink = GeneratedReport.employees.through
+    ProjectLink.objects.bulk_create([
+        ProjectLink(generatedreport_id=report.pk, project_id=project_id)
+        for report, (project_ids, _) in zip(reports, relations)
+        for project_id in project_ids
+    ])
+    EmployeeLink.objects.bulk_create([
+        EmployeeLink(generatedreport_id=report.pk, user_id=user_id)
+        for report, (_, employee_ids) in zip(reports, relations)
+        for user_id in employee_ids
+    ])
+
+    for template in templates:
+        template.last_run_at = now
+        template.next_run_at = get_next_run_at(template.frequency, now)
+    ReportTemplate.objects.bulk_update(templates, ['last_run_at', 'next_run_at'])
+
+    return enqueued, from_cache, lags
+
+
+def _enqueue_batch(templates, now, data_versions, use_cache):
+    """
+    Создание отчетов для пачки шаблонов.
+    Возвращает (поставлено в очередь, взято из кэша, задержки в секундах, ошибки шаблонов).
+    Если пачка не записалась целиком, шаблоны обрабатываются по одному в своих
+    точках сохранения: шаблон с ошибкой пропускает текущий период (его next_run_at
+    сдвигается), чтобы не блокировать остальные шаблоны в следующих запусках.
+    """
+    scheduled = {template.pk: (template.last_run_at, template.next_run_at) for template in templates}
+
+    def _restore(batch):
+        for template in batch:
+            template.last_run_at, template.next_run_at = scheduled[template.pk]
+
+    try:
+        with transaction.atomic():
+            return (*_create_reports(templates, now, data_versions, use_cache), [])
+    except Exception:
+        logger.warning("Пачка шаблонов отчетов не записана, обработка по одному", exc_info=True)
+        _restore(templates)
+
+    enqueued = 0
+    from_cache = 0
+    lags = []
+    errors = []
+    for template in templates:
+        try:
+            with transaction.atomic():
+                template_enqueued, template_from_cache, template_lags = _create_reports(
+                    [template], now, data_versions, use_cache
+                )
+        except Exception as e:
+            logger.exception("Ошибка постановки в очередь отчета шаблона %s", template.pk)
+            _restore([template])
+            errors.append(f"Шаблон {template.pk}: {e}")
+            ReportTemplate.objects.filter(pk=template.pk).update(
+                next_run_at=get_next_run_at(template.frequency, now)
+            )
+            continue
+
+        enqueued += template_enqueued
+        from_cache += template_from_cache
+        lags.extend(template_lags)
+
+    return enqueued, from_cache, lags, errors
+
+
+def run_scheduler_tick(now=None):
+    """
+    Один запуск планировщика.
+    Возвращает запись ReportScheduleRun с итогами запуска.
+    """
+    now = now or timezone.now()
+    scheduler_settings = get_scheduler_settings()
+    use_cache = get_cache_settings()['ENABLED']
+
+    run = ReportScheduleRun.objects.create(started_at=timezone.now())
+    lags = []
+    errors = []
+
+    try:
+        schedule_new_templates(now)
+
+        due_types = set(get_due_templates(now).values_list('template_type', flat=True))
+
+        # Версии данных общие для всех шаблонов одного типа - считаем один раз на запуск
+        data_versions = {}
+        if use_cache:
+            data_versions = {report_type: get_data_version(report_type) for report_type in due_types}
+
+        while True:
+            with transaction.atomic():
+                templates = list(
+                    get_due_templates(now)
+                    .select_for_update(skip_locked=True)
+                    .order_by('next_run_at', 'id')[:scheduler_settings['BATCH_SIZE']]
+                )
+                if not templates:
+                    break
+
+                enqueued, from_cache, batch_lags, batch_errors = _enqueue_batch(
+                    templates, now, data_versions, use_cache
+                )
+
+            run.templates_due += len(templates)
+            run.reports_enqueued += enqueued
+            run.reports_from_cache += from_cache
+            lags.extend(batch_lags)
+            errors.extend(batch_errors)
+
+    except Exception as e:
+        logger.exception("Ошибка запуска планировщика отчетов")
+        errors.append(str(e))
+
+    if errors:
+        run.is_success = False
+        run.error_message = '\n'.join(errors)
+
+    if lags:
+        run.max_lag_seconds = max(lags)
+        run.avg_lag_seconds = sum(lags) / len(lags)
+    run.finished_at = timezone.now()
+    run.save()
+
+    return run
+
+
+def get_scheduler_metrics(since=None):
+    """
+    Метрики планировщика:
+    задержка постановки в очередь (по истории запусков) и
+    задержка готовности отчета относительно планового времени.
+    """
+    since = since or timezone.now() - timedelta(days=7)
+
+    runs = ReportScheduleRun.objects.filter(started_at__gte=since)
+    run_stats = runs.aggregate(
+        max_enqueue_lag=Max('max_lag_seconds'),
+        avg_enqueue_lag=Avg('avg_lag_seconds'),
+    )
+
+    completion_lag = F('finished_at') - F('scheduled_for')
+    report_stats = (
+        GeneratedReport.objects
+        .filter(scheduled_for__gte=since, status='completed')
+        .aggregate(
+            max_completion_lag=Max(completion_lag),
+            avg_completion_lag=Avg(completion_lag),
+        )
+    )
+
+    def _seconds(value):
+        return value.total_seconds() if value is not None else None
+
+    return {
+        'runs': runs.count(),
+        'failed_runs': runs.filter(is_success=False).count(),
+        'max_enqueue_lag_seconds': run_stats['max_enqueue_lag'],
+        'avg_enqueue_lag_seconds': run_stats['avg_enqueue_lag'],
+        'max_completion_lag_seconds': _seconds(report_stats['max_completion_lag']),
+        'avg_completion_lag_seconds': _seconds(report_stats['avg_completion_lag']),
+        'pending_scheduled_reports': GeneratedReport.objects.filter(
+            template__isnull=False,
+            status__in=['pending', 'processing']
+        ).count(),
+    }
+
+
+class ReportScheduler:
+    """Долгоживущий процесс планировщика: запуск тика раз в TICK_INTERVAL секунд"""
+
+    def __init__(self, tick_interval=None):
+        self.tick_interval = tick_interval or get_scheduler_settings()['TICK_INTERVAL']
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run_forever(self):
+        while not self._stop_event.is_set():
+            close_old_connections()
+            run = run_scheduler_tick()
+            if run.templates_due:
+                logger.info(
+                    "Планировщик отчетов: шаблонов %s, в очереди %s, из кэша %s",
+                    run.templates_due, run.reports_enqueued, run.reports_from_cache
+                )
+            self._stop_event.wait(self.tick_interval)
+
+        close_old_connections()
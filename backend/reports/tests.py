@@ -1,3 +1,572 @@
-from django.test import TestCase
+import threading
+from datetime import date
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import User, Client
+from projects.models import Project, Task
+from .models import GeneratedReport
+from .api.views.report import ReportGenerationView, GeneratedReportViewSet
+from .queue import claim_next_report
+
+
+class ReportDataQueryCountTest(TestCase):
+    """Количество запросов при сборе данных не должно зависеть от объема данных"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create_user(
+            username='director', password='pass', role='director',
+            first_name='Иван', last_name='Петров'
+        )
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role='manager',
+            first_name='Анна', last_name='Смирнова'
+        )
+        cls.client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+
+    def _create_projects(self, count, tasks_per_project=3):
+        for i in range(count):
+            project = Project.objects.create(
+                title=f'Проект {Project.objects.count() + 1}',
+                client=self.client_obj,
+                manager=self.manager,
+                start_date=date(2026, 1, 1),
+                planned_end_date=date(2026, 6, 1),
+            )
+            Task.objects.bulk_create([
+                Task(
+                    title=f'Задача {j}',
+                    description='',
+                    project=project,
+                    assigned_to=self.manager,
+                    created_by=self.director,
+                    deadline=date(2026, 2, 1),
+                    status='completed' if j == 0 else 'in_work',
+                )
+                for j in range(tasks_per_project)
+            ])
+
+    def _make_report(self, report_type):
+        return GeneratedReport.objects.create(
+            name='Тест',
+            report_type=report_type,
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 3, 1),
+            generated_by=self.director,
+        )
+
+    def _count_queries(self, collect, report):
+        with CaptureQueriesContext(connection) as ctx:
+            data = collect(report, {'data': [], 'summary': {}, 'has_data': False})
+        return len(ctx), data
+
+    def test_projects_report_query_count_is_constant(self):
+        view = ReportGenerationView()
+        report = self._make_report('projects')
+
+        self._create_projects(3)
+        small_count, small_data = self._count_queries(view._collect_projects_data, report)
+
+        self._create_projects(30)
+        large_count, large_data = self._count_queries(view._collect_projects_data, report)
+
+        self.assertEqual(len(small_data['data']), 3)
+        self.assertEqual(len(large_data['data']), 33)
+        self.assertEqual(small_count, large_count)
+
+        row = large_data['data'][0]
+        self.assertEqual(row[2], 'Клиент')
+        self.assertEqual(row[7:], ['3', '1', '33.3%'])
+
+    def _create_employees(self, count):
+        from django.utils import timezone
+        from core.models import Employee
+
+        project = Project.objects.create(
+            title='Проект сотрудников',
+            client=self.client_obj,
+            manager=self.manager,
+            start_date=date(2026, 1, 1),
+            planned_end_date=date(2026, 6, 1),
+        )
+        completed_at = timezone.make_aware(timezone.datetime(2026, 2, 1, 12, 0))
+        for i in range(count):
+            user = User.objects.create(
+                username=f'employee{User.objects.count()}',
+                role='manager', first_name='Сотрудник', last_name=str(i)
+            )
+            Employee.objects.create(
+                user=user, position='Дизайнер', work_email='e@example.com',
+                hire_date=date(2025, 1, 1)
+            )
+            Task.objects.bulk_create([
+                Task(title='Задача в работе', description='', project=project,
+                     assigned_to=user, deadline=date(2026, 2, 1), status='in_work'),
+                Task(title='Задача на проверке', description='', project=project,
+                     assigned_to=user, deadline=date(2026, 2, 2), status='on_review'),
+                Task(title='Выполненная задача', description='', project=project,
+                     assigned_to=user, deadline=date(2026, 2, 3), status='completed',
+                     completed_at=completed_at),
+            ])
+
+    def test_employees_report_query_count_is_constant(self):
+        view = ReportGenerationView()
+        report = self._make_report('employees')
+
+        self._create_employees(3)
+        small_count, small_data = self._count_queries(view._collect_employees_data, report)
+
+        self._create_employees(30)
+        large_count, large_data = self._count_queries(view._collect_employees_data, report)
+
+        # + менеджер из setUpTestData без задач
+        self.assertEqual(len(small_data['data']), 4)
+        self.assertEqual(len(large_data['data']), 34)
+        self.assertEqual(small_count, large_count)
+
+        rows = {row[1]: row for row in large_data['data']}
+        self.assertEqual(rows['Сотрудник 0'][2:], ['Дизайнер', '2', '1', '50.0%'])
+        self.assertEqual(rows['Анна Смирнова'][2:], ['Не указана', '0', '0', '0%'])
+
+
+class ReportQueueTest(TestCase):
+    """Постановка отчетов в очередь: ответы API, лимиты, режим EAGER"""
+
+    def setUp(self):
+        self.director = User.objects.create(username='director', role='director')
+        self.manager = User.objects.create(username='manager', role='manager')
+
+    def _post(self, user, **data):
+        request = APIRequestFactory().post('/api/reports/generate/', {
+            'report_type': 'summary', 'start_date': '2026-01-01', 'end_date': '2026-03-01', **data
+        }, format='json')
+        force_authenticate(request, user=user)
+        return ReportGenerationView.as_view()(request)
+
+    def _download(self, user, pk):
+        request = APIRequestFactory().get(f'/api/reports/{pk}/download/')
+        force_authenticate(request, user=user)
+        return GeneratedReportViewSet.as_view({'get': 'download'})(request, pk=pk)
+
+    def test_report_is_queued_and_download_waits(self):
+        response = self._post(self.director)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+
+        response = self._download(self.director, response.data['id'])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'pending')
+
+    @override_settings(REPORT_QUEUE={'MAX_QUEUED_PER_USER': 2})
+    def test_queue_limit_per_user(self):
+        self.assertEqual(self._post(self.director).status_code, 202)
+        self.assertEqual(self._post(self.director).status_code, 202)
+        self.assertEqual(self._post(self.director).status_code, 429)
+        # Лимит считается по пользователю
+        self.assertEqual(self._post(self.manager).status_code, 202)
+
+    @override_settings(REPORT_QUEUE={'EAGER': True})
+    def test_eager_mode_renders_in_request(self):
+        from django.core.files.storage import default_storage
+
+        response = self._post(self.director)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'completed')
+        report = GeneratedReport.objects.get(pk=response.data['id'])
+        self.addCleanup(default_storage.delete, report.file.name)
+
+        response = self._download(self.director, report.pk)
+        self.assertEqual(response.status_code, 200)
+        response.file_to_stream.close()
+
+    def test_claim_respects_running_limit(self):
+        first = self._post(self.director).data['id']
+        self._post(self.director)
+        other = self._post(self.manager).data['id']
+
+        self.assertEqual(claim_next_report().pk, first)
+        # Второй отчет директора ждет, пока формируется первый
+        self.assertEqual(claim_next_report().pk, other)
+        self.assertIsNone(claim_next_report())
+
+
+class ReportClaimLockTest(TransactionTestCase):
+    """Захват отчетов параллельными воркерами"""
+
+    def setUp(self):
+        self.director = User.objects.create(username='director', role='director')
+        self.manager = User.objects.create(username='manager', role='manager')
+        self.reports = [
+            GeneratedReport.objects.create(
+                name=f'Отчет {i}', report_type='summary', generated_by=user,
+                start_date=date(2026, 1, 1), end_date=date(2026, 3, 1),
+            )
+            for i, user in enumerate([self.director, self.director, self.manager])
+        ]
+
+    def test_locked_rows_and_users_are_skipped(self):
+        claimed = threading.Event()
+        release = threading.Event()
+
+        def other_worker():
+            # Воркер, который в этот момент захватывает первый отчет директора
+            try:
+                with transaction.atomic():
+                    report = GeneratedReport.objects.select_for_update().get(pk=self.reports[0].pk)
+                    User.objects.select_for_update().get(pk=self.director.pk)
+                    claimed.set()
+                    release.wait(10)
+                    report.status = 'processing'
+                    report.save(update_fields=['status'])
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        self.assertTrue(claimed.wait(10))
+        try:
+            # Первый отчет заблокирован, второй - того же пользователя, чья строка заблокирована
+            self.assertEqual(claim_next_report().pk, self.reports[2].pk)
+        finally:
+            release.set()
+            thread.join(10)
+
+        # После фиксации захвата лимит MAX_RUNNING_PER_USER не дает взять второй отчет директора
+        self.assertIsNone(claim_next_report())
+
+
+class StreamingTasksReportTest(TestCase):
+    """Потоковая генерация PDF для отчетов по задачам"""
+
+    def setUp(self):
+        self.director = User.objects.create(username='director', role='director')
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        project = Project.objects.create(
+            title='Проект', client=client_obj, manager=self.director,
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        Task.objects.bulk_create([
+            Task(title=f'Задача {i}', description='', project=project,
+                 assigned_to=self.director, deadline=date(2026, 2, 1), status='in_work')
+            for i in range(25)
+        ])
+
+    def test_tasks_period_report_is_rendered_in_chunks(self):
+        from django.core.files.storage import default_storage
+
+        report = GeneratedReport.objects.create(
+            name='Тест', report_type='tasks_period',
+            start_date=date(2000, 1, 1), end_date=date(2100, 1, 1),
+            generated_by=self.director,
+        )
+        view = ReportGenerationView()
+        view.PDF_TABLE_ROWS = 10
+        view.ITERATOR_CHUNK_SIZE = 10
+
+        self.assertTrue(view._generate_report_file(report))
+        self.addCleanup(default_storage.delete, report.file.name)
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'completed')
+        self.assertEqual(report.file_size, report.file.size)
+        with report.file.open('rb') as f:
+            self.assertEqual(f.read(5), b'%PDF-')
+
+        totals = {}
+        rows = list(view._iter_tasks_period_rows(report, totals))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(totals, {'total_tasks': 25, 'delayed_tasks': 0})
+
+
+class ReportCacheTest(TestCase):
+    """Повторное использование файлов отчетов и вытеснение кэша"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.director = User.objects.create(username='director', role='director')
+        self.client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        self.project = Project.objects.create(
+            title='Проект', client=self.client_obj, manager=self.director,
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+
+    def _generate(self, report_type='summary', user=None, export_format='pdf'):
+        report = GeneratedReport.objects.create(
+            name='Тест', report_type=report_type, export_format=export_format,
+            start_date=date(2026, 1, 1), end_date=date(2026, 3, 1),
+            generated_by=user or self.director,
+        )
+        report.projects.set([self.project])
+        self.assertTrue(ReportGenerationView()._generate_report_file(report))
+        report.refresh_from_db()
+        return report
+
+    def test_identical_request_reuses_file(self):
+        first = self._generate()
+        second = self._generate()
+
+        self.assertEqual(first.status, 'completed')
+        self.assertEqual(second.status, 'completed')
+        self.assertEqual(first.cache_key, second.cache_key)
+        self.assertEqual(first.file.name, second.file.name)
+
+    def test_file_is_not_shared_between_users(self):
+        from openpyxl import load_workbook
+
+        manager = User.objects.create(username='manager', role='manager', first_name='Анна', last_name='Смирнова')
+        first = self._generate(export_format='xlsx')
+        second = self._generate(user=manager, export_format='xlsx')
+
+        # В шапке файла - автор отчета, поэтому файл другого пользователя не переиспользуется
+        self.assertNotEqual(first.cache_key, second.cache_key)
+        self.assertNotEqual(first.file.name, second.file.name)
+        with second.file.open('rb') as f:
+            header = [row[0] for row in load_workbook(f).active.iter_rows(max_row=6, values_only=True) if row]
+        self.assertIn('Пользователь: Анна Смирнова', header)
+
+    def test_data_change_invalidates_cache(self):
+        first = self._generate('projects')
+
+        self.project.title = 'Проект обновлен'
+        self.project.save()
+        second = self._generate('projects')
+
+        self.assertNotEqual(first.cache_key, second.cache_key)
+        self.assertNotEqual(first.file.name, second.file.name)
+
+    def test_eviction_by_size_detaches_reports(self):
+        from .cache import evict_report_files
+
+        first = self._generate()
+        second = self._generate()
+
+        result = evict_report_files(max_age_days=30, max_size_mb=0)
+
+        self.assertEqual(result['evicted_files'], 1)
+        self.assertEqual(result['remaining_bytes'], 0)
+        for report in (first, second):
+            report.refresh_from_db()
+            self.assertFalse(report.file)
+            self.assertEqual(report.cache_key, '')
+
+
+class TabularExportTest(TestCase):
+    """Экспорт отчетов в XLSX и CSV"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.director = User.objects.create(
+            username='director', role='director', first_name='Иван', last_name='Петров'
+        )
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        project = Project.objects.create(
+            title='Проект', client=client_obj, manager=self.director,
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        Task.objects.bulk_create([
+            Task(title=f'Задача {i}', description='', project=project,
+                 assigned_to=self.director, deadline=date(2026, 2, 1), status='in_work')
+            for i in range(5)
+        ])
+
+    def _generate(self, export_format, report_type='tasks'):
+        report = GeneratedReport.objects.create(
+            name='Тест', report_type=report_type, export_format=export_format,
+            start_date=date(2000, 1, 1), end_date=date(2100, 1, 1),
+            generated_by=self.director,
+        )
+        self.assertTrue(ReportGenerationView()._generate_report_file(report))
+        report.refresh_from_db()
+        return report
+
+    def test_xlsx_export(self):
+        import openpyxl
+
+        report = self._generate('xlsx')
+
+        self.assertTrue(report.file.name.endswith('.xlsx'))
+        self.assertEqual(report.file_size, report.file.size)
+
+        with report.file.open('rb') as f:
+            rows = list(openpyxl.load_workbook(f).active.iter_rows(values_only=True))
+        headers = ReportGenerationView()._get_report_headers('tasks')
+        header_index = [row[:len(headers)] for row in rows].index(tuple(headers))
+        self.assertEqual(rows[header_index + 1][:4], (1, 'Задача 0', 'Проект', 'Иван Петров'))
+        self.assertEqual(rows[-1][0], 'Итоги: Всего задач: 5')
+
+    def test_csv_export(self):
+        import csv
+
+        report = self._generate('csv', 'projects')
+
+        with report.file.open('rb') as f:
+            rows = list(csv.reader(f.read().decode('utf-8-sig').splitlines(), delimiter=';'))
+        self.assertEqual(rows[0], ReportGenerationView()._get_report_headers('projects'))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1:3], ['Проект', 'Клиент'])
+        self.assertEqual(rows[1][7:], ['5', '0', '0.0%'])
+
+
+class ReportSchedulerTest(TestCase):
+    """Планировщик отчетов по расписанию шаблонов"""
+
+    def setUp(self):
+        from django.utils import timezone
+        from .models import ReportTemplate
+
+        self.now = timezone.make_aware(timezone.datetime(2026, 3, 1, 0, 5))
+        self.templates = [
+            ReportTemplate.objects.create(
+                name='Сводный', template_type='summary', frequency='monthly',
+                next_run_at=timezone.make_aware(timezone.datetime(2026, 3, 1)),
+            )
+            for i in range(3)
+        ]
+        ReportTemplate.objects.create(name='Ручной', template_type='tasks', frequency='manual')
+
+    def test_period_boundaries(self):
+        from .scheduler import get_report_period, get_next_run_at
+
+        self.assertEqual(get_report_period('monthly', self.now), (date(2026, 2, 1), date(2026, 2, 28)))
+        self.assertEqual(get_report_period('quarterly', self.now), (date(2026, 1, 1), date(2026, 2, 28)))
+        self.assertEqual(get_report_period('weekly', self.now), (date(2026, 2, 23), date(2026, 2, 28)))
+        self.assertEqual(get_report_period('daily', self.now), (date(2026, 2, 28), date(2026, 2, 28)))
+        self.assertEqual(get_next_run_at('monthly', self.now).date(), date(2026, 4, 1))
+        self.assertEqual(get_next_run_at('quarterly', self.now).date(), date(2026, 4, 1))
+        self.assertEqual(get_next_run_at('yearly', self.now).date(), date(2027, 1, 1))
+        self.assertEqual(get_next_run_at('weekly', self.now).date(), date(2026, 3, 2))
+
+    def test_tick_enqueues_due_templates_in_batches(self):
+        from django.test import override_settings
+        from django.utils import timezone
+        from .scheduler import run_scheduler_tick
+
+        with override_settings(REPORT_SCHEDULER={'BATCH_SIZE': 2}):
+            run = run_scheduler_tick(now=self.now)
+
+        self.assertTrue(run.is_success)
+        self.assertEqual(run.templates_due, 3)
+        self.assertEqual(run.reports_enqueued, 3)
+        self.assertEqual(run.max_lag_seconds, 300)
+
+        reports = GeneratedReport.objects.filter(template__in=self.templates)
+        self.assertEqual(reports.count(), 3)
+        self.assertEqual({r.status for r in reports}, {'pending'})
+        self.assertEqual({(r.start_date, r.end_date) for r in reports}, {(date(2026, 2, 1), date(2026, 2, 28))})
+        # Одинаковые шаблоны получают один ключ кэша и формируются один раз
+        self.assertEqual(len({r.cache_key for r in reports}), 1)
+
+        for template in self.templates:
+            template.refresh_from_db()
+            self.assertEqual(timezone.localtime(template.next_run_at).date(), date(2026, 4, 1))
+
+        # Повторный запуск в том же периоде ничего не ставит в очередь
+        self.assertEqual(run_scheduler_tick(now=self.now).templates_due, 0)
+
+    def test_template_with_deleted_records_does_not_block_tick(self):
+        from django.utils import timezone
+        from .models import ReportTemplate
+        from .scheduler import run_scheduler_tick
+
+        project = Project.objects.create(
+            title='Проект', client=Client.objects.create(
+                name='Клиент', contact_person='Иванов Иван',
+                phone='+79990000000', email='client@example.com'
+            ),
+            manager=User.objects.create(username='manager', role='manager'),
+            start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        deleted_project_id = project.pk + 1000
+        stale = ReportTemplate.objects.create(
+            name='Устаревший', template_type='projects', frequency='monthly',
+            next_run_at=timezone.make_aware(timezone.datetime(2026, 3, 1)),
+            default_parameters={'generated_by': 999999, 'projects': [project.pk, deleted_project_id]},
+        )
+        broken = ReportTemplate.objects.create(
+            name='Ошибочный', template_type='projects', frequency='monthly',
+            next_run_at=timezone.make_aware(timezone.datetime(2026, 3, 1)),
+            default_parameters={'projects': ['не число']},
+        )
+
+        run = run_scheduler_tick(now=self.now)
+
+        self.assertEqual(run.templates_due, 5)
+        self.assertEqual(run.reports_enqueued, 4)
+        self.assertFalse(run.is_success)
+        self.assertIn(f'Шаблон {broken.pk}', run.error_message)
+
+        report = GeneratedReport.objects.get(template=stale)
+        self.assertIsNone(report.generated_by_id)
+        self.assertEqual(list(report.projects.values_list('pk', flat=True)), [project.pk])
+        self.assertEqual(GeneratedReport.objects.filter(template__in=self.templates).count(), 3)
+
+        # Шаблон с ошибкой пропускает период и не попадает в следующий запуск
+        broken.refresh_from_db()
+        self.assertEqual(timezone.localtime(broken.next_run_at).date(), date(2026, 4, 1))
+        self.assertEqual(run_scheduler_tick(now=self.now).templates_due, 0)
+
+    def test_duplicate_reports_wait_for_first_render(self):
+        from .queue import claim_next_report
+        from .scheduler import run_scheduler_tick
+
+        run_scheduler_tick(now=self.now)
+
+        first = claim_next_report()
+        self.assertIsNotNone(first)
+        self.assertIsNone(claim_next_report())
+
+
+class PdfStyleRegistryTest(TestCase):
+    """Шрифты и стили PDF инициализируются один раз на процесс"""
+
+    def test_styles_are_shared_between_reports(self):
+        from .pdf_styles import get_pdf_styles
+
+        registry = get_pdf_styles()
+        self.assertIsNotNone(registry.init_seconds)
+        self.assertIs(get_pdf_styles(), registry)
+
+        styles = registry.paragraph_styles
+        table_style = registry.table_style
+        view = ReportGenerationView()
+        report = GeneratedReport.objects.create(
+            name='Тест', report_type='summary',
+            start_date=date(2026, 1, 1), end_date=date(2026, 3, 1),
+        )
+        self.assertTrue(view._generate_pdf_report(report, view._collect_report_data(report)))
+        self.assertIs(get_pdf_styles().paragraph_styles, styles)
+        self.assertIs(get_pdf_styles().table_style, table_style)
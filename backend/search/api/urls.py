@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import SearchView, SuggestView
+
+urlpatterns = [
+    path('', SearchView.as_view(), name='search'),
+    path('suggest/<str:kind>/', SuggestView.as_view(), name='search-suggest'),
+]
@@ -0,0 +1,7 @@
+from .search import SearchView
+from .suggest import SuggestView
+
+__all__ = [
+    'SearchView',
+    'SuggestView',
+]
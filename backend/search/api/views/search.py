@@ -0,0 +1,40 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ...fulltext import SEARCHERS, get_search_settings, search
+
+
+class SearchView(APIView):
+    """
+    Поиск по проектам, задачам, комментариям и файлам, доступным пользователю.
+    ?q=запрос&types=project,task,comment,file&limit=20
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        options = get_search_settings()
+        text = request.query_params.get('q', '').replace('\x00', '').strip()
+        if len(text) < options['MIN_QUERY_LENGTH']:
+            return Response(
+                {'error': f'Запрос должен содержать не менее {options["MIN_QUERY_LENGTH"]} символов'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        types = [t for t in request.query_params.get('types', '').split(',') if t]
+        unknown = [t for t in types if t not in SEARCHERS]
+        if unknown:
+            return Response(
+                {'error': f'Неизвестный тип объектов: {", ".join(unknown)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = int(request.query_params.get('limit') or options['LIMIT'])
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'Неверное значение limit'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = search(request.user, text, types=types, limit=limit)
+        return Response({'query': text, 'count': len(results), 'results': results})
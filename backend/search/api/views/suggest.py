@@ -0,0 +1,41 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ...suggest import (
+    SUGGESTERS, get_suggest_settings, get_suggestions,
+    get_suggestions_etag, normalize_prefix,
+)
+
+
+class SuggestView(APIView):
+    """
+    Подсказки для полей выбора: /api/search/suggest/<client|employee|project>/?q=начало&limit=10.
+    Ответ с ETag; при совпадающем If-None-Match - 304 без тела.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, kind):
+        if kind not in SUGGESTERS:
+            return Response({'error': f'Неизвестный вид подсказок: {kind}'}, status=status.HTTP_404_NOT_FOUND)
+        
+        options = get_suggest_settings()
+        prefix = normalize_prefix(request.query_params.get('q', ''))
+        if len(prefix) < options['MIN_PREFIX_LENGTH']:
+            return Response({'results': []})
+        
+        try:
+            limit = int(request.query_params.get('limit') or options['LIMIT'])
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'Неверное значение limit'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, options['MAX_LIMIT'])
+        
+        etag = f'"{get_suggestions_etag(kind, request.user, prefix, limit)}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        results = get_suggestions(kind, request.user, prefix, limit, etag.strip('"'))
+        return Response({'results': results}, headers=headers)
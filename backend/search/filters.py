@@ -0,0 +1,19 @@
+from rest_framework import filters
+
+from .fulltext import filter_by_text
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= по полнотекстовому индексу (search_vector) вместо icontains по search_fields.
+    search_fields только включают поиск во view: документ задан триггером в миграции.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').replace('\x00', '').strip()
+        if not text:
+            return queryset
+        search_fields = self.get_search_fields(view, request)
+        if not search_fields:
+            return queryset
+        return filter_by_text(queryset, text)
@@ -0,0 +1,176 @@
+"""
+Полнотекстовый поиск по проектам, задачам, комментариям и файлам.
+
+У Project, Task, Comment и ProjectFile есть поле search_vector (tsvector
+с конфигурацией russian): его заполняет триггер при каждой вставке
+и изменении полей документа (миграции *_search_vector), поиск идет
+по GIN-индексу со стеммингом («макет» находит «макеты», «макетов»).
+Заголовок (название) имеет вес A, описание - вес B.
+
+search() выполняет по одному запросу на тип объектов. Из строк, доступных
+пользователю (projects/visibility.py) и подходящих под запрос, берутся
+кандидаты: не больше CANDIDATES строк с совпадением в заголовке (вес A,
+отдельный GIN-индекс по ts_filter(search_vector, '{a}')) и не больше
+CANDIDATES строк с совпадением в любом поле. Релевантность (ts_rank)
+считается только для кандидатов, в ответ идут LIMIT лучших. Ограничение
+держит время запроса постоянным для частых слов: на миллионе задач, где слово
+есть в каждой десятой, выборка занимает десятки миллисекунд, а ранжирование
+всех совпадений - сотни. Совпадения в заголовке всегда попадают в кандидаты
+первыми, поэтому лучшие результаты не теряются, пока таких строк меньше
+CANDIDATES. Результаты всех типов объединяются по убыванию релевантности.
+
+Настройки берутся из settings.SEARCH:
+    LIMIT            - результатов по умолчанию
+    MAX_LIMIT        - наибольшее число результатов
+    MIN_QUERY_LENGTH - минимальная длина запроса
+    CANDIDATES       - кандидатов одного типа на каждую из двух выборок
+    EXCERPT_LENGTH   - длина фрагмента текста в результате
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import F, Func, Value
+from django.utils.text import Truncator
+
+from comments.models import Comment
+from files.models import ProjectFile
+from projects.models import Project, Task
+from projects.visibility import (
+    filter_visible_comments, filter_visible_files,
+    filter_visible_projects, filter_visible_tasks,
+)
+
+SEARCH_CONFIG = 'russian'
+
+DEFAULT_SEARCH_SETTINGS = {
+    'LIMIT': 20,
+    'MAX_LIMIT': 50,
+    'MIN_QUERY_LENGTH': 2,
+    'CANDIDATES': 1000,
+    'EXCERPT_LENGTH': 200,
+}
+
+# Адреса объектов во фронтенде (как в CommentSerializer.get_content_object_info)
+OBJECT_URLS = {
+    'project': '/projects/{}',
+    'task': '/tasks/{}',
+    'file': '/files/{}',
+    'client': '/clients/{}',
+}
+
+
+def get_search_settings():
+    """Настройки поиска с учетом значений по умолчанию"""
+    return {**DEFAULT_SEARCH_SETTINGS, **getattr(settings, 'SEARCH', {})}
+
+
+def get_search_query(text):
+    """Запрос в синтаксисе поисковых систем: слова, "фраза", -исключение, or"""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def filter_by_text(queryset, text):
+    """Строки queryset, подходящие под запрос (без ранжирования)"""
+    return queryset.filter(search_vector=get_search_query(text))
+
+
+def title_vector():
+    """Часть search_vector с весом A (заголовок); совпадает с выражением индекса *_title_search_idx"""
+    return Func('search_vector', Value('{a}'), function='ts_filter', output_field=SearchVectorField())
+
+
+def rank_by_text(queryset, text, candidates, weighted=True):
+    """
+    Строки queryset, подходящие под запрос, с релевантностью rank по убыванию.
+    Релевантность считается не более чем для 2 * candidates строк: сначала
+    совпадения в заголовке, затем любые совпадения. weighted=False - у документа
+    только поле с весом A, достаточно одной выборки.
+    """
+    query = get_search_query(text)
+    matched = filter_by_text(queryset, text).order_by().values('pk')[:candidates]
+    if weighted:
+        in_title = (
+            queryset.alias(title_vector=title_vector())
+            .filter(title_vector=query).order_by().values('pk')[:candidates]
+        )
+        matched = in_title.union(matched, all=True)
+    return (
+        queryset.model._default_manager
+        .filter(pk__in=matched)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-pk')
+    )
+
+
+def _result(object_type, object_id, title, text, rank, url, options):
+    return {
+        'type': object_type,
+        'id': object_id,
+        'title': title,
+        'excerpt': Truncator(text or '').chars(options['EXCERPT_LENGTH']),
+        'rank': rank,
+        'url': url,
+    }
+
+
+def _search_projects(user, text, limit, options):
+    queryset = filter_visible_projects(Project.objects.filter(is_active=True), user)
+    rows = rank_by_text(queryset, text, options['CANDIDATES'])
+    return [
+        _result('project', row['id'], row['title'], row['description'], row['rank'],
+                OBJECT_URLS['project'].format(row['id']), options)
+        for row in rows.values('id', 'title', 'description', 'rank')[:limit]
+    ]
+
+
+def _search_tasks(user, text, limit, options):
+    queryset = filter_visible_tasks(Task.objects.filter(is_active=True), user)
+    rows = rank_by_text(queryset, text, options['CANDIDATES'])
+    return [
+        _result('task', row['id'], row['title'], row['description'], row['rank'],
+                OBJECT_URLS['task'].format(row['id']), options)
+        for row in rows.values('id', 'title', 'description', 'rank')[:limit]
+    ]
+
+
+def _search_comments(user, text, limit, options):
+    queryset = filter_visible_comments(Comment.objects.filter(is_active=True), user)
+    rows = rank_by_text(queryset, text, options['CANDIDATES'], weighted=False)
+    return [
+        _result('comment', row['id'], Truncator(row['text']).chars(80), row['text'], row['rank'],
+                OBJECT_URLS.get(row['content_type'], '').format(row['object_id']), options)
+        for row in rows.values('id', 'text', 'content_type', 'object_id', 'rank')[:limit]
+    ]
+
+
+def _search_files(user, text, limit, options):
+    queryset = filter_visible_files(ProjectFile.objects.filter(is_active=True), user)
+    rows = rank_by_text(queryset, text, options['CANDIDATES'])
+    return [
+        _result('file', row['id'], row['name'], row['description'], row['rank'],
+                OBJECT_URLS['file'].format(row['id']), options)
+        for row in rows.values('id', 'name', 'description', 'rank')[:limit]
+    ]
+
+
+SEARCHERS = {
+    'project': _search_projects,
+    'task': _search_tasks,
+    'comment': _search_comments,
+    'file': _search_files,
+}
+
+
+def search(user, text, types=None, limit=None):
+    """
+    Поиск по объектам, доступным пользователю. types - типы объектов
+    (по умолчанию все). Возвращает не больше limit результатов по убыванию релевантности.
+    """
+    options = get_search_settings()
+    limit = min(limit or options['LIMIT'], options['MAX_LIMIT'])
+
+    results = []
+    for object_type in types or SEARCHERS:
+        results.extend(SEARCHERS[object_type](user, text, limit, options))
+
+    results.sort(key=lambda result: result['rank'], reverse=True)
+    return results[:limit]
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Client, Employee, User
+from projects.models import Project
+from .suggest import invalidate_suggestions
+
+
+@receiver([post_save, post_delete], sender=Client)
+def reset_client_suggestions(sender, **kwargs):
+    invalidate_suggestions('client')
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Employee)
+def reset_employee_suggestions(sender, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login - подсказки не меняются
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_suggestions('employee')
+
+
+@receiver([post_save, post_delete], sender=Project)
+def reset_project_suggestions(sender, **kwargs):
+    invalidate_suggestions('project')
@@ -0,0 +1,165 @@
+"""
+Автодополнение в полях выбора: клиенты, сотрудники, проекты.
+
+Вместо загрузки полных списков форма запрашивает подсказки по введенному
+началу строки (/api/search/suggest/<kind>/?q=...). На PostgreSQL совпадения
+ищутся оператором pg_trgm «%>» (word_similarity: введенный текст похож на
+начало слова в названии, опечатки допускаются) по GIN-индексам
+gin_trgm_ops на Client.name, User.last_name/first_name и Project.title;
+в ответ идут LIMIT лучших по сходству - id и подпись, без полных объектов.
+
+Ответы кэшируются в общем для всех процессов кэше (settings.CACHES)
+и отдаются с ETag. Ключ и ETag включают версию данных вида подсказок:
+при сохранении или удалении клиента, пользователя, сотрудника или проекта
+версия меняется (search/signals.py), для проектов учитывается и версия
+состава участников (permission_cache). Запрос с совпадающим If-None-Match
+получает 304 без обращения к БД.
+
+Версия - случайная метка (как в projects/cache.py), она меняется сразу
+и еще раз после фиксации транзакции. Метка живет VERSION_TTL секунд:
+после вытеснения или истечения создается новая, и старые ответы и ETag
+просто перестают совпадать.
+
+Настройки берутся из settings.SEARCH_SUGGEST:
+    LIMIT             - подсказок по умолчанию
+    MAX_LIMIT         - наибольшее число подсказок
+    MIN_PREFIX_LENGTH - минимальная длина введенного текста
+    MAX_PREFIX_LENGTH - текст длиннее обрезается
+    CACHE_TTL         - время жизни ответа в кэше, сек
+    VERSION_TTL       - время жизни версии вида подсказок, сек
+"""
+import hashlib
+import operator
+import uuid
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from core.models import Client, Employee
+from projects.models import Project
+from projects.permission_cache import get_membership_version
+from projects.visibility import filter_visible_projects
+
+DEFAULT_SUGGEST_SETTINGS = {
+    'LIMIT': 10,
+    'MAX_LIMIT': 20,
+    'MIN_PREFIX_LENGTH': 2,
+    'MAX_PREFIX_LENGTH': 64,
+    'CACHE_TTL': 300,
+    'VERSION_TTL': 24 * 60 * 60,
+}
+
+VERSION_KEY = 'suggest:version:{}'
+
+
+def get_suggest_settings():
+    """Настройки автодополнения с учетом значений по умолчанию"""
+    return {**DEFAULT_SUGGEST_SETTINGS, **getattr(settings, 'SEARCH_SUGGEST', {})}
+
+
+def _get_version(kind):
+    key = VERSION_KEY.format(kind)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, get_suggest_settings()['VERSION_TTL'])
+        version = cache.get(key)
+    return version
+
+
+def _set_new_version(kind):
+    cache.set(VERSION_KEY.format(kind), uuid.uuid4().hex, get_suggest_settings()['VERSION_TTL'])
+
+
+def invalidate_suggestions(kind):
+    """Сброс закэшированных подсказок вида kind во всех процессах"""
+    _set_new_version(kind)
+    transaction.on_commit(lambda: _set_new_version(kind))
+
+
+def normalize_prefix(text):
+    """Введенный текст без лишних пробелов, не длиннее MAX_PREFIX_LENGTH"""
+    text = ' '.join(text.replace('\x00', '').split())
+    return text[:get_suggest_settings()['MAX_PREFIX_LENGTH']]
+
+
+def rank_by_similarity(queryset, prefix, fields):
+    """Строки, в которых одно из полей похоже на prefix, по убыванию сходства"""
+    condition = reduce(operator.or_, (Q(**{f'{field}__trigram_word_similar': prefix}) for field in fields))
+    similarities = [TrigramWordSimilarity(prefix, field) for field in fields]
+    score = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+    return queryset.filter(condition).annotate(score=score).order_by('-score', *fields)
+
+
+def _suggest_clients(user, prefix, limit):
+    # Клиентов видят директор и менеджеры (как в ClientViewSet)
+    if user.role not in ('director', 'manager'):
+        return []
+    queryset = Client.objects.filter(is_active=True, is_archived=False)
+    rows = rank_by_similarity(queryset, prefix, ('name',)).values('id', 'name')[:limit]
+    return [{'id': row['id'], 'label': row['name']} for row in rows]
+
+
+def _suggest_employees(user, prefix, limit):
+    queryset = Employee.objects.filter(is_active=True)
+    # Сотрудники видят только себя (как в EmployeeViewSet)
+    if user.role not in ('director', 'manager'):
+        queryset = queryset.filter(user=user)
+    rows = (
+        rank_by_similarity(queryset, prefix, ('user__last_name', 'user__first_name'))
+        .annotate(last_name=F('user__last_name'), first_name=F('user__first_name'))
+        .values('id', 'user_id', 'last_name', 'first_name', 'position')[:limit]
+    )
+    return [
+        {
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'label': f"{row['last_name']} {row['first_name']}".strip(),
+            'position': row['position'],
+        }
+        for row in rows
+    ]
+
+
+def _suggest_projects(user, prefix, limit):
+    queryset = filter_visible_projects(Project.objects.filter(is_active=True), user)
+    rows = rank_by_similarity(queryset, prefix, ('title',)).values('id', 'title')[:limit]
+    return [{'id': row['id'], 'label': row['title']} for row in rows]
+
+
+SUGGESTERS = {
+    'client': _suggest_clients,
+    'employee': _suggest_employees,
+    'project': _suggest_projects,
+}
+
+
+def _get_scope(kind, user):
+    """Часть ключа, от которой зависит видимость строк пользователю"""
+    if kind == 'project':
+        if user.role == 'director':
+            return 'all'
+        return f'user{user.pk}:{get_membership_version()}'
+    if kind == 'employee' and user.role not in ('director', 'manager'):
+        return f'user{user.pk}'
+    return 'staff' if user.role in ('director', 'manager') else 'none'
+
+
+def get_suggestions_etag(kind, user, prefix, limit):
+    """ETag подсказок: меняется вместе с данными вида и областью видимости пользователя"""
+    raw = f'{kind}:{_get_version(kind)}:{_get_scope(kind, user)}:{limit}:{prefix}'
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def get_suggestions(kind, user, prefix, limit, etag):
+    """Подсказки из кэша по ETag, иначе из БД"""
+    cache_key = f'suggest:{kind}:{etag}'
+    suggestions = cache.get(cache_key)
+    if suggestions is None:
+        suggestions = SUGGESTERS[kind](user, prefix, limit)
+        cache.set(cache_key, suggestions, get_suggest_settings()['CACHE_TTL'])
+    return suggestions
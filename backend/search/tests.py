@@ -0,0 +1,154 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from comments.models import Comment
+from core.models import User, Client
+from files.models import ProjectFile
+from projects.models import Project, Task
+from .api.views import SearchView, SuggestView
+from .suggest import VERSION_KEY, get_suggest_settings
+
+
+class SearchViewTest(TestCase):
+    """Общий поиск учитывает права доступа к объектам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create(username='director', role='director')
+        cls.designer = User.objects.create(username='designer', role='designer')
+        client_obj = Client.objects.create(
+            name='Клиент', contact_person='Иванов Иван',
+            phone='+79990000000', email='client@example.com'
+        )
+        project = Project.objects.create(
+            title='Фирменный стиль', description='логотип и носители', client=client_obj,
+            manager=cls.director, start_date=date(2026, 1, 1), planned_end_date=date(2026, 6, 1),
+        )
+        cls.own_task = Task.objects.create(
+            title='Эскизы', description='три варианта: логотип', project=project,
+            assigned_to=cls.designer, deadline=date(2026, 2, 1),
+        )
+        cls.other_task = Task.objects.create(
+            title='Презентация', description='логотип на слайдах', project=project, deadline=date(2026, 2, 1),
+        )
+        Comment.objects.create(
+            author=cls.director, content_type='task', object_id=cls.other_task.pk, text='логотип согласован'
+        )
+        ProjectFile.objects.create(
+            name='логотип', original_filename='logo.psd', file='projects/logo.psd', file_type='image',
+            extension='.psd', size=1, project=project, uploaded_by=cls.director,
+        )
+
+    def _search(self, user, query):
+        request = APIRequestFactory().get('/api/search/', query)
+        force_authenticate(request, user=user)
+        return SearchView.as_view()(request)
+
+    def test_results_respect_permissions(self):
+        response = self._search(self.director, {'q': 'логотип'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(result['type'] for result in response.data['results']),
+            ['comment', 'file', 'project', 'task', 'task']
+        )
+        comment = next(result for result in response.data['results'] if result['type'] == 'comment')
+        self.assertEqual(comment['url'], f'/tasks/{self.other_task.pk}')
+
+        response = self._search(self.designer, {'q': 'логотип', 'types': 'task,project'})
+        self.assertEqual(
+            [(result['type'], result['id']) for result in response.data['results']],
+            [('task', self.own_task.pk)]
+        )
+
+    @override_settings(SEARCH={'CANDIDATES': 10})
+    def test_title_match_ranks_above_newer_description_matches(self):
+        project = Project.objects.get()
+        # Совпадение в заголовке создано раньше десятков совпадений в описании, которых
+        # больше CANDIDATES: в ответ оно попадает, потому что заголовки выбираются отдельно
+        best = Task.objects.create(title='Брендбук', description='', project=project, deadline=date(2026, 2, 1))
+        Task.objects.bulk_create(
+            Task(title=f'Задача {number}', description='правки в брендбук', project=project, deadline=date(2026, 2, 1))
+            for number in range(60)
+        )
+
+        response = self._search(self.director, {'q': 'брендбук', 'types': 'task', 'limit': 5})
+        results = response.data['results']
+        self.assertEqual(results[0]['id'], best.pk)
+        self.assertEqual(len(results), 5)
+        ranks = [result['rank'] for result in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertGreater(ranks[0], ranks[1])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self._search(self.director, {'q': 'л'}).status_code, 400)
+        self.assertEqual(self._search(self.director, {'q': 'логотип', 'types': 'user'}).status_code, 400)
+
+
+class SuggestViewTest(TestCase):
+    """Подсказки для полей выбора: права, лимит и ETag"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.director = User.objects.create(username='director', role='director')
+        cls.designer = User.objects.create(username='designer', role='designer')
+        for i in range(25):
+            Client.objects.create(
+                name=f'Клиент {i:02d}', contact_person='Иванов Иван',
+                phone='+79990000000', email=f'client{i}@example.com'
+            )
+
+    def _suggest(self, user, kind, query, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = APIRequestFactory().get(f'/api/search/suggest/{kind}/', query, **headers)
+        force_authenticate(request, user=user)
+        return SuggestView.as_view()(request, kind=kind)
+
+    def test_suggestions_and_etag(self):
+        response = self._suggest(self.director, 'client', {'q': 'Клиент 0'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['label'] for item in response.data['results']][:2], ['Клиент 00', 'Клиент 01'])
+        self.assertEqual(set(response.data['results'][0]), {'id', 'label'})
+        etag = response['ETag']
+
+        # Повторный запрос с ETag - 304 без запросов к данным (только версия из общего кэша)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._suggest(self.director, 'client', {'q': 'Клиент 0'}, etag=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual([query['sql'] for query in ctx.captured_queries if 'django_cache' not in query['sql']], [])
+
+        # Новый клиент меняет версию подсказок
+        Client.objects.create(
+            name='Клиент 00а', contact_person='Иванов Иван',
+            phone='+79990000000', email='new@example.com'
+        )
+        response = self._suggest(self.director, 'client', {'q': 'Клиент 0'}, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Клиент 00а', [item['label'] for item in response.data['results']])
+
+        response = self._suggest(self.director, 'client', {'q': 'Клиент', 'limit': 100})
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_version_expires_and_resets_cached_suggestions(self):
+        response = self._suggest(self.director, 'client', {'q': 'Клиент 0'})
+        etag = response['ETag']
+        key = cache.make_and_validate_key(VERSION_KEY.format('client'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT expires FROM django_cache WHERE cache_key = %s', [key])
+            expires, = cursor.fetchone()
+        self.assertLess(expires, timezone.now() + timedelta(seconds=get_suggest_settings()['VERSION_TTL'] + 60))
+
+        # Истекшая или вытесненная версия заменяется новой, старый ETag не совпадает
+        cache.delete(VERSION_KEY.format('client'))
+        response = self._suggest(self.director, 'client', {'q': 'Клиент 0'}, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_scope(self):
+        self.assertEqual(self._suggest(self.designer, 'client', {'q': 'Клиент'}).data['results'], [])
+        self.assertEqual(self._suggest(self.director, 'user', {'q': 'Клиент'}).status_code, 404)
@@ -1,4 +1,7 @@
 import axiosInstance from './axiosConfig';
+import { getToken } from './auth';
+
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
 
 export const notificationsAPI = {
   getAll: async () => {
@@ -30,4 +33,24 @@ export const notificationsAPI = {
     const response = await axiosInstance.delete(`/notifications/${id}/`);
     return response.data;
   },
+
+  // Поток уведомлений (SSE). Возвращает EventSource или null, если поток недоступен
+  openStream: ({ onNotification, onUnreadCount, onResync, onOpen, onError }) => {
+    const token = getToken();
+    if (!window.EventSource || !token) {
+      return null;
+    }
+
+    const source = new EventSource(`${API_URL}/notifications/stream/?token=${encodeURIComponent(token)}`);
+    source.onopen = () => onOpen && onOpen();
+    source.onerror = () => onError && onError();
+    source.addEventListener('notification', (event) => {
+      onNotification && onNotification(JSON.parse(event.data));
+    });
+    source.addEventListener('unread_count', (event) => {
+      onUnreadCount && onUnreadCount(JSON.parse(event.data).count);
+    });
+    source.addEventListener('resync', () => onResync && onResync());
+    return source;
+  },
 };
\ No newline at end of file
@@ -35,9 +35,41 @@ const NotificationCenter = () => {
 
   useEffect(() => {
     fetchNotifications();
-    // Poll for new notifications every 30 seconds
-    const interval = setInterval(fetchNotifications, 30000);
-    return () => clearInterval(interval);
+
+    // Новые уведомления приходят по потоку (SSE); опрос раз в 30 секунд -
+    // только пока поток недоступен
+    let interval = null;
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(fetchNotifications, 30000);
+      }
+    };
+    const stopPolling = () => {
+      if (interval) {
+        clearInterval(interval);
+        interval = null;
+      }
+    };
+
+    const stream = notificationsAPI.openStream({
+      onNotification: (notification) => {
+        setNotifications((prev) => [notification, ...prev.filter((n) => n.id !== notification.id)]);
+      },
+      onUnreadCount: setUnreadCount,
+      onResync: fetchNotifications,
+      onOpen: stopPolling,
+      onError: startPolling,
+    });
+    if (!stream) {
+      startPolling();
+    }
+
+    return () => {
+      stopPolling();
+      if (stream) {
+        stream.close();
+      }
+    };
   }, []);
 
   const fetchNotifications = async () => {
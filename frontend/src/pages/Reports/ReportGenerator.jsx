@@ -207,7 +207,7 @@ const ReportGenerator = () => {
 
       const response = await reportsAPI.generate(formData);
       
-      setSuccess('Отчет успешно создан! Он будет доступен в списке отчетов.');
+      setSuccess('Отчет поставлен в очередь на формирование. Он появится в списке отчетов.');
       setGenerating(false);
       
       // Переход к списку отчетов через 2 секунды
@@ -238,7 +238,7 @@ const ReportGenerator = () => {
   const getFormatIcon = (format) => {
     switch (format) {
       case 'pdf': return <PdfIcon />;
-      case 'excel': return <ExcelIcon />;
+      case 'xlsx': return <ExcelIcon />;
       case 'csv': return <ExcelIcon />;
       case 'html': return <HtmlIcon />;
       default: return <DescriptionIcon />;
@@ -477,8 +477,8 @@ const ReportGenerator = () => {
 
             <Grid item xs={12}>
               <Grid container spacing={3}>
-                {['pdf', 'excel', 'csv', 'html'].map(format => (
-                  <Grid item xs={12} sm={6} md={3} key={format}>
+                {['pdf', 'xlsx', 'csv'].map(format => (
+                  <Grid item xs={12} sm={6} md={4} key={format}>
                     <Card
                       sx={{
                         cursor: 'pointer',
@@ -498,9 +498,8 @@ const ReportGenerator = () => {
                       </Typography>
                       <Typography variant="body2" color="text.secondary" align="center">
                         {format === 'pdf' && 'Для печати и просмотра'}
-                        {format === 'excel' && 'Для анализа данных'}
+                        {format === 'xlsx' && 'Для анализа данных'}
                         {format === 'csv' && 'Для импорта в другие системы'}
-                        {format === 'html' && 'Для просмотра в браузере'}
                       </Typography>
                     </Card>
                   </Grid>
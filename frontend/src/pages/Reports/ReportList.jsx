@@ -229,12 +229,15 @@ const ReportList = () => {
   };
 
   const getStatusColor = (report) => {
+    if (report.status === 'pending' || report.status === 'processing') return 'info';
     if (!report.is_success) return 'error';
     if (report.is_archived) return 'default';
     return 'success';
   };
 
   const getStatusText = (report) => {
+    if (report.status === 'pending') return 'В очереди';
+    if (report.status === 'processing') return 'Формируется';
     if (!report.is_success) return 'Ошибка';
     if (report.is_archived) return 'Архив';
     return 'Успешно';